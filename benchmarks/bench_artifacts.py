@@ -0,0 +1,130 @@
+"""Artifact writing benchmark: time the event loop spends writing a run's files, synchronous vs ArtifactStore.
+
+Run from the repository root:
+
+    python benchmarks/bench_artifacts.py [--sections 40] [--kb 12] [--interval 5] [--fsync]
+
+For every section, the files the flow writes (debug input and output,
+section file, report and index appends) are written once with blocking
+``open``/``write`` calls on the event loop, as the flow used to do, and once
+through an ArtifactStore at each debug level, one section every
+``--interval`` ms (sections finish one by one in a real run). The loop time
+is what the event loop is blocked; the total time includes waiting for the
+writer thread. ``--fsync`` syncs every file, as a slow or network disk
+would make each write wait.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from src.reporting_flow import artifacts as artifacts_module  # noqa: E402
+from src.reporting_flow.artifacts import DEBUG_LEVELS, ArtifactStore  # noqa: E402
+from src.reporting_flow.run_context import RunContext  # noqa: E402
+
+
+def section_payloads(args):
+    content = ("word " * (args.kb * 200)).strip()
+    inputs = {"topic": "benchmark", "section": json.dumps({"title": "Section", "content_outline": ["a"] * 20})}
+    return [(f"## Section {i + 1}\n\n{content}", inputs) for i in range(args.sections)]
+
+
+def write_file(path, data, mode, fsync):
+    with open(path, mode) as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def run_sync(run, payloads, interval, fsync):
+    os.makedirs(run.debug_dir, exist_ok=True)
+    report = os.path.join(run.report_dir, "report.md")
+    index = os.path.join(run.run_dir, "index.md")
+    loop_time = 0.0
+    for i, (content, inputs) in enumerate(payloads):
+        started = time.perf_counter()
+        write_file(os.path.join(run.debug_dir, f"section_{i + 1}_input.json"), json.dumps(inputs, indent=2), "w", fsync)
+        write_file(os.path.join(run.debug_dir, f"section_{i + 1}_output.txt"), content, "w", fsync)
+        write_file(os.path.join(run.sections_dir, f"{i + 1:02d}.md"), content, "w", fsync)
+        write_file(report, content + "\n\n", "a", fsync)
+        write_file(index, f"{i + 1}. section\n", "a", fsync)
+        loop_time += time.perf_counter() - started
+        await asyncio.sleep(interval)
+    return loop_time
+
+
+async def run_store(run, payloads, level, interval):
+    store = ArtifactStore(run, debug_level=level, archive=False)
+    report = os.path.join(run.report_dir, "report.md")
+    index = os.path.join(run.run_dir, "index.md")
+    loop_time = 0.0
+    for i, (content, inputs) in enumerate(payloads):
+        started = time.perf_counter()
+        store.debug_json(f"section_{i + 1}_input.json", inputs)
+        store.write(os.path.join(run.sections_dir, f"{i + 1:02d}.md"), content)
+        store.debug(f"section_{i + 1}_output.txt", content)
+        store.append(report, content + "\n\n")
+        store.append(index, f"{i + 1}. section\n")
+        loop_time += time.perf_counter() - started
+        await asyncio.sleep(interval)
+    await store.close()
+    return loop_time
+
+
+def patch_fsync():
+    """Make the writer thread sync every file it writes, like the synchronous variant"""
+    original_open = open
+
+    def fsync_open(path, mode="r", *args, **kwargs):
+        f = original_open(path, mode, *args, **kwargs)
+        if "r" not in mode:
+            original_close = f.close
+
+            def close():
+                f.flush()
+                os.fsync(f.fileno())
+                original_close()
+            f.close = close
+        return f
+    artifacts_module.open = fsync_open
+
+
+async def main_async(args):
+    payloads = section_payloads(args)
+    if args.fsync:
+        patch_fsync()
+    print(f"{'writer':>18} {'loop ms':>9} {'total ms':>9}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        variants = [("sync", None)] + [(f"store ({level})", level) for level in DEBUG_LEVELS]
+        for n, (name, level) in enumerate(variants):
+            run = RunContext.create({}, output_dir=output_dir, run_id=f"run_{n}")
+            started = time.perf_counter()
+            if level is None:
+                loop_time = await run_sync(run, payloads, args.interval / 1000, args.fsync)
+            else:
+                loop_time = await run_store(run, payloads, level, args.interval / 1000)
+            total = time.perf_counter() - started
+            print(f"{name:>18} {loop_time * 1000:9.2f} {total * 1000:9.2f}")
+    print(f"({args.sections} sections of {args.kb} KB, one every {args.interval:g} ms{', fsync' if args.fsync else ''})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--kb", type=int, default=12, help="Size of a section in KB")
+    parser.add_argument("--interval", type=float, default=5.0, help="Milliseconds between two sections")
+    parser.add_argument("--fsync", action="store_true", help="Sync every file to disk")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Output budget benchmark: completion tokens and section latency of a report, without and with budgets.
+
+Run from the repository root:
+
+    python benchmarks/bench_budgets.py [--sections 8] [--completion-tokens 1500] [--stdev 1500] [--report-tokens 16000]
+
+The content writers of a report of ``--sections`` sections are answered by
+the offline stand-in LLM with completion lengths drawn from a normal
+distribution of mean ``--completion-tokens`` and deviation ``--stdev``, so
+that some sections balloon, generated at ``--tokens-per-second``. The report
+is written three times: without budgets (no output limit on the writer
+tasks), with the task budgets of TASK_BUDGETS, and with a report budget of
+``--report-tokens`` completion tokens on top. The stand-in follows the length
+asked in the prompt, as instruction-tuned models do, and is cut at the output
+limit. Runs happen in this process after a warm-up; reports are written to a
+temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["REPORTING_LLM_STAND_IN"] = "1"
+os.environ["REPORTING_LLM_CACHE"] = "0"
+os.environ["REPORTING_SEARCH_CACHE"] = "0"
+
+
+def run(task_budgets, report_tokens):
+    """Writer completion tokens, section wall times and writing stage wall time of one report"""
+    from src.reporting_flow.config import REPORT_BUDGET_CONFIG, TASK_BUDGETS
+    from src.reporting_flow.main import ReportingFlow
+
+    saved = {name: dict(budget) for name, budget in TASK_BUDGETS.items()}
+    if not task_budgets:
+        for budget in TASK_BUDGETS.values():
+            budget["max_output_tokens"] = None
+    REPORT_BUDGET_CONFIG["output_tokens"] = report_tokens
+    try:
+        flow = ReportingFlow()
+        asyncio.run(flow.kickoff_async())
+    finally:
+        TASK_BUDGETS.update(saved)
+    tokens = sum(crew["completion_tokens"] for crew in flow.metrics.crews if crew["crew"] == "content_writer")
+    sections = [section["wall_seconds"] for section in flow.metrics.sections]
+    return tokens, sections, flow.metrics.stages["generate_reporting_content"]["wall_seconds"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--completion-tokens", type=int, default=1500, help="Mean tokens of an answer")
+    parser.add_argument("--stdev", type=int, default=1500, help="Standard deviation of the tokens of an answer")
+    parser.add_argument("--tokens-per-second", type=float, default=4000)
+    parser.add_argument("--report-tokens", type=int, default=16000, help="Report budget of the last run")
+    args = parser.parse_args()
+    os.environ["REPORTING_LLM_STAND_IN_SECTIONS"] = str(args.sections)
+    os.environ["REPORTING_LLM_STAND_IN_COMPLETION_TOKENS"] = str(args.completion_tokens)
+    os.environ["REPORTING_LLM_STAND_IN_COMPLETION_TOKENS_STDEV"] = str(args.stdev)
+    os.environ["REPORTING_LLM_STAND_IN_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        run(True, 0)  # warm-up: imports and crews
+        rows = [
+            ("none", run(False, 0)),
+            ("task", run(True, 0)),
+            ("task+report", run(True, args.report_tokens)),
+        ]
+        os.chdir(REPO_ROOT)
+
+    print(f"{'budgets':>12} {'writer tok':>11} {'section p50 s':>14} {'section max s':>14} {'writing s':>10}")
+    for name, (tokens, sections, writing) in rows:
+        print(f"{name:>12} {tokens:11d} {statistics.median(sections):14.2f} {max(sections):14.2f} {writing:10.2f}")
+    print(f"({args.sections} sections, answers of {args.completion_tokens} +/- {args.stdev} tokens "
+          f"at {args.tokens_per_second:g} tokens/s, report budget {args.report_tokens} tokens)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Crew setup benchmark: time spent preparing the content writer crew for one section.
+
+Run from the repository root:
+
+    python benchmarks/bench_crew_setup.py [--sections 20]
+
+Compares, per section:
+
+- ``rebuild``: a new crew per section with the YAML configs parsed again
+  (what the flow did before crews were pooled);
+- ``rebuild_cached_yaml``: a new crew per section from the parsed configs;
+- ``pooled``: a crew checked out of a ``CrewPool`` (what the flow does now).
+
+No LLM is called; only crew construction and checkout are timed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+import yaml  # noqa: E402
+
+from src.reporting_flow.crew_pool import CrewPool, load_yaml  # noqa: E402
+from src.reporting_flow.crews.reporting_content_writer.reporting_content_writer_crew import (  # noqa: E402
+    ReportingContentWriterCrew,
+)
+
+
+def parse_yaml(config_path):
+    with open(config_path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def time_sections(sections, setup):
+    timings = []
+    for _ in range(sections):
+        start = time.perf_counter()
+        setup()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=20)
+    args = parser.parse_args()
+
+    def rebuild():
+        ReportingContentWriterCrew().crew()
+
+    def checkout():
+        with pool.checkout():
+            pass
+
+    ReportingContentWriterCrew.load_yaml = staticmethod(parse_yaml)
+    results = {"rebuild": time_sections(args.sections, rebuild)}
+    ReportingContentWriterCrew.load_yaml = staticmethod(load_yaml)
+    results["rebuild_cached_yaml"] = time_sections(args.sections, rebuild)
+    pool = CrewPool(lambda: ReportingContentWriterCrew().crew())
+    results["pooled"] = time_sections(args.sections, checkout)
+
+    baseline = statistics.median(results["rebuild"])
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        print(f"{name:>20}: median {median * 1000:8.3f} ms/section, "
+              f"total {sum(timings) * 1000:9.1f} ms for {args.sections} sections "
+              f"({baseline / median:.0f}x)")
+    print(f"pool: {pool.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
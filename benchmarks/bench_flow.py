@@ -0,0 +1,205 @@
+"""End-to-end flow benchmark with offline backends, checked against a stored baseline.
+
+Run from the repository root:
+
+    python benchmarks/bench_flow.py [--repeat 3] [--check] [--update-baseline]
+
+Every scenario runs complete report flows in its own process, with the
+stand-in LLM (synthetic answers with latency and token distributions, see
+``LLM_STAND_IN_CONFIG``) and synthetic searches instead of OpenAI and
+Serper, so only the framework's own overhead is measured:
+
+- overhead: one report with instant answers, the cost of the framework itself
+- sections: one report of 12 sections written 4 at a time
+- reports: 4 reports generated at the same time
+
+Each scenario first runs one unmeasured report to warm the process up
+(imports, crews), then ``--repeat`` measured rounds; medians are reported,
+with the wall time of the research and writing stages (from the runs'
+metrics.json), throughput and peak memory. ``--check`` exits with status 1
+when a metric is worse than the baseline by more than ``--tolerance``
+(and more than a small absolute slack, so that millisecond noise passes);
+``--update-baseline`` stores the current results as the new baseline.
+Baselines depend on the machine: regenerate them where the check runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+
+# Offline backends and no persistent caches, so that every round does the same work
+BASE_ENV = {
+    "OTEL_SDK_DISABLED": "true",
+    "REPORTING_LLM_STAND_IN": "1",
+    "REPORTING_LLM_STAND_IN_SEARCHES": "2",
+    "REPORTING_LLM_STAND_IN_COMPLETION_TOKENS": "600",
+    "REPORTING_LLM_STAND_IN_COMPLETION_TOKENS_STDEV": "150",
+    "REPORTING_SEARCH_SYNTHETIC": "1",
+    "REPORTING_LLM_CACHE": "0",
+    "REPORTING_SEARCH_CACHE": "0",
+}
+SIMULATED_LATENCY_ENV = {
+    "REPORTING_LLM_STAND_IN_LATENCY": "0.05",
+    "REPORTING_LLM_STAND_IN_JITTER": "0.5",
+    "REPORTING_LLM_STAND_IN_TOKENS_PER_SECOND": "4000",
+    "REPORTING_SEARCH_SYNTHETIC_LATENCY": "0.05",
+}
+SCENARIOS = {
+    "overhead": {"reports": 1, "sections": 3, "concurrency": 4, "env": {}},
+    "sections": {"reports": 1, "sections": 12, "concurrency": 4, "env": SIMULATED_LATENCY_ENV},
+    "reports": {"reports": 4, "sections": 3, "concurrency": 4, "env": SIMULATED_LATENCY_ENV},
+}
+# Metrics checked against the baseline: which direction is better, and the absolute slack
+CHECKED_METRICS = {
+    "wall_seconds": ("lower", 0.05),
+    "research_seconds": ("lower", 0.05),
+    "writing_seconds": ("lower", 0.05),
+    "reports_per_minute": ("higher", 0.0),
+    "peak_rss_mb": ("lower", 10.0),
+}
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(name, repeat, result_path):
+    """Child process: run one scenario and write its results to ``result_path``"""
+    scenario = SCENARIOS[name]
+    os.environ.update(BASE_ENV)
+    os.environ.update(scenario["env"])
+    os.environ["REPORTING_LLM_STAND_IN_SECTIONS"] = str(scenario["sections"])
+    os.environ["REPORTING_SECTION_CONCURRENCY"] = str(scenario["concurrency"])
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(tempfile.mkdtemp(prefix="bench_flow_"))
+
+    from src.reporting_flow.batch import run_batch_async
+    from src.reporting_flow.offline import stand_in_llm
+
+    def run_round(round_index):
+        jobs = [{"topic": f"Benchmark {round_index} {i + 1}"} for i in range(scenario["reports"])]
+        started = time.perf_counter()
+        manifest = asyncio.run(run_batch_async(jobs, concurrency=scenario["reports"],
+                                               manifest_path=f"manifest_{round_index}.json"))
+        wall = time.perf_counter() - started
+        if manifest["failed"]:
+            raise RuntimeError(f"{manifest['failed']} reports failed in scenario {name}")
+        stages = []
+        for job in manifest["jobs"]:
+            with open(os.path.join(job["run_directory"], "metrics.json")) as f:
+                stages.append(json.load(f)["stages"])
+        return {
+            "wall_seconds": wall,
+            "research_seconds": statistics.mean(s["generate_researched_content"]["wall_seconds"] for s in stages),
+            "writing_seconds": statistics.mean(s["generate_reporting_content"]["wall_seconds"] for s in stages),
+        }
+
+    run_round(0)
+    rss_before = peak_rss_mb()
+    stand_in_llm().reset_stats()
+    rounds = [run_round(i + 1) for i in range(repeat)]
+    llm = stand_in_llm().stats()
+
+    result = {name: round(statistics.median(r[name] for r in rounds), 3) for name in rounds[0]}
+    result.update(
+        reports_per_minute=round(scenario["reports"] * 60 / result["wall_seconds"], 1),
+        sections_per_second=round(scenario["reports"] * scenario["sections"] / result["wall_seconds"], 2),
+        llm_calls_per_report=round(llm["calls"] / (repeat * scenario["reports"]), 1),
+        simulated_llm_seconds_per_report=round(llm["simulated_seconds"] / (repeat * scenario["reports"]), 3),
+        peak_rss_mb=round(peak_rss_mb(), 1),
+        rss_growth_mb=round(peak_rss_mb() - rss_before, 1),
+    )
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+
+
+def measure(names, repeat):
+    results = {}
+    for name in names:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            result_path = f.name
+        print(f"⏱️  Running scenario {name}...", file=sys.stderr)
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--run-scenario", name,
+                        "--repeat", str(repeat), "--result", result_path],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(result_path) as f:
+            results[name] = json.load(f)
+        os.remove(result_path)
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Metrics worse than the baseline by more than the tolerance and the slack"""
+    found = []
+    for scenario, metrics in results.items():
+        for metric, (better, slack) in CHECKED_METRICS.items():
+            expected = baseline.get(scenario, {}).get(metric)
+            if expected is None:
+                continue
+            actual = metrics[metric]
+            worse_by = actual - expected if better == "lower" else expected - actual
+            if worse_by > max(tolerance * expected, slack):
+                found.append(f"{scenario}.{metric}: {actual} vs baseline {expected}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Measured rounds per scenario")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative regression")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        run_scenario(args.run_scenario, args.repeat, args.result)
+        return 0
+
+    results = measure(args.scenarios, args.repeat)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+
+    columns = list(next(iter(results.values())))
+    print(f"{'scenario':>10} " + " ".join(f"{column:>{max(len(column), 8)}}" for column in columns))
+    for scenario, metrics in results.items():
+        print(f"{scenario:>10} " + " ".join(f"{metrics[c]:>{max(len(c), 8)}}" for c in columns))
+        if scenario in baseline:
+            print(f"{'baseline':>10} " + " ".join(f"{baseline[scenario].get(c, '-'):>{max(len(c), 8)}}"
+                                                  for c in columns))
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": f"{platform.system()} {platform.machine()}, Python {platform.python_version()}",
+                       "repeat": args.repeat, "scenarios": {**baseline, **results}}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+    if args.check:
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"❌ Regression: {regression}")
+        if found:
+            return 1
+        print("✅ No regression against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Incremental regeneration benchmark: wall time and LLM calls to apply a plan edit, full run vs incremental run.
+
+Run from the repository root:
+
+    python benchmarks/bench_incremental.py [--sections 8] [--changed 1] [--latency 0.2]
+
+A first run writes a report of ``--sections`` sections with the offline
+stand-in LLM answering every call after ``--latency`` seconds. Its
+sections_data.json is then edited (an outline point is added to
+``--changed`` sections) and the edited plan is written again twice: by a
+full run, and by an incremental run reusing the unchanged sections of the
+first run. Every run happens in this process after a warm-up, so the
+difference is the work the incremental run skips. Reports are written to a
+temporary directory.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["REPORTING_LLM_STAND_IN"] = "1"
+os.environ["REPORTING_LLM_CACHE"] = "0"
+os.environ["REPORTING_SEARCH_CACHE"] = "0"
+
+
+def run(plan_path=None, incremental_from=None):
+    """Seconds, LLM calls and run id of one report"""
+    from src.reporting_flow.main import ReportingFlow
+    from src.reporting_flow.offline import stand_in_llm
+
+    calls = stand_in_llm().stats()["calls"]
+    flow = ReportingFlow(plan_path=plan_path, incremental_from=incremental_from)
+    started = time.perf_counter()
+    asyncio.run(flow.kickoff_async())
+    return time.perf_counter() - started, stand_in_llm().stats()["calls"] - calls, flow.run.run_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=8)
+    parser.add_argument("--changed", type=int, default=1, help="Sections whose outline is edited")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the stand-in LLM takes per call")
+    args = parser.parse_args()
+    os.environ["REPORTING_LLM_STAND_IN_SECTIONS"] = str(args.sections)
+    os.environ["REPORTING_LLM_STAND_IN_LATENCY"] = str(args.latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        run()  # warm-up: imports and crews
+        _, _, base_run = run()
+        with open(os.path.join("output", base_run, "sections_data.json")) as f:
+            plan = json.load(f)
+        for section in plan["sections"][:args.changed]:
+            section["content_outline"].append("Recent changes")
+        with open("edited_plan.json", "w") as f:
+            json.dump(plan, f)
+
+        full_seconds, full_calls, _ = run(plan_path="edited_plan.json")
+        incremental_seconds, incremental_calls, _ = run(plan_path="edited_plan.json", incremental_from=base_run)
+        os.chdir(REPO_ROOT)
+
+    print(f"{'mode':>12} {'wall s':>7} {'LLM calls':>10}")
+    print(f"{'full':>12} {full_seconds:7.2f} {full_calls:10d}")
+    print(f"{'incremental':>12} {incremental_seconds:7.2f} {incremental_calls:10d}")
+    print(f"({args.changed} of {args.sections} sections edited, stand-in LLM latency {args.latency}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
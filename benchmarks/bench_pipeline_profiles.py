@@ -0,0 +1,138 @@
+"""Pipeline profile benchmark: LLM calls, tokens and latency per section for each profile.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline_profiles.py [--sections 6] [--weak-drafts 0.3]
+
+Every profile of ``PIPELINE_PROFILES`` writes the same sections with the real
+content writer crew, but its agents talk to a simulated LLM: each call
+returns a markdown section of ``--words`` words after a latency of
+``--base-latency`` seconds plus ``--tokens-per-second`` generation time,
+all scaled by ``--time-scale`` to keep the benchmark short (reported
+latencies are unscaled). A ``--weak-drafts`` fraction of the writing task's
+answers are short drafts without citations, which the review_if_needed
+profile sends to the editor and reviewer. Throughput is relative to the
+mean section latency of the full profile.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import zlib
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from crewai import LLM  # noqa: E402
+
+from src.reporting_flow.budgets import length_budget, pipeline_output_limit  # noqa: E402
+from src.reporting_flow.config import PIPELINE_PROFILES, REPORTING_FLOW_INPUT_VARIABLES  # noqa: E402
+from src.reporting_flow.crews.reporting_content_writer.reporting_content_writer_crew import (  # noqa: E402
+    ReportingContentWriterCrew,
+)
+from src.reporting_flow.rate_limit import estimate_tokens  # noqa: E402
+
+
+class SimulatedLLM(LLM):
+    """Answers every call with a generated section and records calls, tokens and latency"""
+
+    def __init__(self, args, **kwargs):
+        super().__init__(model="simulated", **kwargs)
+        self.args = args
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = 0.0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        prompt = json.dumps(messages)
+        # Only first drafts of the writing task can be weak; the editor and reviewer always deliver
+        drafting = "Create detailed and comprehensive reporting content" in prompt
+        weak = drafting and zlib.crc32(prompt.encode()) % 1000 < self.args.weak_drafts * 1000
+        if weak:
+            body = " ".join(["draft"] * (self.args.words // 10))
+        else:
+            paragraph = " ".join(["content"] * (self.args.words - 20))
+            body = f"## Section\n\n{paragraph}\n\nSee [the source](https://example.com/source)."
+        answer = f"Thought: I now can give a great answer\nFinal Answer: {body}"
+        completion_tokens = estimate_tokens(answer)
+        latency = self.args.base_latency + completion_tokens / self.args.tokens_per_second
+        time.sleep(latency * self.args.time_scale)
+        with self.lock:
+            self.calls += 1
+            self.prompt_tokens += estimate_tokens(messages)
+            self.completion_tokens += completion_tokens
+            self.latency += latency
+        return answer
+
+
+def section_inputs(i, profile):
+    section = {
+        "title": f"Section {i + 1}",
+        "high_level_goal": "Explain the topic",
+        "why_important": "It matters",
+        "sources": ["https://example.com/source"],
+        "content_outline": ["First point", "Second point"],
+    }
+    return {**REPORTING_FLOW_INPUT_VARIABLES, "section": json.dumps(section), "research_context": "",
+            "similar_draft": "", "length_budget": length_budget(pipeline_output_limit(profile))}
+
+
+def run_profile(profile, llm, args):
+    crew = ReportingContentWriterCrew(profile).crew()
+    crew.verbose = False
+    for agent in crew.agents:
+        agent.llm = llm
+        agent.verbose = False
+    llm.reset()
+    latencies = []
+    for i in range(args.sections):
+        before = llm.latency
+        crew.kickoff(section_inputs(i, profile))
+        latencies.append(llm.latency - before)
+    return {
+        "calls": llm.calls / args.sections,
+        "prompt_tokens": llm.prompt_tokens / args.sections,
+        "completion_tokens": llm.completion_tokens / args.sections,
+        "mean_latency": statistics.mean(latencies),
+        "median_latency": statistics.median(latencies),
+        "max_latency": max(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--words", type=int, default=900, help="Words of a full section answer")
+    parser.add_argument("--weak-drafts", type=float, default=0.3, help="Fraction of first drafts that are weak")
+    parser.add_argument("--base-latency", type=float, default=1.0, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--time-scale", type=float, default=0.001, help="Real seconds slept per simulated second")
+    parser.add_argument("--profiles", nargs="*", default=list(PIPELINE_PROFILES))
+    args = parser.parse_args()
+
+    llm = SimulatedLLM(args)
+    results = {profile: run_profile(profile, llm, args) for profile in args.profiles}
+
+    baseline = results.get("full", next(iter(results.values())))
+    print(f"{'profile':>18} {'calls':>6} {'prompt tok':>11} {'completion tok':>15} "
+          f"{'median s':>9} {'max s':>7} {'throughput':>11}")
+    for profile, r in results.items():
+        print(f"{profile:>18} {r['calls']:6.2f} {r['prompt_tokens']:11.0f} {r['completion_tokens']:15.0f} "
+              f"{r['median_latency']:9.2f} {r['max_latency']:7.2f} "
+              f"{baseline['mean_latency'] / r['mean_latency']:10.2f}x")
+    print(f"(per section, {args.sections} sections, {args.weak_drafts:.0%} weak drafts)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
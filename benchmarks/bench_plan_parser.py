@@ -0,0 +1,103 @@
+"""Plan extraction benchmark: the old json.loads + greedy regex fallback against parse_plan.
+
+Run from the repository root:
+
+    python benchmarks/bench_plan_parser.py [--sections 40] [--runs 20]
+
+Each case is a planner answer of ``--sections`` sections in a shape seen in
+real runs: clean JSON, JSON in a code fence with prose around it, trailing
+commas, output truncated mid-section, and a draft object followed by the
+final plan. For every case the benchmark reports the sections each method
+recovers and its median parse time.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from src.reporting_flow.plan_parser import PlanParseError, parse_plan  # noqa: E402
+
+
+def make_plan(sections):
+    return {
+        "sections": [
+            {
+                "title": f"Section {i + 1}: {{braces}} and \"quotes\" in titles",
+                "high_level_goal": "Explain the topic in depth " * 5,
+                "why_important": "Readers need it to decide " * 5,
+                "sources": [f"https://example.com/{i}/{j}" for j in range(4)],
+                "content_outline": [f"Point {j} of section {i + 1}" for j in range(8)],
+            }
+            for i in range(sections)
+        ]
+    }
+
+
+def make_cases(sections):
+    plan = make_plan(sections)
+    clean = json.dumps(plan, indent=2)
+    draft = json.dumps(make_plan(max(1, sections // 4)), indent=2)
+    return {
+        "clean": clean,
+        "fenced": f"Here is the plan you asked for:\n```json\n{clean}\n```\nLet me know if {{anything}} is missing.",
+        "trailing_commas": re.sub(r'(["\]}])(\n\s*[\]}])', r"\1,\2", clean),
+        "truncated": clean[: int(len(clean) * 0.8)],
+        "two_objects": f"First draft:\n{draft}\n\nFinal plan:\n{clean}",
+    }
+
+
+def old_extract(raw):
+    """The extraction that generate_reporting_content used before parse_plan"""
+    try:
+        data = json.loads(raw)
+        return data.get("sections", [])
+    except Exception:
+        match = re.search(r"\{.*\}", raw, re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group(0)).get("sections", [])
+            except Exception:
+                pass
+    return []
+
+
+def new_extract(raw):
+    try:
+        return parse_plan(raw).sections
+    except PlanParseError:
+        return []
+
+
+def measure(extract, raw, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        sections = extract(raw)
+        times.append(time.perf_counter() - start)
+    return len(sections), statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'case':>16} {'size':>8} {'old sections':>13} {'old ms':>8} {'new sections':>13} {'new ms':>8}")
+    for name, raw in make_cases(args.sections).items():
+        old_count, old_ms = measure(old_extract, raw, args.runs)
+        new_count, new_ms = measure(new_extract, raw, args.runs)
+        print(f"{name:>16} {len(raw):8d} {old_count:13d} {old_ms:8.2f} {new_count:13d} {new_ms:8.2f}")
+    print(f"({args.sections} sections per plan, median of {args.runs} runs)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Research context benchmark: prompt tokens and latency per section, whole research vs compacted context.
+
+Run from the repository root:
+
+    python benchmarks/bench_research_context.py [--sections 12] [--paragraphs 4] [--budget 1500]
+
+A synthetic research output covers ``--sections`` subjects with
+``--paragraphs`` paragraphs each (every paragraph cites its own URL), plus
+a general paragraph, and the plan has one section per subject. The real
+content writer crew (full profile) writes each section with a simulated LLM
+that counts prompt tokens and adds their processing time to the latency:
+
+- whole: every section gets the whole research output, and every stage of
+  the pipeline gets all earlier drafts (crewAI's default task context)
+- compacted: each section gets the chunks selected by ResearchIndex under
+  ``--budget`` tokens, and each stage only the previous stage's draft
+
+Recall is the share of a section's own paragraphs (by their first
+sentence) found in its context. The time to index the research and to
+select every context is reported too.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from crewai import LLM  # noqa: E402
+
+from src.reporting_flow.budgets import length_budget, pipeline_output_limit  # noqa: E402
+from src.reporting_flow.config import REPORTING_FLOW_INPUT_VARIABLES  # noqa: E402
+from src.reporting_flow.crews.reporting_content_writer.reporting_content_writer_crew import (  # noqa: E402
+    ReportingContentWriterCrew,
+)
+from src.reporting_flow.rate_limit import estimate_tokens  # noqa: E402
+from src.reporting_flow.research_context import ResearchIndex  # noqa: E402
+
+SUBJECTS = ["batteries", "turbines", "hydrogen", "transmission", "storage", "photovoltaics", "reactors",
+            "geothermal", "tariffs", "emissions", "subsidies", "recycling", "biofuels", "heatpumps",
+            "smartmeters", "microgrids"]
+FACETS = ["costs", "adoption", "regulation", "outlook"]
+FILLER = ("Analysts expect the market to keep growing as prices fall and deployments scale, "
+          "while policy makers weigh the trade-offs between speed, cost and reliability. ")
+
+
+class CountingLLM(LLM):
+    """Answers every call with a section draft and counts prompt tokens and simulated latency"""
+
+    def __init__(self, args, **kwargs):
+        super().__init__(model="simulated", **kwargs)
+        self.args = args
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.prompt_tokens = {}
+        self.latency = 0.0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        paragraph = " ".join(["content"] * (self.args.words - 20))
+        answer = (f"Thought: I now can give a great answer\nFinal Answer: ## Section\n\n{paragraph}\n\n"
+                  f"See [the source](https://example.com/source).")
+        prompt_tokens = estimate_tokens(messages)
+        latency = (self.args.base_latency + prompt_tokens / self.args.prompt_tokens_per_second
+                   + estimate_tokens(answer) / self.args.tokens_per_second)
+        task = next((name for name, marker in (("writing_task", "Create detailed"),
+                                               ("editing_task", "Review and refine"),
+                                               ("quality_review_task", "comprehensive quality assessment"))
+                     if marker in json.dumps(messages)), "other")
+        with self.lock:
+            self.prompt_tokens[task] = self.prompt_tokens.get(task, 0) + prompt_tokens
+            self.latency += latency
+        return answer
+
+
+def research_and_plan(args):
+    """Synthetic research output and plan sections, and the first sentence of each section's paragraphs"""
+    paragraphs = [f"## General context\n\n{FILLER * 4}"]
+    own = {}
+    sections = []
+    for i, subject in enumerate(SUBJECTS[:args.sections]):
+        own[i] = []
+        for j in range(args.paragraphs):
+            facet = FACETS[j % len(FACETS)]
+            url = f"https://example.com/{subject}/{j + 1}"
+            text = (f"{subject.capitalize()} {facet}: recent figures on {subject} {facet} show steady change. "
+                    f"{FILLER * 5}Source: {url}")
+            own[i].append(text.split(". ")[0])
+            paragraphs.append(text)
+        sections.append({
+            "title": f"{subject.capitalize()} today",
+            "high_level_goal": f"Explain where {subject} stand",
+            "why_important": "Readers need it to follow the rest of the report",
+            "sources": [f"https://example.com/{subject}/1"],
+            "content_outline": [f"{subject.capitalize()} {facet}" for facet in FACETS[:args.paragraphs]],
+        })
+    return "\n\n".join(paragraphs), sections, own
+
+
+def run_mode(mode, crew, llm, research, sections, args):
+    index = ResearchIndex(research)
+    if mode == "whole":
+        for task in crew.tasks:
+            task.context = None
+    llm.reset()
+    contexts = [research if mode == "whole" else index.context_for(section, args.budget) for section in sections]
+    for section, context in zip(sections, contexts):
+        crew.kickoff({**REPORTING_FLOW_INPUT_VARIABLES, "section": json.dumps(section), "research_context": context,
+                      "similar_draft": "", "length_budget": length_budget(pipeline_output_limit("full"))})
+    n = len(sections)
+    return {
+        "context_tokens": statistics.mean(estimate_tokens(context) for context in contexts),
+        "prompt_tokens": {task: tokens / n for task, tokens in llm.prompt_tokens.items()},
+        "latency": llm.latency / n,
+        "contexts": contexts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=12, choices=range(1, len(SUBJECTS) + 1), metavar="N")
+    parser.add_argument("--paragraphs", type=int, default=4, help="Paragraphs of research per section")
+    parser.add_argument("--budget", type=int, default=1500, help="Token budget of a section's context")
+    parser.add_argument("--words", type=int, default=900, help="Words of a section draft")
+    parser.add_argument("--base-latency", type=float, default=1.0, help="Seconds before the first token")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=5000.0)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0)
+    args = parser.parse_args()
+
+    research, sections, own = research_and_plan(args)
+    started = time.perf_counter()
+    index = ResearchIndex(research)
+    index_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for section in sections:
+        index.context_for(section, args.budget)
+    select_seconds = time.perf_counter() - started
+
+    llm = CountingLLM(args)
+    results = {}
+    for mode in ("whole", "compacted"):
+        crew = ReportingContentWriterCrew("full").crew()
+        crew.verbose = False
+        for agent in crew.agents:
+            agent.llm = llm
+            agent.verbose = False
+        results[mode] = run_mode(mode, crew, llm, research, sections, args)
+
+    tasks = ("writing_task", "editing_task", "quality_review_task")
+    print(f"{'mode':>10} {'context':>8} " + " ".join(f"{task:>20}" for task in tasks)
+          + f" {'prompt total':>13} {'latency s':>10} {'recall':>7}")
+    for mode, r in results.items():
+        recall = statistics.mean(
+            sum(lead in context for lead in own[i]) / len(own[i]) for i, context in enumerate(r["contexts"])
+        )
+        print(f"{mode:>10} {r['context_tokens']:8.0f} "
+              + " ".join(f"{r['prompt_tokens'].get(task, 0):20.0f}" for task in tasks)
+              + f" {sum(r['prompt_tokens'].values()):13.0f} {r['latency']:10.2f} {recall:7.0%}")
+    print(f"(per section; research of {index.tokens} tokens in {len(index.chunks)} chunks, indexed in "
+          f"{index_seconds * 1000:.1f}ms, {len(sections)} contexts selected in {select_seconds * 1000:.1f}ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Research fan-out benchmark: wall time of the research stage, one researcher vs parallel sub-topic researchers.
+
+Run from the repository root:
+
+    python benchmarks/bench_research_fanout.py [--subtopics 2 4 8] [--searches 2] [--latency 0.3]
+
+For each number of sub-topics N, the research stage of a report is run in
+both research modes with the offline stand-in LLM and synthetic searches,
+every LLM call and search taking ``--latency`` seconds. Both modes run the
+same N x ``--searches`` searches: the single researcher runs them one after
+another in its reasoning loop, while the parallel mode adds a decomposition
+call and runs N researchers of ``--searches`` searches each, at most
+``--concurrency`` at a time. Runs happen in this process after a warm-up,
+so crews are already built; reports are written to a temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["REPORTING_LLM_STAND_IN"] = "1"
+os.environ["REPORTING_LLM_STAND_IN_SECTIONS"] = "2"
+os.environ["REPORTING_SEARCH_SYNTHETIC"] = "1"
+os.environ["REPORTING_LLM_CACHE"] = "0"
+os.environ["REPORTING_SEARCH_CACHE"] = "0"
+
+
+def research_seconds(mode, subtopics, searches):
+    """Wall time of the research stage of one report, and the stand-in LLM calls it made"""
+    from src.reporting_flow.config import RESEARCH_CONFIG
+    from src.reporting_flow.main import ReportingFlow
+    from src.reporting_flow.offline import stand_in_llm
+
+    RESEARCH_CONFIG.update(mode=mode, subtopics=subtopics)
+    llm = stand_in_llm()
+    llm.searches = searches if mode == "parallel" else subtopics * searches
+    flow = ReportingFlow(input_variables={"topic": f"Fan-out {mode} {subtopics}"})
+    asyncio.run(flow.kickoff_async())
+    research_calls = sum(crew["successful_requests"] for crew in flow.metrics.crews if crew["crew"].startswith("research"))
+    return flow.metrics.stages["generate_researched_content"]["wall_seconds"], research_calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subtopics", type=int, nargs="*", default=[2, 4, 8])
+    parser.add_argument("--searches", type=int, default=2, help="Searches per sub-topic")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per LLM call and per search")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sub-topics researched at the same time")
+    args = parser.parse_args()
+    os.environ["REPORTING_LLM_STAND_IN_LATENCY"] = str(args.latency)
+    os.environ["REPORTING_SEARCH_SYNTHETIC_LATENCY"] = str(args.latency)
+    os.environ["REPORTING_RESEARCH_CONCURRENCY"] = str(args.concurrency)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        # Warm-up: imports, and enough crews of each kind for the widest fan-out
+        research_seconds("single", 1, 1)
+        research_seconds("parallel", max(args.subtopics), 1)
+        for subtopics in args.subtopics:
+            single = research_seconds("single", subtopics, args.searches)
+            parallel = research_seconds("parallel", subtopics, args.searches)
+            rows.append((subtopics, single, parallel))
+        os.chdir(REPO_ROOT)
+
+    print(f"{'sub-topics':>10} {'single s':>9} {'calls':>6} {'parallel s':>11} {'calls':>6} {'speedup':>8}")
+    for subtopics, (single, single_calls), (parallel, parallel_calls) in rows:
+        print(f"{subtopics:>10} {single:9.2f} {single_calls:6d} {parallel:11.2f} {parallel_calls:6d} "
+              f"{single / parallel:7.2f}x")
+    print(f"({args.searches} searches per sub-topic, {args.latency}s per call and search, "
+          f"{args.concurrency} researchers at a time)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Section store benchmark: LLM calls, writer tokens and wall time of reports close to earlier ones.
+
+Run from the repository root:
+
+    python benchmarks/bench_section_store.py [--sections 6] [--latency 0.2]
+
+Reports of ``--sections`` sections are written one after another with the
+offline stand-in LLM answering every call after ``--latency`` seconds, and
+the section store enabled (REPORTING_SECTION_STORE=1) in a temporary
+directory. The first report fills the store; the next ones repeat it, ask it
+for another audience, reword its topic and ask for an unrelated topic, so
+their sections are reused, written from a draft of the first report with
+the seed_profile pipeline, or written from scratch. Runs happen in this
+process after a warm-up with the store disabled; reports are written to a
+temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["REPORTING_LLM_STAND_IN"] = "1"
+os.environ["REPORTING_LLM_CACHE"] = "0"
+os.environ["REPORTING_SEARCH_CACHE"] = "0"
+
+RUNS = [
+    ("first", "Prompt engineering for LLM", "Expert"),
+    ("repeat", "Prompt engineering for LLM", "Expert"),
+    ("audience", "Prompt engineering for LLM", "Beginner"),
+    ("reworded", "Prompt engineering for LLMs", "Expert"),
+    ("unrelated", "Quantum computing", "Expert"),
+]
+
+
+def run(topic, audience_level):
+    """Seconds, LLM calls, writer completion tokens, best similarity and section uses of one report"""
+    from src.reporting_flow.config import REPORTING_FLOW_INPUT_VARIABLES
+    from src.reporting_flow.main import ReportingFlow
+    from src.reporting_flow.offline import stand_in_llm
+
+    REPORTING_FLOW_INPUT_VARIABLES.update(topic=topic, audience_level=audience_level)
+    calls = stand_in_llm().stats()["calls"]
+    flow = ReportingFlow()
+    started = time.perf_counter()
+    asyncio.run(flow.kickoff_async())
+    seconds = time.perf_counter() - started
+    tokens = sum(crew["completion_tokens"] for crew in flow.metrics.crews if crew["crew"] == "content_writer")
+    matches = flow.section_reuse.store_matches.values()
+    uses = [match["use"] for match in matches]
+    similarity = max((match["similarity"] for match in matches), default=None)
+    return (seconds, stand_in_llm().stats()["calls"] - calls, tokens, similarity,
+            uses.count("reused"), uses.count("seeded"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the stand-in LLM takes to answer")
+    args = parser.parse_args()
+    os.environ["REPORTING_LLM_STAND_IN_SECTIONS"] = str(args.sections)
+    os.environ["REPORTING_LLM_STAND_IN_LATENCY"] = str(args.latency)
+
+    from src.reporting_flow.config import REPORTING_FLOW_INPUT_VARIABLES, SECTION_STORE_CONFIG
+    from src.reporting_flow.section_store import get_section_store
+
+    saved = dict(REPORTING_FLOW_INPUT_VARIABLES)
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        SECTION_STORE_CONFIG.update(enabled=False)
+        run(*RUNS[0][1:])  # warm-up: imports and crews
+        SECTION_STORE_CONFIG.update(enabled=True, path=os.path.join(directory, "sections.sqlite"))
+        get_section_store.cache_clear()
+        rows = [(name, run(topic, audience_level)) for name, topic, audience_level in RUNS]
+        get_section_store.cache_clear()
+        os.chdir(REPO_ROOT)
+    REPORTING_FLOW_INPUT_VARIABLES.update(saved)
+
+    print(f"{'report':>10} {'similarity':>11} {'reused':>7} {'seeded':>7} {'LLM calls':>10} {'writer tok':>11} "
+          f"{'wall s':>7}")
+    for name, (seconds, calls, tokens, similarity, reused, seeded) in rows:
+        shown = f"{similarity:.2f}" if similarity is not None else "-"
+        print(f"{name:>10} {shown:>11} {reused:7d} {seeded:7d} {calls:10d} {tokens:11d} {seconds:7.2f}")
+    print(f"({args.sections} sections, answers after {args.latency}s, reuse at "
+          f"{SECTION_STORE_CONFIG['reuse_similarity']:g}, seed at {SECTION_STORE_CONFIG['seed_similarity']:g} "
+          f"with the {SECTION_STORE_CONFIG['seed_profile']} pipeline)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Report service benchmark: wall time per report, one `kickoff` process per report vs the resident service.
+
+Run from the repository root:
+
+    python benchmarks/bench_service.py [--reports 4] [--workers 2] [--latency 0.05]
+
+Both modes generate ``--reports`` reports with the offline stand-in LLM
+answering every call after ``--latency`` seconds, so the difference is the
+per-process cost (interpreter start, crewAI/langchain imports, Langtrace,
+crew setup) that the service pays once. The one-shot mode starts one
+process per report, one after another; the service mode submits every job
+over HTTP to a service with ``--workers`` workers and waits until the queue
+is drained. The service's warm-up is reported separately. Reports are
+written to a temporary directory.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["REPORTING_LLM_STAND_IN"] = "1"
+os.environ["REPORTING_LLM_CACHE"] = "0"
+
+
+def one_shot(args):
+    """Seconds to generate the reports with one kickoff process each"""
+    code = "import sys; sys.argv = ['kickoff']; from src.reporting_flow.main import kickoff; kickoff()"
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    started = time.perf_counter()
+    for _ in range(args.reports):
+        subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def request(address, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    with urllib.request.urlopen(urllib.request.Request(address + path, data=data, method=method)) as response:
+        return json.load(response)
+
+
+async def service(args, queue_path):
+    """Seconds to warm the service up, and to generate the reports once it is up"""
+    from src.reporting_flow.jobs import JobQueue
+    from src.reporting_flow.service import ReportService
+
+    queue = JobQueue(queue_path)
+    report_service = ReportService(queue, workers=args.workers)
+    started = time.perf_counter()
+    address = await report_service.start(host="127.0.0.1", port=0)
+    warm_up = time.perf_counter() - started
+
+    started = time.perf_counter()
+    jobs = [{"topic": f"Benchmark topic {i + 1}"} for i in range(args.reports)]
+    await asyncio.to_thread(request, address, "POST", "/jobs", jobs)
+    while True:
+        counts = (await asyncio.to_thread(request, address, "GET", "/health"))["jobs"]
+        if counts["queued"] == counts["running"] == 0:
+            break
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    await report_service.stop()
+    queue.close()
+    if counts["failed"]:
+        raise RuntimeError(f"{counts['failed']} benchmark jobs failed")
+    return warm_up, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2, help="Workers of the service")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stand-in LLM takes per call")
+    args = parser.parse_args()
+    os.environ["REPORTING_LLM_STAND_IN_LATENCY"] = str(args.latency)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        one_shot_seconds = one_shot(args)
+        warm_up, service_seconds = asyncio.run(service(args, os.path.join(directory, "jobs.sqlite")))
+        os.chdir(REPO_ROOT)
+
+    print(f"{'mode':>22} {'total s':>8} {'s/report':>9}")
+    print(f"{'one-shot processes':>22} {one_shot_seconds:8.2f} {one_shot_seconds / args.reports:9.2f}")
+    print(f"{'service':>22} {service_seconds:8.2f} {service_seconds / args.reports:9.2f}")
+    print(f"(service warm-up {warm_up:.2f}s, {args.workers} workers, {args.reports} reports, "
+          f"stand-in LLM latency {args.latency}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Startup benchmark: time to ``import reporting_flow.main`` in a fresh interpreter.
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py [--runs 5] [--max-seconds 8]
+
+Each run imports the module in a new process from an empty working directory
+and also checks that the import leaves no files behind (no output/ folder).
+Exits with status 1 if the median import time exceeds ``--max-seconds`` or the
+import created files.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "import src.reporting_flow.main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def time_import(workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    timings = []
+    leftovers = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            timings.append(time_import(workdir))
+            leftovers.extend(os.listdir(workdir))
+
+    median = statistics.median(timings)
+    print(f"import reporting_flow.main: median {median:.3f}s, "
+          f"min {min(timings):.3f}s, max {max(timings):.3f}s over {args.runs} runs")
+    if leftovers:
+        print(f"FAIL: import created files: {sorted(set(leftovers))}")
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"FAIL: median import time above {args.max_seconds:.3f}s")
+    return 1 if leftovers or (args.max_seconds is not None and median > args.max_seconds) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
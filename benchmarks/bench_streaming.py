@@ -0,0 +1,84 @@
+"""Token streaming benchmark: time until a report shows progress, with and without streamed tokens.
+
+Run from the repository root:
+
+    python benchmarks/bench_streaming.py [--sections 3] [--latency 0.3] [--tokens-per-second 300]
+
+A report of ``--sections`` sections is written twice with the offline
+stand-in LLM, whose answers start after ``--latency`` seconds and are then
+generated at ``--tokens-per-second``: once without streaming, where the
+first progress a caller of section_events() sees is the first finished
+section, and once with ``stream_tokens``, where it is the first token of
+the research. For each section the time until its first token (or its
+completion) is reported too, with the wall time of both runs for the
+overhead of streaming. Runs happen in this process after a warm-up; reports
+are written to a temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ["REPORTING_LLM_STAND_IN"] = "1"
+os.environ["REPORTING_LLM_CACHE"] = "0"
+os.environ["REPORTING_SEARCH_CACHE"] = "0"
+
+
+async def run(stream_tokens):
+    """Seconds until the first progress event, until each section shows progress, and of the whole run"""
+    from src.reporting_flow.main import ReportingFlow
+
+    flow = ReportingFlow(stream_tokens=stream_tokens)
+    started = time.perf_counter()
+    first = None
+    sections = {}
+
+    async def watch():
+        nonlocal first
+        async for event in flow.section_events():
+            if event["type"] == "token" or (event["type"] == "section" and not stream_tokens):
+                first = first or time.perf_counter() - started
+                section = event.get("section", event.get("index"))
+                if section is not None:
+                    sections.setdefault(section, time.perf_counter() - started)
+
+    watcher = asyncio.ensure_future(watch())
+    await flow.kickoff_async()
+    wall = time.perf_counter() - started
+    await watcher
+    return first, [sections[section] for section in sorted(sections)], wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds until the stand-in LLM's first token")
+    parser.add_argument("--tokens-per-second", type=float, default=300)
+    parser.add_argument("--completion-tokens", type=int, default=600, help="Tokens of each answer")
+    args = parser.parse_args()
+    os.environ["REPORTING_LLM_STAND_IN_SECTIONS"] = str(args.sections)
+    os.environ["REPORTING_LLM_STAND_IN_LATENCY"] = str(args.latency)
+    os.environ["REPORTING_LLM_STAND_IN_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["REPORTING_LLM_STAND_IN_COMPLETION_TOKENS"] = str(args.completion_tokens)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        asyncio.run(run(True))  # warm-up: imports and crews
+        rows = [("buffered", asyncio.run(run(False))), ("streamed", asyncio.run(run(True)))]
+        os.chdir(REPO_ROOT)
+
+    print(f"{'mode':>9} {'first s':>8} {'wall s':>7}  first progress of each section (s)")
+    for mode, (first, sections, wall) in rows:
+        print(f"{mode:>9} {first:8.2f} {wall:7.2f}  {' '.join(f'{seconds:.2f}' for seconds in sections)}")
+    print(f"({args.sections} sections, first token after {args.latency}s, "
+          f"{args.completion_tokens} tokens per answer at {args.tokens_per_second:g} tokens/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
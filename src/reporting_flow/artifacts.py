@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import ARTIFACTS_CONFIG
+
+logger = logging.getLogger("report_flow")
+
+# Debug artifacts written at each level: none, the research output and plan, or also every section's input and output
+DEBUG_LEVELS = ("none", "summary", "full")
+
+# One thread writes the files of every run of the process, in submission order, so that the
+# event loop never waits on the disk and a file is always written before a later append to it
+artifact_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer")
+
+
+def _encode(content):
+    return content if isinstance(content, bytes) else str(content).encode("utf-8")
+
+
+class ArtifactStore:
+    """Writes the files of a run from the artifact writer thread.
+
+    Report files (sections, report, index) are always written; debug
+    artifacts only up to ``debug_level``, in the run's ``debug`` folder or,
+    with ``archive``, in a ``debug.tar.gz`` archive of the run. Identical
+    payloads are written once: rewriting a file with the content it already
+    has is skipped, and a debug artifact with the content of a file this run
+    already wrote is a link to that file. Errors writing report files are
+    raised by ``flush``; errors writing debug artifacts are only logged.
+    """
+
+    def __init__(self, run, debug_level=None, archive=None):
+        self.run = run
+        self.debug_level = debug_level or ARTIFACTS_CONFIG["debug_level"]
+        if self.debug_level not in DEBUG_LEVELS:
+            raise ValueError(f"Unknown debug level {self.debug_level!r}, expected one of {list(DEBUG_LEVELS)}")
+        self.archive = ARTIFACTS_CONFIG["archive"] if archive is None else archive
+        self.archive_path = None
+        self._tar = None
+        # Only touched by the writer thread: digest of every file's content and first file with each digest
+        self._digests = {}
+        self._paths_by_digest = {}
+        self._pending = []
+        self.stats = {"files": 0, "appends": 0, "bytes": 0, "deduplicated": 0, "write_seconds": 0.0}
+
+    def wants(self, level):
+        """Whether debug artifacts of ``level`` are written"""
+        return DEBUG_LEVELS.index(level) <= DEBUG_LEVELS.index(self.debug_level)
+
+    def submit(self, fn, *args):
+        """Run ``fn`` on the writer thread after every write submitted before it"""
+        self._pending = [future for future in self._pending if not future.done()]
+        future = artifact_executor.submit(self._timed, fn, *args)
+        self._pending.append(future)
+        return future
+
+    def _timed(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.stats["write_seconds"] += time.perf_counter() - started
+
+    def write(self, path, content):
+        """Write ``content`` (str or bytes) to ``path``"""
+        return self.submit(self._write, path, _encode(content))
+
+    def append(self, path, text):
+        return self.submit(self._append, path, _encode(text))
+
+    def debug(self, name, content, level="full"):
+        """Write the debug artifact ``name`` if the debug level includes ``level``"""
+        if self.wants(level):
+            return self.submit(self._write_debug, name, _encode(content))
+
+    def debug_json(self, name, data, level="full"):
+        if self.wants(level):
+            # Serialized now, as the caller may change data once it is handed over
+            return self.debug(name, json.dumps(data, indent=2, default=str), level)
+
+    async def read(self, path):
+        """Content of ``path`` once the writes submitted before are done"""
+        return await asyncio.wrap_future(self.submit(self._read, path))
+
+    async def flush(self):
+        """Wait for every submitted write, raising the first error"""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            await asyncio.wrap_future(future)
+
+    async def close(self):
+        """Flush the writes and close the debug archive"""
+        try:
+            await self.flush()
+        finally:
+            await asyncio.wrap_future(artifact_executor.submit(self._close_archive))
+        logger.debug(f"💾 Artifacts of run {self.run.run_id}: {self.stats}")
+
+    def _write(self, path, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if self._digests.get(path) == digest and os.path.exists(path):
+            self.stats["deduplicated"] += 1
+            return
+        with open(path, "wb") as f:
+            f.write(data)
+        self._written(path, digest, len(data))
+
+    def _written(self, path, digest, size):
+        self._digests[path] = digest
+        self._paths_by_digest.setdefault(digest, path)
+        self.stats["files"] += 1
+        self.stats["bytes"] += size
+
+    def _append(self, path, data):
+        with open(path, "ab") as f:
+            f.write(data)
+        self._digests.pop(path, None)
+        self.stats["appends"] += 1
+        self.stats["bytes"] += len(data)
+
+    def _read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def _write_debug(self, name, data):
+        try:
+            if self.archive:
+                self._archive_debug(name, data)
+            else:
+                self._link_or_write(os.path.join(self.run.debug_dir, name), data)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write debug artifact {name}: {e}")
+
+    def _link_or_write(self, path, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if self._digests.get(path) == digest and os.path.exists(path):
+            self.stats["deduplicated"] += 1
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        original = self._paths_by_digest.get(digest)
+        if original is not None and original != path and self._digests.get(original) == digest:
+            try:
+                if os.path.lexists(path):
+                    os.remove(path)
+                os.link(original, path)
+                self._digests[path] = digest
+                self.stats["deduplicated"] += 1
+                return
+            except OSError:
+                pass
+        with open(path, "wb") as f:
+            f.write(data)
+        self._written(path, digest, len(data))
+
+    def _archive_debug(self, name, data):
+        if self._tar is None:
+            # A resumed run keeps the archives of its earlier attempts
+            self.archive_path = os.path.join(self.run.run_dir, "debug.tar.gz")
+            suffix = 2
+            while os.path.exists(self.archive_path):
+                self.archive_path = os.path.join(self.run.run_dir, f"debug_{suffix}.tar.gz")
+                suffix += 1
+            self._tar = tarfile.open(self.archive_path, "w:gz")
+        member_name = f"debug/{name}"
+        info = tarfile.TarInfo(member_name)
+        info.mtime = time.time()
+        digest = hashlib.sha256(data).hexdigest()
+        original = self._paths_by_digest.get(digest)
+        if original is not None and self._digests.get(original) == digest:
+            # Same content as a report file or an earlier member: store a link to it
+            if original.startswith("debug/"):
+                info.type = tarfile.LNKTYPE
+                info.linkname = original
+            else:
+                info.type = tarfile.SYMTYPE
+                info.linkname = os.path.relpath(original, os.path.join(self.run.run_dir, "debug"))
+            self._tar.addfile(info)
+            self.stats["deduplicated"] += 1
+            return
+        info.size = len(data)
+        self._tar.addfile(info, io.BytesIO(data))
+        self._written(member_name, digest, len(data))
+
+    def _close_archive(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._tar = None
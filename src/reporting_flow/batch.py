@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from .config import BATCH_CONFIG, REPORTING_FLOW_INPUT_VARIABLES
+from .run_context import OUTPUT_DIR, configure_logging
+
+logger = logging.getLogger("report_flow")
+
+
+def load_jobs(path):
+    """Load report jobs ({topic, audience_level}, optionally run_id to resume or incremental_from) from a JSONL or CSV file"""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for line_number, row in enumerate(rows, start=1):
+        if not row.get("topic"):
+            raise ValueError(f"Job {line_number} in {path} has no topic")
+        jobs.append({**REPORTING_FLOW_INPUT_VARIABLES, **{k: v for k, v in row.items() if v}})
+    return jobs
+
+
+class StartRateLimiter:
+    """Spaces out job starts so that at most ``per_minute`` jobs start per minute"""
+
+    def __init__(self, per_minute=None):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def run_job(index, job, semaphore, rate_limiter):
+    """Run one report flow and describe its outcome for the manifest"""
+    from .main import ReportingFlow
+
+    async with semaphore:
+        await rate_limiter.wait()
+        entry = {"index": index, "topic": job["topic"], "audience_level": job.get("audience_level")}
+        started = time.perf_counter()
+        job = dict(job)
+        flow = ReportingFlow(input_variables=job, run_id=job.pop("run_id", None),
+                             incremental_from=job.pop("incremental_from", None))
+        try:
+            result = await flow.kickoff_async()
+            entry.update(status="completed", **(result if isinstance(result, dict) else {}))
+        except Exception as e:
+            logger.error(f"❌ Batch job {index} ({job['topic']}) failed: {e}", exc_info=True)
+            entry.update(status="failed", error=str(e))
+            if flow.run is not None:
+                entry["run_directory"] = flow.run.run_dir
+        entry["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return entry
+
+
+async def run_batch_async(jobs, concurrency=None, jobs_per_minute=None, manifest_path=None):
+    """Run many report flows concurrently on the current event loop.
+
+    Each job gets its own ReportingFlow and run directory. At most
+    ``concurrency`` reports run at a time and at most ``jobs_per_minute``
+    start per minute. A summary manifest is written to ``manifest_path``
+    and returned.
+    """
+    concurrency = concurrency or BATCH_CONFIG["concurrency"]
+    jobs_per_minute = jobs_per_minute if jobs_per_minute is not None else BATCH_CONFIG["jobs_per_minute"]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    rate_limiter = StartRateLimiter(jobs_per_minute)
+
+    started_at = datetime.now()
+    logger.info(f"🚀 Starting batch of {len(jobs)} reports (concurrency {concurrency})")
+    entries = await asyncio.gather(*(run_job(i, job, semaphore, rate_limiter) for i, job in enumerate(jobs)))
+
+    manifest = {
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.now().isoformat(),
+        "concurrency": concurrency,
+        "jobs_per_minute": jobs_per_minute,
+        "total": len(entries),
+        "completed": sum(1 for e in entries if e["status"] == "completed"),
+        "failed": sum(1 for e in entries if e["status"] == "failed"),
+        "jobs": entries,
+    }
+    if manifest_path is None:
+        manifest_path = os.path.join(OUTPUT_DIR, f"batch_{started_at.strftime('%Y%m%d_%H%M%S')}_manifest.json")
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"📊 Batch finished: {manifest['completed']} completed, {manifest['failed']} failed. Manifest: {manifest_path}")
+    return manifest
+
+
+def main():
+    """Command line entry point: run every job of a JSONL/CSV file in one process"""
+    parser = argparse.ArgumentParser(description="Generate many reports in one process")
+    parser.add_argument("jobs", help="JSONL or CSV file with topic and audience_level per job")
+    parser.add_argument("--concurrency", type=int, default=None, help="Reports generated at the same time")
+    parser.add_argument("--jobs-per-minute", type=float, default=None, help="Maximum report starts per minute")
+    parser.add_argument("--manifest", default=None, help="Where to write the summary manifest")
+    args = parser.parse_args()
+
+    configure_logging()
+    manifest = asyncio.run(run_batch_async(
+        load_jobs(args.jobs),
+        concurrency=args.concurrency,
+        jobs_per_minute=args.jobs_per_minute,
+        manifest_path=args.manifest,
+    ))
+    return 0 if manifest["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
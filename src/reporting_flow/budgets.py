@@ -0,0 +1,161 @@
+import contextvars
+import logging
+from contextlib import contextmanager
+
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.task_events import TaskStartedEvent
+
+from .config import PIPELINE_PROFILES, REPORT_BUDGET_CONFIG, TASK_BUDGETS
+from .incremental import section_data
+
+logger = logging.getLogger("report_flow")
+
+# Words of English prose per token, to turn token budgets into the length asked of a section
+WORDS_PER_TOKEN = 0.75
+# Share of an output limit asked of the writers, so that sections end before being cut
+LENGTH_MARGIN = 0.8
+
+# Completion tokens per LLM call of the task being executed (None = no limit)
+task_output_limit = contextvars.ContextVar("task_output_limit", default=None)
+# Completion tokens per LLM call left to the section being written by the report budget
+section_output_limit = contextvars.ContextVar("section_output_limit", default=None)
+# Words asked of the section being written (None = as long as its outline needs)
+section_length_words = contextvars.ContextVar("section_length_words", default=None)
+
+
+def task_budget(task_name):
+    """Budgets of a task, with the defaults of TASK_BUDGETS for what it does not set"""
+    return {**TASK_BUDGETS["default"], **TASK_BUDGETS.get(task_name, {})}
+
+
+def apply_task_budgets(tasks):
+    """Cap the iterations of the agents of ``tasks`` (each agent performs one task in our crews)"""
+    for task in tasks:
+        max_iterations = task_budget(task.name)["max_iterations"]
+        if max_iterations and task.agent is not None:
+            task.agent.max_iter = max_iterations
+
+
+def pipeline_output_limit(profile):
+    """Smallest output limit of the tasks of a pipeline profile, or None"""
+    limits = [task_budget(name)["max_output_tokens"] for name in PIPELINE_PROFILES[profile]]
+    return min((limit for limit in limits if limit), default=None)
+
+
+def output_token_limit():
+    """Completion tokens the current LLM call may generate: the smallest of its task's and section's limits"""
+    limits = [limit for limit in (task_output_limit.get(), section_output_limit.get()) if limit]
+    return min(limits) if limits else None
+
+
+def length_words(max_output_tokens):
+    """Words asked of a section whose answers are cut at ``max_output_tokens`` (None = no limit)"""
+    if not max_output_tokens:
+        return None
+    return int(max(50, round(max_output_tokens * WORDS_PER_TOKEN * LENGTH_MARGIN, -1)))
+
+
+def length_budget(max_output_tokens):
+    """Length asked of a section whose answers are cut at ``max_output_tokens``, for the writers' prompts"""
+    words = length_words(max_output_tokens)
+    if words is None:
+        return "as long as the content outline needs"
+    return f"at most about {words} words"
+
+
+@contextmanager
+def limit_section_output(tokens, length_tokens=None):
+    """Cut the LLM calls made in this block (and the crews it kicks off) at ``tokens`` completion tokens.
+
+    ``length_tokens`` is the limit the section's length was asked from
+    (see length_budget), so that its drafts are judged by that length.
+    """
+    token = section_output_limit.set(tokens)
+    words_token = section_length_words.set(length_words(length_tokens))
+    try:
+        yield
+    finally:
+        section_length_words.reset(words_token)
+        section_output_limit.reset(token)
+
+
+def section_weight(section):
+    """Share of the report budget a plan section asks for: the points of its content outline"""
+    data = section_data(section)
+    outline = data.get("content_outline") if data is not None else None
+    return max(1, len(outline)) if isinstance(outline, list) else 1
+
+
+class ReportBudget:
+    """Completion tokens of the content writer crews over a report, split across its sections.
+
+    A section is allotted its share of what is left when it starts: the
+    budget minus what finished sections used and what sections in progress
+    were allotted, in proportion to its weight among the sections not
+    started yet. Sections that use more than their share shrink the later
+    ones, down to ``min_section_tokens``. Used from the flow's event loop only.
+    """
+
+    def __init__(self, output_tokens, weights, min_section_tokens=None):
+        self.output_tokens = output_tokens
+        self.weights = list(weights)
+        self.min_section_tokens = (REPORT_BUDGET_CONFIG["min_section_tokens"]
+                                   if min_section_tokens is None else min_section_tokens)
+        self.used = 0
+        self.sections = {}
+        self._allotted = {}
+        self._pending = set(range(len(self.weights)))
+
+    @classmethod
+    def for_sections(cls, sections):
+        """Budget of a report of these plan sections, or None when REPORT_BUDGET_CONFIG sets none"""
+        if not REPORT_BUDGET_CONFIG["output_tokens"]:
+            return None
+        budget = cls(REPORT_BUDGET_CONFIG["output_tokens"], [section_weight(section) for section in sections])
+        logger.info(f"💸 Report budget: {budget.output_tokens} completion tokens for {len(sections)} sections")
+        return budget
+
+    def allot(self, i):
+        """Completion tokens section ``i`` (0-based) may use"""
+        left = self.output_tokens - self.used - sum(self._allotted.values())
+        pending_weight = sum(self.weights[j] for j in self._pending | {i})
+        share = int(left * self.weights[i] / pending_weight) if pending_weight else left
+        allotted = max(self.min_section_tokens, share)
+        if share < self.min_section_tokens:
+            logger.warning(f"💸 Report budget nearly spent: section {i+1} gets the minimum of {allotted} tokens")
+        self._pending.discard(i)
+        self._allotted[i] = allotted
+        self.sections[i + 1] = {"allotted_tokens": allotted, "used_tokens": None}
+        return allotted
+
+    def settle(self, i, used_tokens):
+        """Record what section ``i`` used; a section that was never allotted (reused, failed) leaves its share"""
+        self._pending.discard(i)
+        self._allotted.pop(i, None)
+        self.used += used_tokens
+        if i + 1 in self.sections:
+            self.sections[i + 1]["used_tokens"] = used_tokens
+
+    def stats(self):
+        return {"output_tokens": self.output_tokens, "used_tokens": self.used, "sections": self.sections}
+
+
+def section_output_limits(profile, report_budget, i):
+    """Completion tokens per LLM call of section ``i`` written with ``profile``.
+
+    Returns ``(section_limit, output_limit)``: the section's share of the
+    report budget spread over the calls of its pipeline (None without a
+    report budget), and the smallest limit of any of those calls, which
+    the section's length is asked from.
+    """
+    output_limit = pipeline_output_limit(profile)
+    if report_budget is None:
+        return None, output_limit
+    section_limit = report_budget.allot(i) // len(PIPELINE_PROFILES[profile])
+    return section_limit, min(output_limit or section_limit, section_limit)
+
+
+# Tasks run in their own thread, which applies the output limit of the task it works on
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    task_output_limit.set(task_budget(getattr(source, "name", None))["max_output_tokens"])
@@ -0,0 +1,50 @@
+import json
+import os
+
+from .cache import make_cache_key
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class CheckpointStore:
+    """Completed flow steps of a run, each stored with a hash of its inputs.
+
+    The store lives in the run directory, so rerunning a flow with the same
+    run id can reuse every step whose inputs did not change and only redo
+    the remaining work.
+    """
+
+    def __init__(self, run_dir):
+        self.path = os.path.join(run_dir, CHECKPOINT_FILE)
+        self.run_dir = run_dir
+        self.data = {"steps": {}}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.data = json.load(f)
+
+    @staticmethod
+    def input_hash(inputs):
+        return make_cache_key(inputs)
+
+    def load(self, step, inputs):
+        """Return the saved payload of ``step`` if it was completed with the same inputs"""
+        entry = self.data["steps"].get(step)
+        if entry is None or entry["input_hash"] != self.input_hash(inputs):
+            return None
+        return entry["payload"]
+
+    def save(self, step, inputs, payload):
+        """Record ``step`` as completed and atomically rewrite the checkpoint file"""
+        self.data["steps"][step] = {"input_hash": self.input_hash(inputs), "payload": payload}
+        self._write()
+
+    def discard(self, step):
+        """Forget ``step`` so that it is redone when the run is resumed"""
+        if self.data["steps"].pop(step, None) is not None:
+            self._write()
+
+    def _write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.data, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
@@ -1,25 +1,262 @@
 import os
 from datetime import datetime
 
+# rate_limits: process-wide budget per provider (requests and tokens per minute,
+# maximum concurrent calls). Set them to your account's limits.
+# price_per_million_tokens: USD prices used to estimate run costs in metrics.json.
 LLM_CONFIGS = {
     "openai": {
         "model": "gpt-4o-mini",
-        "api_key": os.getenv('OPENAI_API_KEY')
+        "api_key": os.getenv('OPENAI_API_KEY'),
+        "rate_limits": {"requests_per_minute": 500, "tokens_per_minute": 200000, "max_concurrency": 16},
+        "price_per_million_tokens": {"prompt": 0.15, "completion": 0.60}
     },
     "groq": {
         "model": "groq/llama3-groq-70b-8192-tool-use-preview", 
-        "api_key": os.getenv('GROQ_API_KEY')
+        "api_key": os.getenv('GROQ_API_KEY'),
+        "rate_limits": {"requests_per_minute": 30, "tokens_per_minute": 15000, "max_concurrency": 4},
+        "price_per_million_tokens": {"prompt": 0.89, "completion": 0.89}
     },
     "anthropic": {
         "model": "anthropic/claude-3-5-sonnet-20240620",
-        "api_key": os.getenv('ANTHROPIC_API_KEY')
+        "api_key": os.getenv('ANTHROPIC_API_KEY'),
+        "rate_limits": {"requests_per_minute": 50, "tokens_per_minute": 40000, "max_concurrency": 4},
+        "price_per_million_tokens": {"prompt": 3.00, "completion": 15.00}
     }
 }
 
-LLM_CONFIG = LLM_CONFIGS["openai"] # Change this to switch between LLMs
+LLM_PROVIDER = "openai" # Change this to switch between LLMs
+LLM_CONFIG = LLM_CONFIGS[LLM_PROVIDER]
+
+# Model routing per agent (researcher, planner, content_writer, editor, quality_reviewer;
+# every task is performed by one agent). Agents without a route use "default".
+# - provider: entry of LLM_CONFIGS answering the agent's calls
+# - fallbacks: providers tried in order when a call fails or times out (skipped without an API key)
+# - timeout: seconds before a call to a provider is abandoned
+# - race_after_seconds: also call the first fallback when the provider has not answered
+#   after that many seconds, keeping the first answer (None = no race)
+# Mechanical stages (planning JSON, editing, review) stay on the fast provider when
+# LLM_PROVIDER is switched to a stronger model.
+LLM_FAST_PROVIDER = "openai"
+LLM_RACE_AFTER_SECONDS = float(os.getenv("REPORTING_LLM_RACE_AFTER")) if os.getenv("REPORTING_LLM_RACE_AFTER") else None
+LLM_ROUTES = {
+    "default": {"provider": LLM_PROVIDER, "fallbacks": ["anthropic", "groq"], "timeout": 180,
+                "race_after_seconds": LLM_RACE_AFTER_SECONDS},
+    "planner": {"provider": LLM_FAST_PROVIDER, "fallbacks": [LLM_PROVIDER, "anthropic"], "timeout": 120,
+                "race_after_seconds": LLM_RACE_AFTER_SECONDS},
+    "editor": {"provider": LLM_FAST_PROVIDER, "fallbacks": [LLM_PROVIDER, "anthropic"], "timeout": 120,
+               "race_after_seconds": LLM_RACE_AFTER_SECONDS},
+    "quality_reviewer": {"provider": LLM_FAST_PROVIDER, "fallbacks": [LLM_PROVIDER, "anthropic"], "timeout": 120,
+                         "race_after_seconds": LLM_RACE_AFTER_SECONDS},
+}
+
+# Hedged LLM calls (REPORTING_LLM_HEDGE=1): when a call has not answered after the
+# `percentile` latency of its provider (initial_delay_seconds until min_samples calls
+# were measured), a duplicate is sent to the same provider ("same") or to the route's
+# first fallback ("fallback"); the first answer wins and the other one is dropped.
+HEDGE_CONFIG = {
+    "enabled": os.getenv("REPORTING_LLM_HEDGE", "0") == "1",
+    "percentile": float(os.getenv("REPORTING_LLM_HEDGE_PERCENTILE", "95")),
+    "min_samples": 20,
+    "initial_delay_seconds": 60,
+    "min_delay_seconds": 2,
+    "target": os.getenv("REPORTING_LLM_HEDGE_TARGET", "same")
+}
+
+# Seconds each task may take, by task name ("default" for the others, None = no deadline).
+# Once a task is past its deadline its LLM calls fail; a section keeps its last finished
+# draft, or is skipped when it has none.
+TASK_DEADLINES = {
+    "default": float(os.getenv("REPORTING_TASK_DEADLINE", "600")) or None,
+    "research_task": 900,
+    "decomposition_task": 120,
+    "subtopic_research_task": 600,
+    "planning_task": 300,
+    "merged_planning_task": 300,
+    "writing_task": 420,
+    "single_pass_task": 480,
+}
+
+# Budgets per task, by task name ("default" for the others; None = no limit). Wall-clock
+# budgets are the TASK_DEADLINES above.
+# - max_output_tokens: completion tokens of each LLM call of the task; a longer answer is cut
+#   there. The smallest one of a pipeline's tasks also sets the length asked of the section.
+# - max_iterations: reasoning steps (and so tool calls) of the task's agent, after which it
+#   has to give its final answer
+TASK_BUDGETS = {
+    "default": {"max_output_tokens": None, "max_iterations": None},
+    "research_task": {"max_iterations": 20},
+    "subtopic_research_task": {"max_iterations": 10},
+    "writing_task": {"max_output_tokens": 2500},
+    "editing_task": {"max_output_tokens": 2500},
+    "conditional_editing_task": {"max_output_tokens": 2500},
+    "quality_review_task": {"max_output_tokens": 2500},
+    "conditional_quality_review_task": {"max_output_tokens": 2500},
+    "single_pass_task": {"max_output_tokens": 3000},
+}
+
+# Report-level budget of the completion tokens of the content writer crews (0 = none). When a
+# section starts it is allotted a share of what is left (minus what the sections in progress
+# were allotted) in proportion to the points of its content outline, and at least
+# min_section_tokens; its tasks are asked for a shorter section and cut at that share. Sections
+# that overspend leave less to the later ones.
+REPORT_BUDGET_CONFIG = {
+    "output_tokens": int(os.getenv("REPORTING_REPORT_OUTPUT_TOKENS", "0")),
+    "min_section_tokens": int(os.getenv("REPORTING_REPORT_MIN_SECTION_TOKENS", "600"))
+}
+
+# Offline stand-in for every LLM (REPORTING_LLM_STAND_IN=1), so that flows, batches and the
+# service can be tested and benchmarked without provider calls:
+# - synthetic: generated answers (a valid plan, ``searches`` searches by the researcher, sourced
+#   sections) after a latency of latency_seconds (log-normal jitter of sigma latency_jitter) plus
+#   the completion tokens (normally distributed) at tokens_per_second
+# - replay: the answers recorded in the recordings file, after their recorded latency times
+#   replay_time_scale; prompts that were not recorded get synthetic answers
+# Set REPORTING_LLM_RECORD=path on a run with real providers to record its answers for replay.
+# The stand-in answers in place of the providers, behind their cache, rate limiters and deadlines;
+# rate_limits replaces the per-minute budgets of the providers, which offline runs would otherwise
+# queue for, while their concurrency limits still apply.
+LLM_STAND_IN_CONFIG = {
+    "enabled": os.getenv("REPORTING_LLM_STAND_IN", "0") == "1",
+    "mode": os.getenv("REPORTING_LLM_STAND_IN_MODE", "synthetic"),
+    "latency_seconds": float(os.getenv("REPORTING_LLM_STAND_IN_LATENCY", "0")),
+    "latency_jitter": float(os.getenv("REPORTING_LLM_STAND_IN_JITTER", "0")),
+    "tokens_per_second": float(os.getenv("REPORTING_LLM_STAND_IN_TOKENS_PER_SECOND", "0")),
+    "completion_tokens": int(os.getenv("REPORTING_LLM_STAND_IN_COMPLETION_TOKENS", "600")),
+    "completion_tokens_stdev": int(os.getenv("REPORTING_LLM_STAND_IN_COMPLETION_TOKENS_STDEV", "0")),
+    "sections": int(os.getenv("REPORTING_LLM_STAND_IN_SECTIONS", "3")),
+    "searches": int(os.getenv("REPORTING_LLM_STAND_IN_SEARCHES", "0")),
+    "seed": int(os.getenv("REPORTING_LLM_STAND_IN_SEED", "0")),
+    "recordings": os.getenv("REPORTING_LLM_RECORDINGS", os.path.join("fixtures", "llm", "recordings.jsonl")),
+    "replay_time_scale": float(os.getenv("REPORTING_LLM_REPLAY_TIME_SCALE", "1")),
+    "record": os.getenv("REPORTING_LLM_RECORD") or None,
+    "rate_limits": {"requests_per_minute": 60000, "tokens_per_minute": 100_000_000}
+}
+
+# Persistent cache of LLM responses, keyed by model, messages and sampling parameters. Opt-in
+# (REPORTING_LLM_CACHE=1): a cached answer is replayed for a week, even when a new one is wanted.
+LLM_CACHE_CONFIG = {
+    "enabled": os.getenv("REPORTING_LLM_CACHE", "0") == "1",
+    "path": os.getenv("REPORTING_LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite")),
+    "ttl_seconds": 7 * 24 * 3600,
+    "max_bytes": 256 * 1024 * 1024
+}
+
+# Persistent cache of web search results used by the research crew.
+# In offline mode searches are answered only from the cache and the fixture
+# directory; set REPORTING_SEARCH_RECORD=1 on an online run to record fixtures.
+# REPORTING_SEARCH_IGNORE_DATES=1 drops years and words like "latest" from the cache key, so
+# queries differing only by them share results (possibly stale ones, hence off by default).
+SEARCH_CACHE_CONFIG = {
+    "enabled": os.getenv("REPORTING_SEARCH_CACHE", "1") == "1",
+    "path": os.getenv("REPORTING_SEARCH_CACHE_PATH", os.path.join(".cache", "search_results.sqlite")),
+    "ttl_seconds": 24 * 3600,
+    "max_bytes": 64 * 1024 * 1024,
+    "offline": os.getenv("REPORTING_SEARCH_OFFLINE", "0") == "1",
+    "fixtures_dir": os.getenv("REPORTING_SEARCH_FIXTURES", os.path.join("fixtures", "search")),
+    "record_fixtures": os.getenv("REPORTING_SEARCH_RECORD", "0") == "1",
+    "ignore_date_qualifiers": os.getenv("REPORTING_SEARCH_IGNORE_DATES", "0") == "1",
+    # Offline searches without recorded results get generated ones after this latency
+    "synthetic": os.getenv("REPORTING_SEARCH_SYNTHETIC", "0") == "1",
+    "synthetic_latency_seconds": float(os.getenv("REPORTING_SEARCH_SYNTHETIC_LATENCY", "0"))
+}
+
+# Store of the sections written by earlier reports (REPORTING_SECTION_STORE=1), matched to new
+# plan sections by the cosine similarity of their topic, title, goal and outline (words and word
+# pairs). A stored section of the same audience at least reuse_similarity close is reused as is;
+# one at least seed_similarity close (any audience) is given to the writer as a draft to adapt,
+# and the section is then written with the seed_profile pipeline. The oldest sections beyond
+# max_entries are dropped.
+SECTION_STORE_CONFIG = {
+    "enabled": os.getenv("REPORTING_SECTION_STORE", "0") == "1",
+    "path": os.getenv("REPORTING_SECTION_STORE_PATH", os.path.join(".cache", "sections.sqlite")),
+    "reuse_similarity": float(os.getenv("REPORTING_SECTION_REUSE_SIMILARITY", "0.9")),
+    "seed_similarity": float(os.getenv("REPORTING_SECTION_SEED_SIMILARITY", "0.65")),
+    "seed_profile": os.getenv("REPORTING_SECTION_SEED_PROFILE", "single_pass"),
+    "max_entries": 5000
+}
 
 REPORTING_FLOW_INPUT_VARIABLES = {
     "audience_level": "Expert",
     "topic": "Prompt engineering for LLM",
     "current_year": str(datetime.now().year)
-} 
\ No newline at end of file
+} 
+
+# Maximum number of report sections written at the same time (1 = one section after another)
+SECTION_CONCURRENCY = int(os.getenv("REPORTING_SECTION_CONCURRENCY", "4"))
+
+# Research phase (REPORTING_RESEARCH_MODE): "single" has one researcher cover the whole topic before
+# planning; "parallel" breaks the topic down into `subtopics` research questions, researches them
+# at most `concurrency` at a time and merges the findings (sources deduplicated by URL) for planning
+RESEARCH_CONFIG = {
+    "mode": os.getenv("REPORTING_RESEARCH_MODE", "single"),
+    "subtopics": int(os.getenv("REPORTING_RESEARCH_SUBTOPICS", "4")),
+    "concurrency": int(os.getenv("REPORTING_RESEARCH_CONCURRENCY", "4"))
+}
+
+# Research context of each section's writer: the research output is split into chunks of about
+# chunk_tokens tokens and indexed (BM25), and each section gets the chunks citing its sources or
+# matching its title, goal and outline, up to section_budget_tokens. With compaction disabled
+# (REPORTING_CONTEXT_COMPACTION=0) every section gets the whole research output.
+CONTEXT_CONFIG = {
+    "compaction": os.getenv("REPORTING_CONTEXT_COMPACTION", "1") == "1",
+    "chunk_tokens": int(os.getenv("REPORTING_CONTEXT_CHUNK_TOKENS", "200")),
+    "section_budget_tokens": int(os.getenv("REPORTING_CONTEXT_BUDGET", "1500"))
+}
+
+# Token streaming (kickoff --live, or ReportingFlow(stream_tokens=True)): text completions are
+# streamed from the provider and each delta becomes a flow event. A streamed generation that
+# repeats the same line max_repeated_lines times in a row is aborted (0 = never); the live
+# view of kickoff --live is redrawn at most every refresh_seconds.
+STREAMING_CONFIG = {
+    "max_repeated_lines": int(os.getenv("REPORTING_STREAM_MAX_REPEATED_LINES", "8")),
+    "refresh_seconds": float(os.getenv("REPORTING_STREAM_REFRESH", "0.1"))
+}
+
+# Batch mode: reports generated at the same time and maximum report starts per minute (0 = unlimited)
+BATCH_CONFIG = {
+    "concurrency": int(os.getenv("REPORTING_BATCH_CONCURRENCY", "2")),
+    "jobs_per_minute": float(os.getenv("REPORTING_BATCH_JOBS_PER_MINUTE", "0"))
+}
+
+# Run metrics: metrics.json is always written to the run directory; set
+# REPORTING_METRICS_OPENMETRICS=1 to also write metrics.prom (OpenMetrics text format)
+METRICS_CONFIG = {
+    "openmetrics": os.getenv("REPORTING_METRICS_OPENMETRICS", "0") == "1"
+}
+
+# Run artifacts are written by a background thread. REPORTING_DEBUG_ARTIFACTS picks the debug
+# artifacts written: none, summary (research output and plan) or full (also every section's
+# input and output). Set REPORTING_ARCHIVE_ARTIFACTS=1 to write them to one debug.tar.gz per run.
+ARTIFACTS_CONFIG = {
+    "debug_level": os.getenv("REPORTING_DEBUG_ARTIFACTS", "summary"),
+    "archive": os.getenv("REPORTING_ARCHIVE_ARTIFACTS", "0") == "1"
+}
+
+# Resident report service (poetry run serve): HTTP address or Unix socket, flows run at the
+# same time, and the SQLite file of its persistent job queue
+SERVICE_CONFIG = {
+    "host": os.getenv("REPORTING_SERVICE_HOST", "127.0.0.1"),
+    "port": int(os.getenv("REPORTING_SERVICE_PORT", "8765")),
+    "socket": os.getenv("REPORTING_SERVICE_SOCKET") or None,
+    "workers": int(os.getenv("REPORTING_SERVICE_WORKERS", "2")),
+    "queue_path": os.getenv("REPORTING_SERVICE_QUEUE", os.path.join("output", "jobs.sqlite"))
+}
+
+# Content writer pipeline run for every section (REPORTING_PIPELINE_PROFILE):
+# - full: writer, editor and quality reviewer (three full-length generations)
+# - write_review: writer and quality reviewer
+# - single_pass: one combined write/edit/review prompt
+# - review_if_needed: writer, then editor and reviewer only if the draft fails the review heuristic
+PIPELINE_PROFILES = {
+    "full": ["writing_task", "editing_task", "quality_review_task"],
+    "write_review": ["writing_task", "quality_review_task"],
+    "single_pass": ["single_pass_task"],
+    "review_if_needed": ["writing_task", "conditional_editing_task", "conditional_quality_review_task"],
+}
+PIPELINE_CONFIG = {
+    "profile": os.getenv("REPORTING_PIPELINE_PROFILE", "full"),
+    # Drafts shorter than this (or than half the length asked of their section, when less) are
+    # always reviewed in review_if_needed mode
+    "review_min_words": int(os.getenv("REPORTING_REVIEW_MIN_WORDS", "300"))
+}
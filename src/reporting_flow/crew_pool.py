@@ -0,0 +1,63 @@
+import copy
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+import yaml
+
+
+@lru_cache(maxsize=None)
+def _parse_yaml(path, mtime):
+    with open(path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def load_yaml(config_path):
+    """Parse a crew's agents/tasks YAML once per process (again only if the file changes).
+
+    Callers get their own deep copy, since crewai maps llm and tool names
+    in the config dicts in place.
+    """
+    path = os.fspath(config_path)
+    return copy.deepcopy(_parse_yaml(path, os.path.getmtime(path)))
+
+
+class CrewPool:
+    """Reusable crews built by ``factory``, each used by one kickoff at a time.
+
+    A crew re-interpolates its agents and tasks from their templates on every
+    kickoff, so a finished crew can be handed to the next section instead of
+    building new agents and tasks. ``checkout`` gives exclusive use of an
+    idle crew (or a new one when all are busy), so at most as many crews are
+    built as there are concurrent kickoffs. Crews whose kickoff raised are
+    dropped rather than reused, and the outputs and times of the tasks of a
+    reused crew are cleared, so that nothing reads its earlier run's output
+    or task durations (e.g. of a task skipped this time) as this one's.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.created = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self):
+        with self._lock:
+            crew = self._idle.pop() if self._idle else None
+        if crew is not None:
+            for task in crew.tasks:
+                task.output = task.start_time = task.end_time = None
+        else:
+            crew = self.factory()
+            with self._lock:
+                self.created += 1
+        yield crew
+        # Only reached when the caller's block did not raise
+        with self._lock:
+            self._idle.append(crew)
+
+    def stats(self):
+        with self._lock:
+            return {"created": self.created, "idle": len(self._idle)}
@@ -1,8 +1,13 @@
-from src.reporting_flow.llm_config import llm
+from ...llm_config import get_llm
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
+from crewai.tasks.conditional_task import ConditionalTask
+import logging
 import os
-from src.reporting_flow.config import REPORTING_FLOW_INPUT_VARIABLES
+import re
+from ...budgets import apply_task_budgets, section_length_words
+from ...config import PIPELINE_CONFIG, PIPELINE_PROFILES, REPORTING_FLOW_INPUT_VARIABLES
+from ...crew_pool import CrewPool, load_yaml
 
 # Uncomment the following line to use an example of a custom tool
 # from reporting_content_writer.tools.custom_tool import MyCustomTool
@@ -10,31 +15,72 @@ from src.reporting_flow.config import REPORTING_FLOW_INPUT_VARIABLES
 # Check our tools documentations for more information on how to use them
 # from crewai_tools import SerperDevTool
 
+logger = logging.getLogger("report_flow")
+
+# Signs of an unfinished draft or of the model talking about the task instead of writing it
+DRAFT_RED_FLAGS = re.compile(
+	r"\b(TODO|TBD|lorem ipsum|as an ai\b|I cannot|I'm unable|\[insert)", re.IGNORECASE
+)
+# Share of the length asked of a section below which its draft is too short
+MIN_LENGTH_SHARE = 0.5
+
+
+def draft_issues(text, min_words=None):
+	"""Cheap checks of a section draft; returns the reasons it should be reviewed.
+
+	A draft is too short under ``review_min_words``, or under a share of the
+	length asked of its section when that is shorter.
+	"""
+	if min_words is None:
+		min_words = PIPELINE_CONFIG["review_min_words"]
+		asked_words = section_length_words.get()
+		if asked_words:
+			min_words = min(min_words, int(asked_words * MIN_LENGTH_SHARE))
+	text = (text or "").strip()
+	issues = []
+	if len(text.split()) < min_words:
+		issues.append(f"shorter than {min_words} words")
+	if not re.search(r"^#{1,6} ", text, re.MULTILINE):
+		issues.append("no headings")
+	if not re.search(r"https?://|\[\d+\]|\]\(", text):
+		issues.append("no citations")
+	if DRAFT_RED_FLAGS.search(text):
+		issues.append("placeholder or meta text")
+	if text and text.rstrip("*_`").rstrip()[-1:] not in ".!?)]|\"'":
+		issues.append("truncated ending")
+	return issues
+
+
+def needs_review(task_output):
+	"""Condition of the editing task in review_if_needed mode"""
+	issues = draft_issues(task_output.raw)
+	if issues:
+		logger.info(f"🔎 Draft sent to review: {', '.join(issues)}")
+	else:
+		logger.info("⏩ Draft passed the review checks, skipping editor and reviewer")
+	return bool(issues)
+
+
+def was_edited(task_output):
+	"""Condition of the quality review in review_if_needed mode: only after the editor ran"""
+	return bool(task_output.raw)
+
 @CrewBase
 class ReportingContentWriterCrew():
 	input_variables = REPORTING_FLOW_INPUT_VARIABLES
 	"""ReportingContentWriter crew"""
 
-	def __init__(self):
+	def __init__(self, profile=None):
 		# Output folders are now managed by main.py
-		pass
-
-	@agent
-	def content_manager(self) -> Agent:
-		"""Creates a manager agent to oversee the content creation process"""
-		return Agent(
-			config=self.agents_config['content_manager'],
-			llm=llm,
-			verbose=True,
-			allow_delegation=True,
-			tools=[],  # Manager doesn't need tools, just delegates
-		)
+		self.profile = profile or PIPELINE_CONFIG["profile"]
+		if self.profile not in PIPELINE_PROFILES:
+			raise ValueError(f"Unknown pipeline profile {self.profile!r}, expected one of {list(PIPELINE_PROFILES)}")
 
 	@agent
 	def content_writer(self) -> Agent:
 		return Agent(
 			config=self.agents_config['content_writer'],
-			llm=llm,
+			llm=get_llm('content_writer'),
 			verbose=True,
 			allow_delegation=False,
 			tools=[],
@@ -44,7 +90,7 @@ class ReportingContentWriterCrew():
 	def editor(self) -> Agent:
 		return Agent(
 			config=self.agents_config['editor'],
-			llm=llm,
+			llm=get_llm('editor'),
 			verbose=True,
 			allow_delegation=False,
 			tools=[],
@@ -54,7 +100,7 @@ class ReportingContentWriterCrew():
 	def quality_reviewer(self) -> Agent:
 		return Agent(
 			config=self.agents_config['quality_reviewer'],
-			llm=llm,
+			llm=get_llm('quality_reviewer'),
 			verbose=True,
 			allow_delegation=False,
 			tools=[],
@@ -79,15 +125,56 @@ class ReportingContentWriterCrew():
 	def quality_review_task(self) -> Task:
 		return Task(
 			config=self.tasks_config['quality_review_task'],
-			async_execution=True,
+			async_execution=False,
+		)
+
+	@task
+	def single_pass_task(self) -> Task:
+		return Task(
+			config=self.tasks_config['single_pass_task'],
+			async_execution=False,
+		)
+
+	@task
+	def conditional_editing_task(self) -> Task:
+		return ConditionalTask(
+			config=self.tasks_config['editing_task'],
+			condition=needs_review,
+			async_execution=False,
+		)
+
+	@task
+	def conditional_quality_review_task(self) -> Task:
+		return ConditionalTask(
+			config=self.tasks_config['quality_review_task'],
+			condition=was_edited,
+			async_execution=False,
 		)
 
 	@crew
 	def crew(self) -> Crew:
-		"""Creates the ReportingContentWriter crew with sequential process"""
+		"""Creates the ReportingContentWriter crew with sequential process, running the tasks of its pipeline profile"""
+		tasks = [task for task in self.tasks if task.name in PIPELINE_PROFILES[self.profile]]
+		# Each stage reads the previous stage's draft only, not every earlier draft of the section
+		for previous, task in zip(tasks, tasks[1:]):
+			task.context = [previous]
+		apply_task_budgets(tasks)
+		agents = []
+		for task in tasks:
+			if all(task.agent is not known for known in agents):
+				agents.append(task.agent)
 		return Crew(
-			agents=[self.content_writer(), self.editor(), self.quality_reviewer()],
-			tasks=self.tasks,
+			agents=agents,
+			tasks=tasks,
 			process=Process.sequential,
 			verbose=True,
-		) 
\ No newline at end of file
+		)
+
+# Parse the YAML configs once per process instead of on every instantiation
+ReportingContentWriterCrew.load_yaml = staticmethod(load_yaml)
+
+# Crews shared by the report sections, one section per crew at a time, per pipeline profile
+content_writer_pools = {
+	profile: CrewPool(lambda profile=profile: ReportingContentWriterCrew(profile).crew())
+	for profile in PIPELINE_PROFILES
+}
@@ -1,10 +1,15 @@
 import os
 import json
+from functools import lru_cache
 from crewai import Agent, Crew, Process, Task, LLM
 from crewai.project import CrewBase, agent, crew, task
 
 # Tools for improved research
-from crewai_tools import SerperDevTool
+from ...tools import CachedSerperDevTool
+from ...tools.cached_search_tool import search_cache
+from ...budgets import apply_task_budgets
+from ...config import SEARCH_CACHE_CONFIG
+from ...crew_pool import CrewPool, load_yaml
 
 # Optional - if you want to use Tavily as an alternative search
 # from tavily import TavilyClient
@@ -13,8 +18,8 @@ from crewai_tools import SerperDevTool
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
-# Define the LLM instance at the top level
-from src.reporting_flow.llm_config import llm
+# LLMs are routed per agent (LLM_ROUTES in config.py)
+from ...llm_config import get_llm
 
 
 class Section(BaseModel):
@@ -55,34 +60,43 @@ class ReportingPlan(BaseModel):
         """Convert to JSON string"""
         return json.dumps(self.to_dict())
 
+class ResearchQuestions(BaseModel):
+    """Sub-questions of the topic, researched in parallel"""
+    questions: List[str]
+
+@lru_cache(maxsize=None)
+def get_search_tool():
+    """Search tool shared by the research crews; identical concurrent searches share one request"""
+    # Initialize the SerperDevTool with API key from environment variable
+    serper_api_key = os.getenv("SERPER_API_KEY", "").strip()
+    # Synthetic results are only given offline
+    offline = SEARCH_CACHE_CONFIG["offline"] or SEARCH_CACHE_CONFIG["synthetic"]
+    if not serper_api_key and not offline:
+        print("Warning: SERPER_API_KEY not found in environment variables")
+    return CachedSerperDevTool(
+        api_key=serper_api_key,
+        cache=search_cache,
+        offline=offline,
+        synthetic=SEARCH_CACHE_CONFIG["synthetic"],
+        synthetic_latency_seconds=SEARCH_CACHE_CONFIG["synthetic_latency_seconds"],
+        fixtures_dir=SEARCH_CACHE_CONFIG["fixtures_dir"],
+        record_fixtures=SEARCH_CACHE_CONFIG["record_fixtures"],
+        ignore_date_qualifiers=SEARCH_CACHE_CONFIG["ignore_date_qualifiers"],
+    )
+
 @CrewBase
 class ReportingResearchCrew():
     """ReportingResearch crew with enhanced capabilities for better research, examples, and graphics"""
 
     def __init__(self):
-        # Initialize the SerperDevTool with API key from environment variable
-        serper_api_key = os.getenv("SERPER_API_KEY", "").strip()
-        if not serper_api_key:
-            print("Warning: SERPER_API_KEY not found in environment variables")
-        self.search_tool = SerperDevTool(api_key=serper_api_key)
-
-    @agent
-    def research_manager(self) -> Agent:
-        """Creates a manager agent to oversee the research process"""
-        return Agent(
-            config=self.agents_config['research_manager'],
-            llm=llm,
-            verbose=True,
-            allow_delegation=True,
-            # Configure collaboration properly with correct tool schema
-            tools=[],
-        )
+        # The search tool is shared by every research crew of the process
+        self.search_tool = get_search_tool()
 
     @agent
     def researcher(self) -> Agent:
         return Agent(
             config=self.agents_config['researcher'],
-            llm=llm,
+            llm=get_llm('researcher'),
             verbose=True,
             tools=[self.search_tool],
             allow_delegation=False,  # This agent doesn't delegate, just uses tools
@@ -92,7 +106,7 @@ class ReportingResearchCrew():
     def planner(self) -> Agent:
         return Agent(
             config=self.agents_config['planner'],
-            llm=llm,
+            llm=get_llm('planner'),
             verbose=True,
             tools=[],
             allow_delegation=False,  # This agent doesn't delegate
@@ -111,15 +125,60 @@ class ReportingResearchCrew():
         return Task(
             config=self.tasks_config['planning_task'],
             output_pydantic=ReportingPlan,
-            async_execution=True,
+            async_execution=False,
+        )
+
+    @task
+    def decomposition_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['decomposition_task'],
+            output_pydantic=ResearchQuestions,
+            async_execution=False,
+        )
+
+    @task
+    def subtopic_research_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['subtopic_research_task'],
+            async_execution=False,
+        )
+
+    @task
+    def merged_planning_task(self) -> Task:
+        """The planning task, reading the merged findings of the parallel researchers from its inputs"""
+        config = self.tasks_config['planning_task']
+        return Task(
+            config={**config, "description": config["description"] + "\nResearch findings:\n\n{research}\n"},
+            output_pydantic=ReportingPlan,
+            async_execution=False,
         )
 
     @crew
     def crew(self) -> Crew:
         """Creates the enhanced ReportingResearch crew with sequential process"""
+        tasks = [self.research_task(), self.planning_task()]
+        apply_task_budgets(tasks)
         return Crew(
             agents=[self.researcher(), self.planner()],
-            tasks=self.tasks,
+            tasks=tasks,
             process=Process.sequential,  # Change to sequential for simplicity and reliability
             verbose=True,
-        ) 
\ No newline at end of file
+        )
+
+    def stage_crew(self, task_name) -> Crew:
+        """Crew running one stage of the parallel research mode (decomposition, sub-topic research or planning)"""
+        task = getattr(self, task_name)()
+        apply_task_budgets([task])
+        return Crew(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=True)
+
+# Parse the YAML configs once per process instead of on every instantiation
+ReportingResearchCrew.load_yaml = staticmethod(load_yaml)
+
+# Research crews reused across the reports of a process, one report per crew at a time
+research_pool = CrewPool(lambda: ReportingResearchCrew().crew())
+
+# Crews of the parallel research mode, one per stage; sub-topic researchers run concurrently
+research_stage_pools = {
+    stage: CrewPool(lambda stage=stage: ReportingResearchCrew().stage_crew(stage))
+    for stage in ("decomposition_task", "subtopic_research_task", "merged_planning_task")
+}
@@ -0,0 +1,74 @@
+import contextvars
+import logging
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from types import SimpleNamespace
+
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.task_events import TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent
+
+from .config import TASK_DEADLINES
+from .hedging import deadline_executor, submit
+
+logger = logging.getLogger("report_flow")
+
+# Monotonic time by which the task being executed must be done (None = no deadline)
+task_deadline = contextvars.ContextVar("task_deadline", default=None)
+
+
+class TaskDeadlineExceeded(TimeoutError):
+    """An LLM call was refused or abandoned because its task ran out of time"""
+
+
+def remaining_seconds():
+    deadline = task_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def call_with_deadline(call, description):
+    """Run ``call`` within the current task's deadline.
+
+    Without a deadline the call runs inline. Otherwise it runs in a
+    background thread and is abandoned (its answer dropped) when the
+    deadline passes, raising TaskDeadlineExceeded.
+    """
+    remaining = remaining_seconds()
+    if remaining is None:
+        return call()
+    if remaining <= 0:
+        raise TaskDeadlineExceeded(f"Task deadline passed before {description}")
+    future = submit(deadline_executor, call)
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        future.cancel()
+        raise TaskDeadlineExceeded(f"Task deadline passed during {description}") from None
+
+
+def last_finished_output(crew, since):
+    """Output of the last task of ``crew`` that finished after ``since``, or None"""
+    finished = [task for task in crew.tasks
+                if task.output is not None and task.output.raw and task.end_time and task.end_time >= since]
+    if not finished:
+        return None
+    task = max(finished, key=lambda t: t.end_time)
+    return SimpleNamespace(raw=task.output.raw, name=task.name)
+
+
+# Task deadlines start when crewai starts a task, in the thread executing it
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    seconds = TASK_DEADLINES.get(getattr(source, "name", None), TASK_DEADLINES.get("default"))
+    task_deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+@crewai_event_bus.on(TaskCompletedEvent)
+def _on_task_completed(source, event):
+    task_deadline.set(None)
+
+
+@crewai_event_bus.on(TaskFailedEvent)
+def _on_task_failed(source, event):
+    if task_deadline.get() is not None and remaining_seconds() <= 0:
+        logger.warning(f"⏰ Task {getattr(source, 'name', None)} hit its deadline")
+    task_deadline.set(None)
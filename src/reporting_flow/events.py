@@ -0,0 +1,64 @@
+import asyncio
+from contextlib import nullcontext
+
+from .streaming import TokenSink, repetition_guard, streaming_to
+
+
+class FlowEvents:
+    """Queue of the progress events of a flow run, read by ``ReportingFlow.section_events()``.
+
+    Events are put from the event loop with ``put``, and from the threads
+    running the crews with ``put_threadsafe``. With ``stream_tokens`` the
+    LLM calls made in a ``token_stream`` block are streamed to a TokenSink
+    emitting their tokens and generations here; token events are dropped
+    while no one iterates, the others are always queued.
+    """
+
+    def __init__(self, stream_tokens=False, token_guard=None):
+        self.stream_tokens = stream_tokens
+        # A guard returning False aborts a generation, like the repetition guard
+        self.token_guard = token_guard
+        self._queue = asyncio.Queue()
+        self._consumers = 0
+        self._sinks = {}
+        self._loop = None
+
+    def put(self, event):
+        self._queue.put_nowait(event)
+
+    def put_threadsafe(self, event):
+        """Queue an event from a crew thread (token events only while someone iterates)"""
+        if event["type"] == "token" and not self._consumers:
+            return
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def iterate(self):
+        """Yield the events until the ``report`` or ``failed`` one"""
+        self._consumers += 1
+        try:
+            while True:
+                event = await self._queue.get()
+                yield event
+                if event["type"] in ("report", "failed"):
+                    return
+        finally:
+            self._consumers -= 1
+
+    def token_stream(self, section=None):
+        """Context streaming the LLM calls made for a section (None = the research) to the queue"""
+        if not self.stream_tokens:
+            return nullcontext()
+        self._loop = asyncio.get_running_loop()
+        guards = [guard for guard in (repetition_guard(), self.token_guard) if guard is not None]
+        sink = TokenSink(self.put_threadsafe, section=section,
+                         guard=(lambda generation: all(guard(generation) is not False for guard in guards))
+                         if guards else None)
+        self._sinks[section] = sink
+        return streaming_to(sink)
+
+    def abort(self, section=None):
+        """Abort the generation streaming for a section (None = the research) at its next token"""
+        sink = self._sinks.get(section)
+        if sink is not None:
+            sink.abort()
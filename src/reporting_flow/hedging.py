@@ -0,0 +1,86 @@
+import contextvars
+import math
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .metrics import estimate_cost
+from .rate_limit import estimate_tokens
+
+# Threads running hedged and raced calls, and deadline-bound provider calls. Two pools, so
+# that hedged calls waiting on deadline-bound calls can never starve them of threads.
+hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+deadline_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-deadline")
+
+
+def submit(executor, fn, *args):
+    """Run fn on the executor with the caller's context variables (run id, task deadline)"""
+    context = contextvars.copy_context()
+    return executor.submit(context.run, fn, *args)
+
+
+class LatencyTracker:
+    """Recent latencies of successful provider calls, per model"""
+
+    def __init__(self, window=200):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, model, seconds):
+        with self._lock:
+            self._samples[model].append(seconds)
+
+    def percentile(self, model, percentile, min_samples=1):
+        """Latency under which ``percentile``% of the recent calls answered, or None without enough samples"""
+        with self._lock:
+            samples = sorted(self._samples[model])
+        if len(samples) < max(1, min_samples):
+            return None
+        rank = math.ceil(percentile / 100 * len(samples)) - 1
+        return samples[min(max(rank, 0), len(samples) - 1)]
+
+
+class HedgeStats:
+    """What hedged and raced calls cost: duplicates sent, duplicates that won, and dropped answers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.wasted_calls = 0
+        self.wasted_prompt_tokens = 0
+        self.wasted_completion_tokens = 0
+        self.wasted_cost_usd = 0.0
+
+    def sent(self):
+        with self._lock:
+            self.hedges += 1
+
+    def won(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def wasted(self, model, messages, response):
+        """Account for an answer that arrived after the winner and was dropped"""
+        prompt_tokens = estimate_tokens(messages)
+        completion_tokens = estimate_tokens(response or "")
+        with self._lock:
+            self.wasted_calls += 1
+            self.wasted_prompt_tokens += prompt_tokens
+            self.wasted_completion_tokens += completion_tokens
+            self.wasted_cost_usd += estimate_cost(model, prompt_tokens, completion_tokens)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "wasted_calls": self.wasted_calls,
+                "wasted_prompt_tokens": self.wasted_prompt_tokens,
+                "wasted_completion_tokens": self.wasted_completion_tokens,
+                "wasted_cost_usd": round(self.wasted_cost_usd, 6),
+            }
+
+
+latency_tracker = LatencyTracker()
+hedge_stats = HedgeStats()
@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+
+from .cache import make_cache_key
+from .checkpoint import CHECKPOINT_FILE
+from .run_context import OUTPUT_DIR
+
+logger = logging.getLogger("report_flow")
+
+# Plan of a run, with the hash and file of each section, in the run directory
+SECTIONS_FILE = "sections_data.json"
+# Fields of a plan section that its content depends on
+SECTION_FIELDS = ("title", "high_level_goal", "why_important", "sources", "content_outline")
+
+
+def section_data(section):
+    """A plan section (a Section, a dict or JSON text) as a dict, or None for free text"""
+    if hasattr(section, "model_dump"):
+        return section.model_dump()
+    if isinstance(section, str):
+        try:
+            section = json.loads(section)
+        except ValueError:
+            return None
+    return section if isinstance(section, dict) else None
+
+
+def section_hash(section, audience_level):
+    """Hash of a section's canonical JSON and of the audience it is written for"""
+    data = section_data(section)
+    canonical = {field: data.get(field) for field in SECTION_FIELDS} if data is not None else str(section)
+    return make_cache_key({"section": canonical, "audience_level": audience_level})
+
+
+def sections_record(topic, audience_level, sections, section_files):
+    """Contents of a run's SECTIONS_FILE: its plan, with the hash and file (if written in full) of each section"""
+    return {
+        "topic": topic,
+        "audience_level": audience_level,
+        "sections": [
+            {**(section_data(section) or {"text": str(section)}),
+             "hash": section_hash(section, audience_level),
+             "section_file": section_files.get(i)}
+            for i, section in enumerate(sections)
+        ],
+    }
+
+
+def load_plan(path):
+    """Sections of a plan file: a run's sections_data.json (possibly edited) or a JSON list of sections"""
+    from .crews.reporting_research.reporting_research_crew import Section
+
+    with open(path) as f:
+        data = json.load(f)
+    sections = data.get("sections") if isinstance(data, dict) else data
+    if not isinstance(sections, list) or not sections:
+        raise ValueError(f"No sections in the plan {path}")
+    return [Section.model_validate({field: section.get(field) for field in SECTION_FIELDS}) for section in sections]
+
+
+def run_directory(run_id, output_dir=OUTPUT_DIR):
+    """Directory of the earlier run ``run_id`` in ``output_dir``.
+
+    Run ids come from job submissions, so anything but the name of a run
+    directory (a path, ``..``) is refused rather than read from.
+    """
+    separators = ("/", "\\", os.sep)
+    if not run_id or run_id in (".", "..") or os.path.isabs(run_id) or any(sep in run_id for sep in separators):
+        raise ValueError(f"Invalid run id {run_id!r}: expected the name of a run directory in {output_dir}")
+    run_dir = os.path.join(output_dir, run_id)
+    if not os.path.isdir(run_dir):
+        raise FileNotFoundError(f"No run {run_id!r} in {output_dir}")
+    return run_dir
+
+
+class PreviousRun:
+    """Sections written by an earlier run, found by section hash, for incremental regeneration.
+
+    Only sections the earlier run wrote in full are listed in its
+    sections_data.json: sections that were skipped, or kept from a draft
+    after a deadline, are written again.
+    """
+
+    def __init__(self, run_id, output_dir=OUTPUT_DIR):
+        self.run_id = run_id
+        self.run_dir = run_directory(run_id, output_dir)
+        path = os.path.join(self.run_dir, SECTIONS_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No {SECTIONS_FILE} in {self.run_dir}: only runs that finished writing "
+                                    "their sections can be the base of an incremental run")
+        with open(path) as f:
+            data = json.load(f)
+        self.section_files = {
+            section["hash"]: os.path.join(self.run_dir, section["section_file"])
+            for section in data["sections"] if section.get("hash") and section.get("section_file")
+        }
+
+    def find(self, digest):
+        """Path of the earlier run's section with this hash, or None"""
+        path = self.section_files.get(digest)
+        return path if path is not None and os.path.exists(path) else None
+
+    def research_text(self):
+        """Output of the earlier run's research task, from its checkpoint"""
+        try:
+            with open(os.path.join(self.run_dir, CHECKPOINT_FILE)) as f:
+                research = json.load(f)["steps"]["research"]["payload"]
+        except (OSError, ValueError, KeyError):
+            return ""
+        return research.get("research", "")
@@ -0,0 +1,144 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Life cycle of a job: queued -> running -> completed | failed; queued jobs can be cancelled
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+
+_COLUMNS = ("id", "status", "inputs", "run_id", "progress", "result", "error",
+            "created_at", "started_at", "finished_at", "attempts")
+
+
+class JobQueue:
+    """Report jobs persisted in SQLite, claimed in submission order by the service workers.
+
+    A job keeps the id of its run once the run has started, so a job that
+    was running when the service stopped is queued again by
+    ``requeue_running`` and resumes its run from the run's checkpoints.
+    The queue is safe to share between threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, inputs TEXT NOT NULL, run_id TEXT, "
+            "progress TEXT, result TEXT, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, attempts INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _job(row):
+        if row is None:
+            return None
+        job = dict(zip(_COLUMNS, row))
+        for name in ("inputs", "progress", "result"):
+            job[name] = json.loads(job[name]) if job[name] else None
+        return job
+
+    def _select(self, where="", params=(), suffix=""):
+        return self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs {where} {suffix}", params)
+
+    def submit(self, inputs, run_id=None):
+        """Queue a report job and return it"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, inputs, run_id, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(inputs), run_id, time.time()),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def claim(self):
+        """Mark the oldest queued job as running and return it, or None when the queue is empty"""
+        # BEGIN IMMEDIATE takes the write lock before the select, so that two processes sharing the
+        # queue cannot claim the same job (UPDATE ... RETURNING would need SQLite 3.35)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                        "WHERE id = ? AND status = 'queued'",
+                        (time.time(), row[0]),
+                    )
+                    row = self._select("WHERE id = ?", (row[0],)).fetchone()
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return self._job(row)
+
+    def _update(self, job_id, **values):
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+            self._conn.commit()
+
+    def set_run_id(self, job_id, run_id):
+        self._update(job_id, run_id=run_id)
+
+    def set_progress(self, job_id, progress):
+        self._update(job_id, progress=json.dumps(progress))
+
+    def finish(self, job_id, status, result=None, error=None):
+        """Record the outcome of a running job"""
+        self._update(job_id, status=status, result=json.dumps(result) if result is not None else None,
+                     error=error, finished_at=time.time())
+
+    def requeue(self, job_id):
+        """Put a running job back in the queue, e.g. when the service stops while it runs"""
+        self._update(job_id, status="queued")
+
+    def requeue_running(self):
+        """Queue again the jobs left running by a service that stopped; returns their number"""
+        with self._lock:
+            count = self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+            self._conn.commit()
+        return count
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet; returns whether it was cancelled"""
+        with self._lock:
+            count = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            ).rowcount
+            self._conn.commit()
+        return count == 1
+
+    def get(self, job_id):
+        with self._lock:
+            return self._job(self._select("WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status=None, limit=100):
+        """Most recent jobs first, optionally only those with ``status``"""
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        with self._lock:
+            rows = self._select(where, (*params, limit), "ORDER BY created_at DESC LIMIT ?").fetchall()
+        return [self._job(row) for row in rows]
+
+    def counts(self):
+        """Number of jobs per status"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in JOB_STATUSES} | dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
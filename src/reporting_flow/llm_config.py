@@ -1,7 +1,379 @@
+import copy
+import logging
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from functools import lru_cache
+
+import crewai.llm
 from crewai import LLM
-from .config import LLM_CONFIG
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.llm_events import (
+    LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent, LLMCallType,
+)
+from .budgets import output_token_limit
+from .cache import ResponseCache, make_cache_key
+from .config import HEDGE_CONFIG, LLM_CACHE_CONFIG, LLM_CONFIGS, LLM_ROUTES, LLM_STAND_IN_CONFIG
+from .deadlines import TaskDeadlineExceeded, call_with_deadline, remaining_seconds
+from .hedging import hedge_executor, hedge_stats, latency_tracker, submit
+from .offline import recorder, stand_in_model
+from .rate_limit import estimate_tokens, get_rate_limiter
+from .run_context import RunCancelled, check_run_cancelled
+from .streaming import GenerationAborted, completion_usage, token_sink
+
+logger = logging.getLogger("report_flow")
+
+# Sampling parameters that change the completion and therefore belong in the cache key
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens",
+    "presence_penalty", "frequency_penalty", "logit_bias", "seed", "reasoning_effort",
+)
+
+
+
+class SharedOutputFilter:
+    """Thread-safe replacement for crewai.llm.suppress_warnings, entered by every LLM.call.
+
+    crewAI swaps sys.stdout and sys.stderr for a FilteredStream (and the
+    warnings filters) on every call and puts back what it found on exit.
+    Concurrent calls put each other's streams back out of order, and free a
+    stream that print() in another thread still holds a borrowed reference
+    to, crashing the interpreter. Here the first call in flight installs the
+    filters and the last one removes them, and each FilteredStream is kept
+    for the life of the process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._saved = None
+        self._streams = {}
+
+    def _filtered(self, stream):
+        if id(stream) not in self._streams:
+            self._streams[id(stream)] = (stream, crewai.llm.FilteredStream(stream))
+        return self._streams[id(stream)][1]
+
+    @contextmanager
+    def __call__(self):
+        with self._lock:
+            if self._calls == 0:
+                self._saved = (sys.stdout, sys.stderr, warnings.filters[:])
+                sys.stdout, sys.stderr = self._filtered(sys.stdout), self._filtered(sys.stderr)
+                warnings.filterwarnings("ignore")
+            self._calls += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._calls -= 1
+                if self._calls == 0:
+                    sys.stdout, sys.stderr, warnings.filters[:] = self._saved
+
+
+crewai.llm.suppress_warnings = SharedOutputFilter()
+
+class ReportingLLM(LLM):
+    """LLM shared by the crews, with an optional persistent response cache
+    and a process-wide provider rate limiter.
+
+    Plain text completions are stored under a key made of the model name,
+    the messages and the sampling parameters, so a rerun with identical
+    prompts is answered from disk instead of the provider. Tool calls are
+    never cached because they have side effects. Calls that do reach the
+    provider wait for its requests/tokens per minute budget, are bounded by
+    the deadline of the task making them, and have their latency recorded
+    for hedging; calls of a cancelled run are refused. While a token sink
+    is set (see streaming.py) text completions are streamed to it, and a
+    streamed call past its task's deadline (or of a cancelled run) stops
+    reading (and paying for) the rest of the answer. The
+    output limit of the task and section being written (see budgets.py)
+    caps ``max_tokens``.
+    """
+
+    def __init__(self, *args, cache=None, rate_limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+
+    def cache_key(self, messages):
+        response_format = getattr(self.response_format, "__name__", self.response_format)
+        params = {name: getattr(self, name) for name in SAMPLING_PARAMS}
+        return make_cache_key(self.model, messages, params, response_format, self.additional_params)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        limit = output_token_limit()
+        if limit is not None and (self.max_tokens is None or limit < self.max_tokens):
+            # A copy, since the LLM is shared by every agent of its route
+            limited = copy.copy(self)
+            limited.max_tokens = limit
+            return limited.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+
+        if self.cache is None or tools or available_functions:
+            return self._call_provider(messages, tools, callbacks, available_functions)
+
+        key = self.cache_key(messages)
+        cached = self.cache.get(key)
+        if cached is not None:
+            sink = token_sink.get()
+            if sink is not None:
+                with sink.generation() as generation:
+                    generation.push(cached)
+            return cached
+
+        response = self._call_provider(messages, None, callbacks, None)
+        if isinstance(response, str) and response:
+            self.cache.set(key, response)
+        return response
+
+    def _call_provider(self, messages, tools, callbacks, available_functions):
+        """Send the call to the provider, within its rate limits when configured"""
+        def call():
+            check_run_cancelled()
+            started = time.monotonic()
+            sink = token_sink.get()
+            if sink is None or tools or available_functions:
+                response = super(ReportingLLM, self).call(
+                    messages, tools=tools, callbacks=callbacks, available_functions=available_functions
+                )
+            else:
+                response = self._stream_completion(messages, callbacks, sink)
+            latency = time.monotonic() - started
+            latency_tracker.record(self.model, latency)
+            if recorder is not None and isinstance(response, str):
+                recorder.record(self.model, messages, response, latency)
+            return response
+
+        def limited_call():
+            if self.rate_limiter is None:
+                return call()
+            return self.rate_limiter.run(call, estimate_tokens(messages))
+
+        return call_with_deadline(limited_call, f"a call to {self.model}")
+
+    def completion_params(self, messages, tools=None):
+        """Parameters of the litellm completion crewAI's LLM.call sends for ``messages``"""
+        return {name: value for name, value in {
+            "model": self.model, "messages": self._format_messages_for_provider(messages), "timeout": self.timeout,
+            "temperature": self.temperature, "top_p": self.top_p, "n": self.n, "stop": self.stop,
+            "max_tokens": self.max_tokens or self.max_completion_tokens, "presence_penalty": self.presence_penalty,
+            "frequency_penalty": self.frequency_penalty, "logit_bias": self.logit_bias,
+            "response_format": self.response_format, "seed": self.seed, "logprobs": self.logprobs,
+            "top_logprobs": self.top_logprobs, "api_base": self.api_base, "base_url": self.base_url,
+            "api_version": self.api_version, "api_key": self.api_key, "stream": False, "tools": tools,
+            "reasoning_effort": self.reasoning_effort, **self.additional_params,
+        }.items() if value is not None}
+
+    def _stream_completion(self, messages, callbacks, sink):
+        """Text completion streamed from the provider to the sink.
+
+        crewAI's LLM.call does not stream, so streamed completions are sent
+        to litellm here, with the messages, parameters, callbacks and events
+        of LLM.call (completion_params, which the tests check against the
+        request LLM.call sends).
+        """
+        crewai_event_bus.emit(self, event=LLMCallStartedEvent(messages=messages, callbacks=callbacks))
+        self._validate_call_params()
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        # Like LLM.call: o1 models take no system messages
+        if "o1" in self.model.lower():
+            for message in messages:
+                if message.get("role") == "system":
+                    message["role"] = "assistant"
+        if callbacks:
+            self.set_callbacks(callbacks)
+        # With the usage report of the last chunk
+        params = {**self.completion_params(messages), "stream": True, "stream_options": {"include_usage": True}}
+
+        try:
+            text = self._stream(params, callbacks, sink)
+        except Exception as e:
+            crewai_event_bus.emit(self, event=LLMCallFailedEvent(error=str(e)))
+            raise
+        crewai_event_bus.emit(self, event=LLMCallCompletedEvent(response=text, call_type=LLMCallType.LLM_CALL))
+        return text
+
+    def _stream(self, params, callbacks, sink):
+        """Text of a completion streamed from the provider, each delta pushed to the sink as it arrives"""
+        import litellm
+
+        usage = None
+        with sink.generation() as generation:
+            response = litellm.completion(**params)
+            try:
+                for chunk in response:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices:
+                        generation.push(chunk.choices[0].delta.content)
+                    remaining = remaining_seconds()
+                    if remaining is not None and remaining <= 0:
+                        raise TaskDeadlineExceeded(f"Task deadline passed while streaming from {self.model}")
+                    check_run_cancelled()
+            finally:
+                # An aborted stream is closed, so the provider stops generating
+                close = getattr(getattr(response, "completion_stream", None), "close", None)
+                if close is not None:
+                    close()
+                self._log_usage(callbacks, params, usage or completion_usage(params["messages"], generation.text))
+        return generation.text
+
+    @staticmethod
+    def _log_usage(callbacks, params, usage):
+        """Report the token usage of a call to crewAI's token counters"""
+        for callback in callbacks or []:
+            if hasattr(callback, "log_success_event"):
+                callback.log_success_event(kwargs=params, response_obj={"usage": usage}, start_time=0, end_time=0)
+
+
+class RoutedLLM(LLM):
+    """LLM of a route: a primary provider, then its fallbacks when a call fails or times out.
+
+    With ``race_after_seconds`` the first fallback is also called when the
+    primary has not answered in time. With ``hedge`` a slow call is
+    duplicated after the HEDGE_CONFIG percentile of the primary's latency.
+    Either way the first non-empty answer wins; provider calls cannot be
+    interrupted, so the slower call finishes in the background and its
+    answer is dropped and accounted for in ``hedge_stats``.
+    """
+
+    def __init__(self, candidates, race_after_seconds=None, hedge=False):
+        primary = candidates[0]
+        super().__init__(model=primary.model, api_key=primary.api_key, timeout=primary.timeout)
+        self.candidates = candidates
+        self.race_after_seconds = race_after_seconds
+        self.hedge = hedge
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        def attempt(candidate):
+            # Agents set their stop words on the LLM they were given
+            candidate.stop = self.stop
+            return candidate.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+
+        errors = []
+        start = 0
+        delay, duplicate = self._hedge_plan()
+        # Tool calls have side effects and are never duplicated, and the tokens of two
+        # streamed answers would interleave
+        if delay is not None and not (tools or available_functions) and token_sink.get() is None:
+            response, start = self._race(attempt, messages, delay, duplicate, errors)
+            if response:
+                return response
+
+        for candidate in self.candidates[start:]:
+            try:
+                return attempt(candidate)
+            except (TaskDeadlineExceeded, RunCancelled, GenerationAborted):
+                # No other provider can answer in time (or for this run) either
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ {candidate.model} failed ({e}), trying the next provider")
+                errors.append(e)
+        raise errors[-1]
+
+    def _hedge_plan(self):
+        """Delay after which a slow call is duplicated, and the LLM receiving the duplicate"""
+        if self.race_after_seconds is not None and len(self.candidates) > 1:
+            return self.race_after_seconds, self.candidates[1]
+        if self.hedge:
+            primary = self.candidates[0]
+            delay = latency_tracker.percentile(primary.model, HEDGE_CONFIG["percentile"], HEDGE_CONFIG["min_samples"])
+            delay = max(HEDGE_CONFIG["initial_delay_seconds"] if delay is None else delay,
+                        HEDGE_CONFIG["min_delay_seconds"])
+            if HEDGE_CONFIG["target"] == "fallback" and len(self.candidates) > 1:
+                return delay, self.candidates[1]
+            return delay, primary
+        return None, None
+
+    def _race(self, attempt, messages, delay, duplicate, errors):
+        """Call the primary, and ``duplicate`` too if the primary has not answered after ``delay``.
+
+        Returns the first non-empty answer (or None) and the index of the
+        first candidate that was not tried yet.
+        """
+        primary = self.candidates[0]
+        first = submit(hedge_executor, attempt, primary)
+        futures = {first: primary}
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            logger.info(f"🏁 {primary.model} has not answered after {delay:.1f}s, also calling {duplicate.model}")
+            hedge_stats.sent()
+            futures[submit(hedge_executor, attempt, duplicate)] = duplicate
+        # A duplicate sent to a fallback means that fallback has been tried
+        tried = 2 if len(futures) > 1 and duplicate is not primary else 1
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except (TaskDeadlineExceeded, RunCancelled, GenerationAborted):
+                    raise
+                except Exception as e:
+                    logger.warning(f"⚠️ {futures[future].model} failed ({e})")
+                    errors.append(e)
+                    continue
+                if response:
+                    if future is not first:
+                        hedge_stats.won()
+                    # Calls not started yet are cancelled, the others are left to finish
+                    for loser in pending:
+                        if not loser.cancel():
+                            loser.add_done_callback(
+                                lambda f, model=futures[loser].model: _account_dropped(f, model, messages))
+                    return response, tried
+        return None, tried
+
+
+def _account_dropped(future, model, messages):
+    """Record the cost of an answer that lost a race"""
+    if not future.cancelled() and future.exception() is None:
+        hedge_stats.wasted(model, messages, future.result())
+
+
+llm_cache = ResponseCache(
+    LLM_CACHE_CONFIG["path"],
+    ttl_seconds=LLM_CACHE_CONFIG["ttl_seconds"],
+    max_bytes=LLM_CACHE_CONFIG["max_bytes"],
+) if LLM_CACHE_CONFIG["enabled"] else None
+
+
+@lru_cache(maxsize=None)
+def provider_llm(provider, timeout=None):
+    """LLM of an entry of LLM_CONFIGS, sharing the response cache and the provider's rate limiter.
+
+    With the stand-in LLM enabled, its calls are answered by the stand-in
+    instead of the provider, past the same cache, rate limiter and deadlines.
+    """
+    config = LLM_CONFIGS[provider]
+    stand_in = LLM_STAND_IN_CONFIG["enabled"]
+    return ReportingLLM(
+        model=stand_in_model(provider) if stand_in else config["model"],
+        api_key="stand-in" if stand_in else config["api_key"],
+        timeout=timeout,
+        cache=llm_cache,
+        rate_limiter=get_rate_limiter(provider),
+    )
+
+
+@lru_cache(maxsize=None)
+def get_llm(agent_name="default"):
+    """LLM routed to an agent by LLM_ROUTES, with its fallback providers"""
+    route = LLM_ROUTES.get(agent_name, LLM_ROUTES["default"])
+    providers = [route["provider"]]
+    for provider in route.get("fallbacks", []):
+        # Providers without an API key could only fail
+        if provider not in providers and LLM_CONFIGS[provider]["api_key"]:
+            providers.append(provider)
+    candidates = [provider_llm(provider, route.get("timeout")) for provider in providers]
+    if len(candidates) == 1 and not HEDGE_CONFIG["enabled"]:
+        return candidates[0]
+    return RoutedLLM(candidates, race_after_seconds=route.get("race_after_seconds"), hedge=HEDGE_CONFIG["enabled"])
+
 
-llm = LLM(
-    model=LLM_CONFIG["model"],
-    api_key=LLM_CONFIG["api_key"]
-) 
\ No newline at end of file
+# LLM of the default route
+llm = get_llm()
@@ -2,53 +2,35 @@
 import os
 import asyncio
 import json
-import re
 import sys
+import argparse
 import logging
+import threading
+import time
 from datetime import datetime
-from langtrace_python_sdk import langtrace
-from pydantic import BaseModel
+from types import SimpleNamespace
 
 from crewai.flow.flow import Flow, listen, start
 
-from .crews.reporting_research.reporting_research_crew import ReportingResearchCrew
-from .crews.reporting_content_writer.reporting_content_writer_crew import ReportingContentWriterCrew
-from .config import REPORTING_FLOW_INPUT_VARIABLES
-
-# Create base output directories
-output_dir = "output"
-os.makedirs(output_dir, exist_ok=True)
-
-# Generate timestamp for this run to create unique folders
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-topic = REPORTING_FLOW_INPUT_VARIABLES.get("topic", "report").replace(" ", "_")
-audience = REPORTING_FLOW_INPUT_VARIABLES.get("audience_level", "general").replace(" ", "_")
-
-# Create run-specific directories
-run_dir = os.path.join(output_dir, f"{topic}_{audience}_{timestamp}")
-report_dir = os.path.join(run_dir, "report")
-sections_dir = os.path.join(run_dir, "sections")
-debug_dir = os.path.join(run_dir, "debug")
-
-os.makedirs(run_dir, exist_ok=True)
-os.makedirs(report_dir, exist_ok=True)
-os.makedirs(sections_dir, exist_ok=True)
-os.makedirs(debug_dir, exist_ok=True)
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(run_dir, "report_flow.log")),
-        logging.StreamHandler(sys.stdout)
-    ]
+from .artifacts import ArtifactStore
+from .budgets import ReportBudget, length_budget, limit_section_output, section_output_limits
+from .checkpoint import CheckpointStore
+from .config import (
+    CONTEXT_CONFIG, METRICS_CONFIG, PIPELINE_CONFIG, PIPELINE_PROFILES,
+    REPORTING_FLOW_INPUT_VARIABLES, RESEARCH_CONFIG, SECTION_CONCURRENCY, SECTION_STORE_CONFIG,
 )
-logger = logging.getLogger("report_flow")
-
-api_key = os.getenv('LANGTRACE_API_KEY')
+from .deadlines import TaskDeadlineExceeded, last_finished_output
+from .events import FlowEvents
+from .incremental import SECTIONS_FILE, PreviousRun, load_plan, sections_record
+from .metrics import RunMetrics
+from .rate_limit import estimate_tokens
+from .report_writer import StreamingReportWriter, section_content, section_filename, section_title
+from .research_context import ResearchIndex, research_questions
+from .section_reuse import SectionReuse
+from .run_context import RunContext, configure_logging, current_run_id, init_tracing, run_cancelled
+from .streaming import GenerationAborted, render_live
 
-langtrace.init(api_key=api_key)
+logger = logging.getLogger("report_flow")
 
 # Simplified callback function with correct signature
 def task_callback(task):
@@ -64,41 +46,264 @@ def step_callback(step_output):
 
 class ReportingFlow(Flow):
     input_variables = REPORTING_FLOW_INPUT_VARIABLES
+    section_concurrency = SECTION_CONCURRENCY
+    pipeline_profile = PIPELINE_CONFIG["profile"]
+
+    def __init__(self, input_variables=None, run_id=None, pipeline_profile=None, incremental_from=None,
+                 plan_path=None, stream_tokens=False, token_guard=None, **kwargs):
+        super().__init__(**kwargs)
+        if pipeline_profile is not None:
+            self.pipeline_profile = pipeline_profile
+        if input_variables is not None:
+            # Per-instance inputs, so that several reports can run in one process
+            self.input_variables = {**REPORTING_FLOW_INPUT_VARIABLES, **input_variables}
+        # Passing the id of an earlier run resumes it, reusing its completed steps
+        self.run_id = run_id
+        # Incremental runs reuse the unchanged sections of an earlier run; a plan file replaces the research
+        self.incremental_from = incremental_from
+        self.plan_path = plan_path
+        self.previous_run = None
+        # Files of the sections written in full, relative to the run directory, by section index
+        self.section_files = {}
+        # Directories, log file and checkpoints are created lazily when the flow is kicked off
+        self.run = None
+        self.checkpoints = None
+        self.section_reuse = None
+        self.artifacts = None
+        self.report_writer = None
+        self.metrics = None
+        # Output of the research task, and its index giving each section the parts it needs
+        self.research_text = ""
+        self.research_index = None
+        self.context_tokens = {}
+        # Completion tokens of the section writers, split across the sections when a report budget is set
+        self.report_budget = None
+        # Events for callers iterating over section_events(), with the streamed LLM tokens if asked
+        self.events = FlowEvents(stream_tokens=stream_tokens, token_guard=token_guard)
+        # Set when the flow is cancelled, so that its crews make no more LLM calls
+        self._cancelled = threading.Event()
+
+    async def kickoff_async(self, inputs=None):
+        """Create this run's context (directories, log file, tracing) and execute the flow"""
+        try:
+            return await self._kickoff_run(inputs)
+        except asyncio.CancelledError:
+            # The crews of the run go on in their threads: stop their LLM calls
+            self._cancelled.set()
+            raise
+        except Exception as e:
+            self.events.put({"type": "failed", "error": str(e)})
+            raise
+
+    async def _kickoff_run(self, inputs):
+        configure_logging()
+        init_tracing()
+        if self.incremental_from:
+            self.previous_run = PreviousRun(self.incremental_from)
+        self.run = RunContext.create(self.input_variables, run_id=self.run_id)
+        self.checkpoints = CheckpointStore(self.run.run_dir)
+        self.artifacts = ArtifactStore(self.run)
+        self.metrics = RunMetrics(self.run.run_id)
+        self.section_reuse = SectionReuse(self.run, self.checkpoints, self.artifacts, self.input_variables,
+                                          previous_run=self.previous_run)
+        token = current_run_id.set(self.run.run_id)
+        cancelled_token = run_cancelled.set(self._cancelled)
+        log_handler = self.run.open_log()
+        self.events.put({"type": "started", "run_id": self.run.run_id, "run_directory": self.run.run_dir})
+        try:
+            result = await super().kickoff_async(inputs)
+            if not (isinstance(result, dict) and "report_path" in result):
+                # crewAI logs a failing flow method and returns the last output instead of raising
+                raise RuntimeError("The flow stopped before the report was written, see the run log")
+            return result
+        finally:
+            await self._close_artifacts()
+            self._write_metrics()
+            RunContext.close_log(log_handler)
+            run_cancelled.reset(cancelled_token)
+            current_run_id.reset(token)
+
+    async def _close_artifacts(self):
+        """Wait for the files of this run still being written"""
+        try:
+            await self.artifacts.close()
+        except Exception as e:
+            logger.error(f"❌ Could not write all files of the run: {e}")
+
+    def _write_metrics(self):
+        """Write this run's metrics, with the process-wide cache and rate limiter stats"""
+        from .llm_config import llm_cache
+        from .hedging import hedge_stats
+        from .rate_limit import rate_limiter_stats
+        try:
+            self.metrics.write(self.run.run_dir, openmetrics=METRICS_CONFIG["openmetrics"], extra={
+                "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+                "rate_limiters": rate_limiter_stats(),
+                "pipeline_profile": self.pipeline_profile,
+                "hedging": hedge_stats.stats(),
+                "artifacts": self.artifacts.stats,
+                "research_context": {
+                    "compaction": self.research_index is not None,
+                    "research_tokens": self.research_index.tokens if self.research_index else None,
+                    "chunks": len(self.research_index.chunks) if self.research_index else None,
+                    "section_tokens": self.context_tokens,
+                },
+                "report_budget": self.report_budget.stats() if self.report_budget is not None else None,
+                "section_store": self.section_reuse.stats(),
+                "incremental": {
+                    "from": self.incremental_from,
+                    "reused_sections": self.section_reuse.reused_sections,
+                } if self.previous_run is not None else None,
+            })
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write run metrics: {e}")
+
+    def section_events(self):
+        """Yield the progress events of the flow while it is running.
+
+        Iterate concurrently with ``kickoff_async``. The run yields a
+        ``started`` event once its directory exists and a ``planned`` event
+        with the number of sections once the plan is known; every section
+        appended to (or skipped from) the report, in report order, yields a
+        ``section`` event (its file may still be being written). The
+        iteration ends with a ``report`` event, or a ``failed`` event if the
+        flow raised.
+
+        With ``stream_tokens`` every streamed delta of an LLM call also
+        yields a ``token`` event with its ``section`` number (None for the
+        research), ``stage`` (task name), ``call`` id and ``delta``, and the
+        end of each call a ``generation`` event with its ``status``
+        (completed, aborted or failed) and ``tokens``. Token events are
+        only queued while an iteration is running, so a run nobody watches
+        does not keep one per token.
+        """
+        return self.events.iterate()
+
+    def abort_generation(self, section=None):
+        """Abort the LLM call streaming for a section (None = the research) at its next token.
+
+        The task making the call fails without generating again: the section
+        keeps the output of its last finished task, if any, like a section
+        past a task deadline, or is skipped. Only has an effect with
+        ``stream_tokens``.
+        """
+        self.events.abort(section)
 
     @start()
     async def generate_researched_content(self):
         """Initial research phase to gather up-to-date information on the topic"""
+        if self.plan_path:
+            sections = load_plan(self.plan_path)
+            if self.previous_run is not None:
+                self.research_text = self.previous_run.research_text()
+            logger.info(f"📋 Using the {len(sections)} sections of the plan {self.plan_path} instead of researching")
+            return SimpleNamespace(sections=sections)
+
         logger.info(f"🔍 Starting research on topic: {self.input_variables.get('topic')}")
         
-        # Create the research crew (no need for manager_llm in sequential mode)
-        research_crew = ReportingResearchCrew().crew()
-        
-        # The CrewAI framework handles these callbacks
-        result = await research_crew.kickoff_async(self.input_variables)
+        from .crews.reporting_research.reporting_research_crew import ReportingPlan, research_pool
+
+        checkpoint = self.checkpoints.load("research", self.input_variables)
+        if checkpoint is not None:
+            logger.info("♻️ Reusing checkpointed research plan")
+            self.research_text = checkpoint.get("research", "")
+            plan = checkpoint["pydantic"]
+            return SimpleNamespace(
+                raw=checkpoint["raw"],
+                pydantic=ReportingPlan.model_validate(plan) if plan else None,
+            )
+
+        if RESEARCH_CONFIG["mode"] == "parallel":
+            with self.events.token_stream():
+                result = await self._parallel_research()
+        else:
+            # Reuse an idle research crew of this process (no need for manager_llm in sequential mode)
+            with research_pool.checkout() as research_crew, self.metrics.crew_run("research", research_crew), \
+                    self.events.token_stream():
+                result = await research_crew.kickoff_async(self.input_variables)
+            research_output = next((output for output in getattr(result, "tasks_output", None) or []
+                                    if output.name == "research_task"), None)
+            self.research_text = str(research_output.raw) if research_output is not None else ""
         
         # Log result details to help with debugging
-        logger.info(f"📝 Research result type: {type(result)}")
-        logger.info(f"📝 Research result attributes: {dir(result)}")
+        logger.debug(f"📝 Research result type: {type(result)}")
+        logger.debug(f"📝 Research result attributes: {dir(result)}")
         
         # Try to access the raw and pydantic attributes
         if hasattr(result, 'raw'):
-            logger.info(f"📝 Result raw type: {type(result.raw)}")
-            raw_preview = str(result.raw)[:500] + "..." if len(str(result.raw)) > 500 else str(result.raw)
-            logger.info(f"📝 Result raw preview: {raw_preview}")
+            if logger.isEnabledFor(logging.DEBUG):
+                raw_preview = str(result.raw)[:500] + "..." if len(str(result.raw)) > 500 else str(result.raw)
+                logger.debug(f"📝 Result raw preview: {raw_preview}")
             
-            # Save the raw output to a file for inspection
-            with open(os.path.join(debug_dir, "research_output_raw.txt"), "w") as f:
-                f.write(str(result.raw))
+            # Save the raw output for inspection
+            self.artifacts.debug("research_output_raw.txt", str(result.raw), level="summary")
         
-        if hasattr(result, 'pydantic'):
-            logger.info(f"📝 Result pydantic type: {type(result.pydantic)}")
-            if hasattr(result.pydantic, 'sections'):
-                logger.info(f"📝 Number of sections in pydantic: {len(result.pydantic.sections)}")
-                logger.info(f"📝 Sections: {result.pydantic.sections}")
+        if hasattr(result, 'pydantic') and hasattr(result.pydantic, 'sections'):
+            logger.info(f"📝 Number of sections in pydantic: {len(result.pydantic.sections)}")
+            logger.debug(f"📝 Sections: {result.pydantic.sections}")
         
+        plan = getattr(result, 'pydantic', None)
+        # Saved by the writer thread, like the files the later checkpoints point to
+        self.artifacts.submit(self.checkpoints.save, "research", self.input_variables, {
+            "raw": str(getattr(result, 'raw', '')),
+            "research": self.research_text,
+            "pydantic": plan.model_dump() if hasattr(plan, 'model_dump') else None,
+        })
         return result
 
+    async def _parallel_research(self):
+        """Research sub-questions of the topic concurrently, then plan the report from their merged findings"""
+        from .crews.reporting_research.reporting_research_crew import research_stage_pools
+        from .research_context import merge_findings
+
+        subtopics = max(1, RESEARCH_CONFIG["subtopics"])
+        with research_stage_pools["decomposition_task"].checkout() as crew, \
+                self.metrics.crew_run("research_decomposition", crew):
+            decomposition = await crew.kickoff_async({**self.input_variables, "subtopics": subtopics})
+        questions = research_questions(decomposition, subtopics)
+        if not questions:
+            logger.warning("⚠️ The topic could not be broken down into sub-questions, researching it as a whole")
+            questions = [f"What does a report on {self.input_variables.get('topic')} need to cover?"]
+
+        concurrency = max(1, RESEARCH_CONFIG["concurrency"])
+        logger.info(f"🔀 Researching {len(questions)} sub-questions, {concurrency} at a time")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def research(question):
+            async with semaphore:
+                with research_stage_pools["subtopic_research_task"].checkout() as crew, \
+                        self.metrics.crew_run("research", crew):
+                    result = await crew.kickoff_async({**self.input_variables, "question": question})
+            return question, str(result.raw)
+
+        outcomes = await asyncio.gather(*(research(question) for question in questions), return_exceptions=True)
+        findings = []
+        for question, outcome in zip(questions, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"⚠️ Research of the sub-question {question!r} failed: {outcome}")
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                findings.append(outcome)
+        if not findings:
+            raise RuntimeError("The research of every sub-question failed")
+
+        self.research_text, sources = merge_findings(findings)
+        logger.info(f"🔀 Merged the findings of {len(findings)} researchers ({sources} distinct sources)")
+        with research_stage_pools["merged_planning_task"].checkout() as crew, \
+                self.metrics.crew_run("research_planning", crew):
+            return await crew.kickoff_async({**self.input_variables, "research": self.research_text})
+
     @listen(generate_researched_content)
+    async def compact_research_context(self, plan):
+        """Index the research output, so that each section's writer only gets the parts relevant to it"""
+        if CONTEXT_CONFIG["compaction"]:
+            self.research_index = ResearchIndex(self.research_text)
+            logger.info(f"🗜️ Research output indexed: {self.research_index.tokens} tokens "
+                        f"in {len(self.research_index.chunks)} chunks")
+        return plan
+
+    @listen(compact_research_context)
     async def generate_reporting_content(self, plan):
         """Writing phase that creates high-quality content based on research"""
         # Extract sections from the plan, considering different data formats
@@ -114,211 +319,236 @@ class ReportingFlow(Flow):
             logger.info("📋 Found sections in plan.pydantic")
             sections = plan.pydantic.sections
         elif hasattr(plan, 'raw'):
-            logger.info("📋 Attempting to extract sections from raw data")
-            # Try to parse from raw JSON
+            logger.info("📋 Extracting sections from raw data")
+            from .plan_parser import PlanParseError, parse_plan
             try:
-                # First try direct JSON parsing
-                data = json.loads(plan.raw)
-                if 'sections' in data:
-                    logger.info("📋 Found sections in parsed JSON")
-                    sections = data['sections']
-            except Exception as e:
-                logger.info(f"📋 Error parsing JSON directly: {e}")
-                # If that fails, try extracting JSON from possibly multiline text
-                json_match = re.search(r'\{.*\}', plan.raw, re.DOTALL)
-                if json_match:
-                    try:
-                        logger.info("📋 Attempting to parse JSON from regex match")
-                        data = json.loads(json_match.group(0))
-                        if 'sections' in data:
-                            logger.info("📋 Found sections in regex-matched JSON")
-                            sections = data['sections']
-                    except Exception as e:
-                        logger.info(f"📋 Error parsing JSON from regex match: {e}")
+                parsed = parse_plan(plan.raw)
+            except PlanParseError as e:
+                # Fail instead of writing an empty report; resuming the run redoes the research
+                self.artifacts.submit(self.checkpoints.discard, "research")
+                logger.error(f"❌ {e}. Resume this run to redo the research step.")
+                raise
+            sections = parsed.sections
+            if parsed.issues:
+                logger.warning(f"⚠️ Plan extracted from raw output with issues: {', '.join(parsed.issues)}")
         
         logger.info(f"📝 Starting content creation for {len(sections)} sections")
         
-        # Save the sections to a file for inspection
-        with open(os.path.join(debug_dir, "sections_data.json"), "w") as f:
-            json.dump(sections if isinstance(sections, list) else [str(sections)], f, indent=2, default=str)
-        
-        final_content = []
-        section_files = []  # Keep track of individual section files
-        
-        for i, section in enumerate(sections):
-            try:
-                title = section.get('title', f"Section {i+1}") if isinstance(section, dict) else getattr(section, 'title', f"Section {i+1}")
-                
-                # Create safe filename from title
-                safe_title = re.sub(r'[^\w\-_.]', '_', title)
-                
-                logger.info(f"📋 Processing section {i+1}: {title}")
-                
-                # Prepare inputs for the content writer crew
-                writer_inputs = self.input_variables.copy()
-                
-                # Handle different section data formats
-                if hasattr(section, 'model_dump_json'):
-                    logger.info(f"📋 Section {i+1} has model_dump_json method")
-                    writer_inputs['section'] = section.model_dump_json()
-                elif isinstance(section, dict):
-                    logger.info(f"📋 Section {i+1} is a dictionary")
-                    writer_inputs['section'] = json.dumps(section)
-                else:
-                    logger.info(f"📋 Section {i+1} is type {type(section)}")
-                    writer_inputs['section'] = str(section)
-                
-                # Save the section input for debugging
-                with open(os.path.join(debug_dir, f"section_{i+1}_input.json"), "w") as f:
-                    json.dump(writer_inputs, f, indent=2, default=str)
-                
-                # Let the framework handle the execution
-                content_crew = ReportingContentWriterCrew().crew()
-                section_result = await content_crew.kickoff_async(writer_inputs)
-                
-                logger.info(f"📋 Section {i+1} result type: {type(section_result)}")
-                
-                # Try multiple ways to extract content from the result
-                content = None
-                
-                # Try common result formats
-                if hasattr(section_result, 'raw'):
-                    logger.info(f"📋 Section {i+1} has raw attribute with length {len(str(section_result.raw))}")
-                    content = section_result.raw
-                elif hasattr(section_result, 'output'):
-                    logger.info(f"📋 Section {i+1} has output attribute")
-                    content = section_result.output
-                elif hasattr(section_result, 'result'):
-                    logger.info(f"📋 Section {i+1} has result attribute")
-                    content = section_result.result
-                else:
-                    # If all else fails, convert to string
-                    logger.info(f"📋 Section {i+1} converted to string")
-                    content = str(section_result)
-                
-                # Check if content is a dictionary and handle appropriately
-                if isinstance(content, dict) and 'content' in content:
-                    content = content['content']
-                
-                # Save the section output for debugging
-                debug_output_path = os.path.join(debug_dir, f"section_{i+1}_output.txt")
-                with open(debug_output_path, "w") as f:
-                    f.write(str(content))
-                
-                # Save the section to its own file in the sections directory
-                if content and str(content).strip():
-                    section_filename = f"{i+1:02d}_{safe_title}.md"
-                    section_path = os.path.join(sections_dir, section_filename)
-                    with open(section_path, "w") as f:
-                        f.write(str(content))
-                    
-                    # Add to our tracking lists
-                    final_content.append(content)
-                    section_files.append(section_path)
-                    logger.info(f"✅ Added non-empty content for section {i+1} and saved to {section_path}")
-                else:
-                    logger.warning(f"⚠️ Section {i+1} produced empty content")
-                
-                logger.info(f"✅ Completed section {i+1}")
-            except Exception as e:
-                logger.error(f"Error processing section {i+1}: {e}", exc_info=True)
-        
-        logger.info(f"📊 Generated {len(final_content)} content sections")
+        # The report is assembled on disk, in order, while sections complete
+        self.report_writer = StreamingReportWriter(
+            self.run,
+            self.artifacts,
+            self.input_variables.get("topic", "report"),
+            self.input_variables.get("audience_level", "general"),
+            [section_title(i, section) for i, section in enumerate(sections)],
+            on_event=self.events.put,
+        )
+        self.events.put({"type": "planned", "sections": len(sections)})
+        self.report_budget = ReportBudget.for_sections(sections)
+
+        # Write sections concurrently, bounded by the configured limit
+        semaphore = asyncio.Semaphore(max(1, self.section_concurrency))
+        logger.info(f"📋 Writing sections with concurrency limit {self.section_concurrency}")
+
+        async def write_with_limit(i, section):
+            queued = time.perf_counter()
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    return await self._write_section(i, section)
+                finally:
+                    if self.report_budget is not None and i + 1 not in self.report_budget.sections:
+                        # Reused (or failed before writing): its share goes to the other sections
+                        self.report_budget.settle(i, 0)
+                    self.metrics.record_section(i + 1, section_title(i, section),
+                                                queue_seconds=started - queued,
+                                                wall_seconds=time.perf_counter() - started)
+
+        await asyncio.gather(*(write_with_limit(i, section) for i, section in enumerate(sections)))
+        if self.previous_run is not None:
+            logger.info(f"♻️ Reused {self.section_reuse.reused_sections} of {len(sections)} sections "
+                        f"from run {self.previous_run.run_id}")
+
+        # The plan with the hash and file of every section: the base of incremental runs, and editable for --plan
+        self.artifacts.write(os.path.join(self.run.run_dir, SECTIONS_FILE), json.dumps(sections_record(
+            self.input_variables.get("topic"), self.input_variables.get("audience_level"), sections,
+            self.section_files,
+        ), indent=2, default=str))
+
+        section_files = self.report_writer.section_files
+        logger.info(f"📊 Generated {len(section_files)} content sections")
         return {
-            "content": final_content,
             "section_files": section_files
         }
 
-    @listen(generate_reporting_content)
-    async def save_to_markdown(self, result):
-        """Save the final report to a markdown file"""
-        content = result["content"] if isinstance(result, dict) and "content" in result else result
-        section_files = result.get("section_files", []) if isinstance(result, dict) else []
-        
-        topic = self.input_variables.get("topic", "report")
-        audience_level = self.input_variables.get("audience_level", "general")
-        file_name = f"{topic}_{audience_level}.md".replace(" ", "_")
-        report_path = os.path.join(report_dir, file_name)
-        
-        logger.info(f"💾 Saving report with {len(content)} sections to {report_path}")
-        logger.info(f"Content types: {[type(item) for item in content]}")
-        
-        # Debug the content before writing
-        for i, section_content in enumerate(content):
-            logger.info(f"Section {i+1} content length: {len(str(section_content))}")
-            # Save each section to a debug file
-            with open(os.path.join(debug_dir, f"final_section_{i+1}.txt"), "w") as f:
-                f.write(str(section_content))
-        
-        # Create a fallback default content if empty
-        if not content or all(not str(item).strip() for item in content):
-            logger.warning("❌ No content to write! Using fallback content.")
-            fallback_content = [
-                f"# Report on {topic} for {audience_level} audience\n\n"
-                "This report could not be generated properly. Please check the logs."
-            ]
-            content = fallback_content
-        
-        # Create a table of contents based on section files
-        toc = ["# Table of Contents\n"]
-        for i, section_file in enumerate(section_files):
-            section_name = os.path.basename(section_file).split("_", 1)[1].replace(".md", "")
-            section_rel_path = os.path.relpath(section_file, os.path.dirname(report_path))
-            toc.append(f"{i+1}. [{section_name}]({section_rel_path})")
-        
-        # Write to the final file, including the table of contents
-        with open(report_path, "w") as f:
-            # Add title and TOC
-            f.write(f"# Report: {topic} ({audience_level} audience)\n\n")
+    async def _write_section(self, i, section):
+        """Write a single section with the content writer crew.
+
+        The section is handed to the report writer once done, or marked as
+        skipped when it failed or produced empty content. Errors are logged
+        and isolated so that one failing section does not abort the others.
+        """
+        try:
+            title = section_title(i, section)
             
-            # Add table of contents if we have sections
-            if section_files:
-                f.write("\n".join(toc))
-                f.write("\n\n---\n\n")
+            logger.info(f"📋 Processing section {i+1}: {title}")
             
-            # Add executive summary if available
-            if hasattr(result, 'executive_summary') or (isinstance(result, dict) and 'executive_summary' in result):
-                summary = result.executive_summary if hasattr(result, 'executive_summary') else result.get('executive_summary', '')
-                f.write(f"## Executive Summary\n\n{summary}\n\n---\n\n")
+            # Prepare inputs for the content writer crew
+            writer_inputs = self.input_variables.copy()
             
-            # Add each section content
-            for section in content:
-                section_text = str(section).strip()
-                if section_text:  # Only write non-empty sections
-                    f.write(section_text)
-                    f.write("\n\n")
-                else:
-                    logger.warning("Skipping empty section")
-        
-        logger.info(f"📊 Report saved to {report_path}")
-        
-        # Create an index.md file that points to the report
-        index_path = os.path.join(run_dir, "index.md")
-        with open(index_path, "w") as f:
-            f.write(f"# Report: {topic} ({audience_level})\n\n")
-            f.write(f"- [Full Report]({os.path.relpath(report_path, run_dir)})\n")
-            f.write("## Sections\n\n")
-            for i, section_file in enumerate(section_files):
-                section_name = os.path.basename(section_file).split("_", 1)[1].replace(".md", "")
-                section_rel_path = os.path.relpath(section_file, run_dir)
-                f.write(f"{i+1}. [{section_name}]({section_rel_path})\n")
-        
-        logger.info(f"📄 Index created at {index_path}")
-        return {
-            "report_path": report_path,
-            "index_path": index_path,
-            "run_directory": run_dir
-        }
+            # Handle different section data formats
+            if hasattr(section, 'model_dump_json'):
+                logger.debug(f"📋 Section {i+1} has model_dump_json method")
+                writer_inputs['section'] = section.model_dump_json()
+            elif isinstance(section, dict):
+                logger.debug(f"📋 Section {i+1} is a dictionary")
+                writer_inputs['section'] = json.dumps(section)
+            else:
+                logger.debug(f"📋 Section {i+1} is type {type(section)}")
+                writer_inputs['section'] = str(section)
+
+            # The research this section needs, or all of it when compaction is disabled
+            if self.research_index is not None:
+                writer_inputs['research_context'] = self.research_index.context_for(section)
+            else:
+                writer_inputs['research_context'] = self.research_text
+            self.context_tokens[i + 1] = estimate_tokens(writer_inputs['research_context'])
+            
+            # Save the section input for debugging
+            self.artifacts.debug_json(f"section_{i+1}_input.json", writer_inputs)
+            
+            # Sections written before (by an earlier attempt, the base run or another report) are not written again
+            checkpoint_inputs = {**writer_inputs, "pipeline_profile": self.pipeline_profile}
+            earlier = await self.section_reuse.find(i, section, checkpoint_inputs)
+            profile = self.pipeline_profile
+            writer_inputs['similar_draft'] = ""
+            if earlier is not None and earlier.draft:
+                writer_inputs['similar_draft'] = earlier.content
+                profile = SECTION_STORE_CONFIG["seed_profile"] or profile
+            elif earlier is not None:
+                self._reuse_section(i, title, earlier, checkpoint_inputs)
+                return
+
+            from .crews.reporting_content_writer.reporting_content_writer_crew import content_writer_pools
+
+            # The section's share of the report budget, spread over the calls of its pipeline
+            section_limit, output_limit = section_output_limits(profile, self.report_budget, i)
+            writer_inputs['length_budget'] = length_budget(output_limit)
+
+            # Let the framework handle the execution, on a crew no other section is using
+            kickoff_started = datetime.now()
+            degraded = False
+            try:
+                with content_writer_pools[profile].checkout() as content_crew, \
+                        self.metrics.crew_run("content_writer", content_crew, section=i + 1), \
+                        self.events.token_stream(i + 1), limit_section_output(section_limit, output_limit):
+                    section_result = await content_crew.kickoff_async(writer_inputs)
+            except (TaskDeadlineExceeded, GenerationAborted) as e:
+                # Keep the last draft finished before the deadline or abort rather than losing the section
+                section_result = last_finished_output(content_crew, kickoff_started)
+                if section_result is None:
+                    raise
+                degraded = True
+                reason = "was aborted" if isinstance(e, GenerationAborted) else "hit a task deadline"
+                logger.warning(f"⏰ Section {i+1} {reason} ({e}); using the output of {section_result.name} instead")
+            finally:
+                if self.report_budget is not None:
+                    self.report_budget.settle(i, self.metrics.section_completion_tokens(i + 1))
+            
+            logger.debug(f"📋 Section {i+1} result type: {type(section_result)}")
+            content = section_content(section_result)
+            logger.info(f"✅ Completed section {i+1}")
+            
+            # Save the section to its own file in the sections directory
+            if content and str(content).strip():
+                section_path = os.path.join(self.run.sections_dir, section_filename(i, title))
+                self.artifacts.write(section_path, str(content))
+                # Degraded sections are not checkpointed, so that resuming the run redoes them
+                if not degraded:
+                    self.artifacts.submit(self.checkpoints.save, f"section_{i+1}", checkpoint_inputs, {
+                        "section_path": os.path.relpath(section_path, self.run.run_dir)
+                    })
+                    self.section_files[i] = os.path.relpath(section_path, self.run.run_dir)
+                    self.section_reuse.remember(section, str(content))
+                logger.info(f"✅ Added non-empty content for section {i+1} and saved to {section_path}")
+                # Written after the section file, so it is a link to it when the contents match
+                self.artifacts.debug(f"section_{i+1}_output.txt", str(content))
+                self.report_writer.add(i, content, section_path)
+                return
+            
+            self.artifacts.debug(f"section_{i+1}_output.txt", str(content))
+            logger.warning(f"⚠️ Section {i+1} produced empty content")
+        except GenerationAborted as e:
+            logger.warning(f"✋ Section {i+1} skipped: {e}")
+        except Exception as e:
+            logger.error(f"Error processing section {i+1}: {e}", exc_info=True)
+        self.report_writer.skip(i)
+
+    def _reuse_section(self, i, title, earlier, checkpoint_inputs):
+        """Add a section written before to this run's sections and report"""
+        section_path = earlier.section_path
+        if section_path is None:
+            # Written by another run: copied to this run's sections and checkpointed like a new one
+            section_path = os.path.join(self.run.sections_dir, section_filename(i, title))
+            self.artifacts.write(section_path, earlier.content)
+            self.artifacts.submit(self.checkpoints.save, f"section_{i+1}", checkpoint_inputs, {
+                "section_path": os.path.relpath(section_path, self.run.run_dir)
+            })
+        self.section_files[i] = os.path.relpath(section_path, self.run.run_dir)
+        self.report_writer.add(i, earlier.content, section_path)
+
+    @listen(generate_reporting_content)
+    async def save_to_markdown(self, result):
+        """Complete the report that was assembled while the sections were written"""
+        logger.info(f"💾 Finishing report with {len(result.get('section_files', []))} sections")
+        return await self.report_writer.finish()
 
 async def kickoff_async():
     """Execute the reporting flow asynchronously"""
     reporting_flow = ReportingFlow()
     return await reporting_flow.kickoff_async()
 
-def kickoff():
-    """Execute the reporting flow synchronously by running the async version in an event loop"""
-    logger.info("🚀 Starting the report generation flow")
-    reporting_flow = ReportingFlow()
+async def kickoff_live(reporting_flow):
+    """Execute the flow while drawing its live progress, from its streamed tokens, on stderr"""
+    view = asyncio.ensure_future(render_live(reporting_flow.section_events()))
+    try:
+        return await reporting_flow.kickoff_async()
+    finally:
+        await view
+
+def kickoff(run_id=None, pipeline_profile=None, incremental_from=None, plan_path=None, live=False):
+    """Execute the reporting flow synchronously by running the async version in an event loop.
+
+    Pass ``run_id`` (or ``--resume RUN_ID`` on the command line) to resume an
+    earlier run in ``output/RUN_ID`` instead of starting a new one, and
+    ``pipeline_profile`` (or ``--profile``) to pick the content writer
+    pipeline of the sections (see ``PIPELINE_PROFILES`` in config.py).
+    ``incremental_from`` (or ``--incremental RUN_ID``) reuses the sections of
+    an earlier run whose plan entry and audience are unchanged, and
+    ``plan_path`` (or ``--plan``) writes the sections of a plan file, such as
+    an edited sections_data.json, instead of researching a new plan.
+    ``live`` (or ``--live``) streams the LLM tokens and shows the progress
+    of each section as it is generated; the console then only logs warnings.
+    """
+    parser = argparse.ArgumentParser(prog="kickoff", description="Generate a report")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume the run in output/RUN_ID")
+    parser.add_argument("--profile", choices=list(PIPELINE_PROFILES), help="Content writer pipeline profile")
+    parser.add_argument("--incremental", metavar="RUN_ID",
+                        help="Reuse the unchanged sections of the run in output/RUN_ID")
+    parser.add_argument("--plan", metavar="PATH", help="Write the sections of this plan instead of researching one")
+    parser.add_argument("--live", action="store_true", help="Show the sections being generated, token by token")
+    args = parser.parse_known_args(sys.argv[1:])[0]
+    run_id = run_id or args.resume
+    pipeline_profile = pipeline_profile or args.profile
+    incremental_from = incremental_from or args.incremental
+    plan_path = plan_path or args.plan
+    live = live or args.live
+    configure_logging(console_level=logging.WARNING if live else logging.INFO)
+    logger.info("🚀 Starting the report generation flow" + (f" (resuming {run_id})" if run_id else "")
+                + (f" (incremental from {incremental_from})" if incremental_from else ""))
+    reporting_flow = ReportingFlow(run_id=run_id, pipeline_profile=pipeline_profile,
+                                   incremental_from=incremental_from, plan_path=plan_path, stream_tokens=live)
+    logger.info(f"🛠️ Pipeline profile: {reporting_flow.pipeline_profile}")
     try:
         loop = asyncio.get_event_loop()
     except RuntimeError:
@@ -326,9 +556,17 @@ def kickoff():
         asyncio.set_event_loop(loop)
     
     try:
-        result = loop.run_until_complete(reporting_flow.kickoff_async())
+        result = loop.run_until_complete(
+            kickoff_live(reporting_flow) if live else reporting_flow.kickoff_async())
         logger.info("✅ Report generation completed successfully")
-        logger.info(f"📂 Results are in: {run_dir}")
+        logger.info(f"📂 Results are in: {reporting_flow.run.run_dir}")
+        from .llm_config import llm_cache
+        from .hedging import hedge_stats
+        from .rate_limit import rate_limiter_stats
+        if llm_cache is not None:
+            logger.info(f"💾 LLM cache: {llm_cache.stats()}")
+        logger.info(f"⏳ LLM rate limiters: {rate_limiter_stats()}")
+        logger.info(f"🏁 LLM hedging: {hedge_stats.stats()}")
         if isinstance(result, dict) and "run_directory" in result:
             print(f"Report generated in: {result['run_directory']}")
         return result
@@ -0,0 +1,182 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.flow_events import (
+    MethodExecutionFailedEvent,
+    MethodExecutionFinishedEvent,
+    MethodExecutionStartedEvent,
+)
+
+from .config import LLM_CONFIGS
+
+USAGE_FIELDS = ("successful_requests", "prompt_tokens", "completion_tokens", "cached_prompt_tokens")
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of the tokens, from the prices configured in LLM_CONFIGS"""
+    for config in LLM_CONFIGS.values():
+        prices = config.get("price_per_million_tokens")
+        if config["model"] == model and prices:
+            return (prompt_tokens * prices["prompt"] + completion_tokens * prices["completion"]) / 1_000_000
+    return 0.0
+
+
+def _usage(agent):
+    token_process = getattr(agent, "_token_process", None)
+    if token_process is None:
+        return dict.fromkeys(USAGE_FIELDS, 0)
+    summary = token_process.get_summary()
+    return {field: getattr(summary, field, 0) for field in USAGE_FIELDS}
+
+
+
+def label_value(value):
+    """An OpenMetrics label value: run ids come from topics, which may hold quotes and backslashes"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class RunMetrics:
+    """Wall time, queue time, LLM calls, tokens and estimated cost of one run.
+
+    Flow stages are timed from crewai's flow method events, crew runs with
+    ``crew_run`` and sections with ``record_section``. crewai tracks token
+    usage per agent, so each task is credited with the usage of its agent
+    during the crew run (every agent performs a single task in our crews).
+    """
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.crews = []
+        self.sections = []
+        self._stage_starts = {}
+
+    def start_stage(self, name):
+        self._stage_starts[name] = time.perf_counter()
+
+    def end_stage(self, name, status="completed"):
+        started = self._stage_starts.pop(name, None)
+        if started is not None:
+            self.stages[name] = {"wall_seconds": round(time.perf_counter() - started, 3), "status": status}
+
+    @contextmanager
+    def crew_run(self, crew_name, crew, section=None):
+        """Measure one crew kickoff and the token usage of each of its tasks"""
+        agents = getattr(crew, "agents", None) or []
+        before = {id(agent): _usage(agent) for agent in agents}
+        started = time.perf_counter()
+        status = "completed"
+        try:
+            yield
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            record = {"crew": crew_name, "section": section, "status": status,
+                      "wall_seconds": round(time.perf_counter() - started, 3), "tasks": []}
+            record.update(dict.fromkeys(USAGE_FIELDS, 0), cost_usd=0.0)
+            for task in getattr(crew, "tasks", None) or []:
+                agent = task.agent
+                after = _usage(agent)
+                usage = {field: after[field] - before.get(id(agent), {}).get(field, 0) for field in USAGE_FIELDS}
+                model = getattr(getattr(agent, "llm", None), "model", None)
+                cost = estimate_cost(model, usage["prompt_tokens"], usage["completion_tokens"])
+                record["tasks"].append({
+                    "task": task.name,
+                    "agent": str(getattr(agent, "role", "")).strip(),
+                    "model": model,
+                    "wall_seconds": task.execution_duration,
+                    **usage,
+                    "cost_usd": round(cost, 6),
+                })
+                for field in USAGE_FIELDS:
+                    record[field] += usage[field]
+                record["cost_usd"] = round(record["cost_usd"] + cost, 6)
+            self.crews.append(record)
+
+    def section_completion_tokens(self, section):
+        """Completion tokens of the crew runs of a section (1-based)"""
+        return sum(crew["completion_tokens"] for crew in self.crews if crew["section"] == section)
+
+    def record_section(self, index, title, queue_seconds, wall_seconds):
+        self.sections.append({
+            "section": index,
+            "title": title,
+            "queue_seconds": round(queue_seconds, 3),
+            "wall_seconds": round(wall_seconds, 3),
+        })
+
+    def to_dict(self):
+        totals = {field: sum(crew[field] for crew in self.crews) for field in USAGE_FIELDS}
+        totals["cost_usd"] = round(sum(crew["cost_usd"] for crew in self.crews), 6)
+        totals["wall_seconds"] = round(time.perf_counter() - self.started, 3)
+        return {
+            "run_id": self.run_id,
+            "totals": totals,
+            "stages": self.stages,
+            "sections": sorted(self.sections, key=lambda s: s["section"]),
+            "crews": self.crews,
+        }
+
+    def to_openmetrics(self):
+        """Render the metrics in the Prometheus/OpenMetrics text format"""
+        data = self.to_dict()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{label_value(value)}"'
+                                      for key, value in {"run": self.run_id, **labels}.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        metric("reporting_run_wall_seconds", "Wall time of the run", [({}, data["totals"]["wall_seconds"])])
+        metric("reporting_stage_wall_seconds", "Wall time per flow stage",
+               [({"stage": name}, stage["wall_seconds"]) for name, stage in data["stages"].items()])
+        metric("reporting_section_wall_seconds", "Wall time per section",
+               [({"section": s["section"]}, s["wall_seconds"]) for s in data["sections"]])
+        metric("reporting_section_queue_seconds", "Time a section waited for a writer slot",
+               [({"section": s["section"]}, s["queue_seconds"]) for s in data["sections"]])
+        tasks = [(crew, task) for crew in data["crews"] for task in crew["tasks"]]
+        for field, help_text in (("wall_seconds", "Wall time per task"),
+                                 ("successful_requests", "LLM calls per task"),
+                                 ("prompt_tokens", "Prompt tokens per task"),
+                                 ("completion_tokens", "Completion tokens per task"),
+                                 ("cost_usd", "Estimated cost per task in USD")):
+            metric(f"reporting_task_{field}", help_text, [
+                ({"crew": crew["crew"], "section": crew["section"] or "", "task": task["task"]}, task[field] or 0)
+                for crew, task in tasks
+            ])
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, run_dir, openmetrics=False, extra=None):
+        """Write metrics.json (and metrics.prom) into the run directory"""
+        with open(os.path.join(run_dir, "metrics.json"), "w") as f:
+            json.dump({**self.to_dict(), **(extra or {})}, f, indent=2, default=str)
+        if openmetrics:
+            with open(os.path.join(run_dir, "metrics.prom"), "w") as f:
+                f.write(self.to_openmetrics())
+
+
+# Flow stages are timed from crewai's flow method events, for flows that carry RunMetrics
+@crewai_event_bus.on(MethodExecutionStartedEvent)
+def _on_stage_started(source, event):
+    if isinstance(getattr(source, "metrics", None), RunMetrics):
+        source.metrics.start_stage(event.method_name)
+
+
+@crewai_event_bus.on(MethodExecutionFinishedEvent)
+def _on_stage_finished(source, event):
+    if isinstance(getattr(source, "metrics", None), RunMetrics):
+        source.metrics.end_stage(event.method_name)
+
+
+@crewai_event_bus.on(MethodExecutionFailedEvent)
+def _on_stage_failed(source, event):
+    if isinstance(getattr(source, "metrics", None), RunMetrics):
+        source.metrics.end_stage(event.method_name, status="failed")
@@ -0,0 +1,328 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+
+import litellm
+from litellm import CustomLLM
+from litellm.types.utils import GenericStreamingChunk, Usage
+
+from .budgets import WORDS_PER_TOKEN
+from .cache import make_cache_key
+from .config import LLM_STAND_IN_CONFIG
+from .rate_limit import estimate_tokens
+
+logger = logging.getLogger("report_flow")
+
+# Phrases of the task prompts (see the crews' tasks.yaml) telling the stand-in what to answer
+PLANNING_PROMPT = "create a comprehensive plan for a report"
+DECOMPOSITION_PROMPT = "research questions for a report"
+RESEARCH_PROMPT = "Research the topic"
+# Name of the research crew's search tool, as the agents see it
+SEARCH_TOOL = "Search the internet with Serper"
+SEARCH_ASPECTS = ("latest developments", "statistics", "case studies", "expert opinions", "risks")
+# Words per delta of a streamed answer
+STREAM_CHUNK_WORDS = 6
+# litellm provider of the stand-in's models
+STAND_IN_PROVIDER = "stand-in"
+
+_TOPIC = re.compile(r'(?:topic|report on) "([^"]+)"')
+_QUESTION_COUNT = re.compile(r"into (\d+) research questions")
+_QUESTION = re.compile(r"focusing on this question: ([^\n]+)")
+_LENGTH = re.compile(r"at most about (\d+) words")
+_SECTION_TITLE = re.compile(r'\\?"title\\?":\s*\\?"([^"\\]+)')
+
+
+def _prompt_text(messages):
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def recording_key(messages):
+    """Key of a prompt in the recordings, whatever model answered it"""
+    return make_cache_key(messages)
+
+
+class Recorder:
+    """Appends the answers of real providers to a JSONL file, for replay by the stand-in LLM"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, model, messages, response, latency_seconds):
+        line = json.dumps({
+            "key": recording_key(messages),
+            "model": model,
+            "latency_seconds": round(latency_seconds, 3),
+            "prompt_tokens": estimate_tokens(messages),
+            "completion_tokens": estimate_tokens(response),
+            "response": response,
+        })
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+@lru_cache(maxsize=None)
+def load_recordings(path):
+    """Recorded answers by prompt key; the last recording of a prompt wins"""
+    if not path or not os.path.exists(path):
+        logger.warning(f"🔌 No LLM recordings in {path}, every answer will be synthetic")
+        return {}
+    recordings = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                recordings[entry["key"]] = entry
+    return recordings
+
+
+def synthetic_search_results(query, n_results=10):
+    """Serper-shaped results for an offline search that has no recorded results"""
+    slug = _slug(query)
+    return {
+        "searchParameters": {"q": query},
+        "organic": [
+            {
+                "title": f"{query}: source {i + 1}",
+                "link": f"https://example.com/{slug}/{i + 1}",
+                "snippet": f"Findings {i + 1} about {query}, with figures and expert quotes.",
+                "position": i + 1,
+            }
+            for i in range(n_results)
+        ],
+    }
+
+
+class StandInLLM(CustomLLM):
+    """Offline provider answering the LLM calls of every agent, registered in litellm.
+
+    The crews' LLMs keep their whole stack (response cache, rate limiter,
+    task deadline, routing, hedging and streaming, see llm_config.py) and
+    send their requests to the ``stand-in`` provider (see ``stand_in_model``)
+    instead of a real one. In ``synthetic`` mode the planner gets a valid
+    ReportingPlan of ``sections`` sections (or the research questions it is
+    asked for), the researcher runs ``searches`` searches before a sourced
+    summary and the content writing agents get a markdown section that
+    passes the review checks. Each answer has a completion length drawn
+    from a normal distribution, no longer than the length a prompt asks for
+    nor than the request's ``max_tokens``, and arrives after
+    ``latency_seconds`` (log-normal jitter) plus its generation time at
+    ``tokens_per_second``; streamed answers arrive in deltas of
+    STREAM_CHUNK_WORDS words at that pace. Draws are seeded by the prompt,
+    so a run is reproducible. In ``replay`` mode recorded answers are
+    returned after their recorded latency times ``replay_time_scale``, and
+    unrecorded prompts get synthetic answers. Usage is reported like a
+    provider's, only counting what was streamed of a stream closed early.
+    """
+
+    def __init__(self, mode="synthetic", latency_seconds=0.0, latency_jitter=0.0, tokens_per_second=0.0,
+                 completion_tokens=600, completion_tokens_stdev=0, sections=3, searches=0, seed=0,
+                 recordings=None, replay_time_scale=1.0):
+        super().__init__()
+        if mode not in ("synthetic", "replay"):
+            raise ValueError(f"Unknown stand-in LLM mode {mode!r}, expected 'synthetic' or 'replay'")
+        self.mode = mode
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.completion_tokens_stdev = completion_tokens_stdev
+        self.sections = sections
+        self.searches = searches
+        self.seed = seed
+        self.replay_time_scale = replay_time_scale
+        self.recordings = load_recordings(recordings) if mode == "replay" else {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {"calls": 0, "replayed": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                           "simulated_seconds": 0.0}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, simulated_seconds=round(self._stats["simulated_seconds"], 3))
+
+    def completion(self, model, messages, api_base, custom_prompt_dict, model_response, print_verbose, encoding,
+                   api_key, logging_obj, optional_params, *args, **kwargs):
+        answer, completion_tokens, first_token_seconds, generation_seconds, replayed = self._answer(
+            messages, optional_params)
+        if first_token_seconds + generation_seconds > 0:
+            time.sleep(first_token_seconds + generation_seconds)
+        model_response.choices[0].message.content = answer
+        model_response.usage = self._account(messages, replayed, completion_tokens,
+                                             first_token_seconds + generation_seconds)
+        return model_response
+
+    def streaming(self, model, messages, api_base, custom_prompt_dict, model_response, print_verbose, encoding,
+                  api_key, logging_obj, optional_params, *args, **kwargs):
+        answer, completion_tokens, first_token_seconds, generation_seconds, replayed = self._answer(
+            messages, optional_params)
+        chunks = re.findall(r"\s*(?:\S+\s*){1,%d}" % STREAM_CHUNK_WORDS, answer) or [answer]
+        streamed = 0
+        usage = None
+        try:
+            if first_token_seconds > 0:
+                time.sleep(first_token_seconds)
+            for chunk in chunks:
+                if generation_seconds > 0:
+                    time.sleep(generation_seconds / len(chunks))
+                streamed += len(chunk)
+                yield GenericStreamingChunk(text=chunk, is_finished=False, finish_reason="", usage=None, index=0,
+                                            tool_use=None)
+            usage = self._account(messages, replayed, completion_tokens, first_token_seconds + generation_seconds)
+            yield GenericStreamingChunk(text="", is_finished=True, finish_reason="stop", index=0, tool_use=None,
+                                        usage={"prompt_tokens": usage.prompt_tokens,
+                                               "completion_tokens": usage.completion_tokens,
+                                               "total_tokens": usage.total_tokens})
+        finally:
+            if usage is None:
+                # A stream closed early only generated (and waited for) part of the answer
+                share = streamed / len(answer) if answer else 1.0
+                self._account(messages, replayed, max(1, round(completion_tokens * share)),
+                              first_token_seconds + generation_seconds * share)
+
+    def _answer(self, messages, optional_params):
+        """Answer to a request, its completion tokens, its time to first token and generation time, and
+        whether it was replayed"""
+        recorded = self.recordings.get(recording_key(messages)) if self.recordings else None
+        if recorded is not None:
+            answer = recorded["response"]
+            # Recordings only have the total latency, spread over the generation
+            return (answer, recorded.get("completion_tokens") or estimate_tokens(answer), 0.0,
+                    recorded.get("latency_seconds", 0.0) * self.replay_time_scale, True)
+        prompt = _prompt_text(messages)
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+        completion_tokens = max(20, round(rng.gauss(self.completion_tokens, self.completion_tokens_stdev)))
+        # Like a model following the length asked for, and cut at the output limit
+        length = _LENGTH.search(prompt)
+        if length:
+            completion_tokens = min(completion_tokens, round(int(length.group(1)) / WORDS_PER_TOKEN))
+        if optional_params.get("max_tokens"):
+            completion_tokens = min(completion_tokens, optional_params["max_tokens"])
+        answer = self._synthetic_answer(messages, prompt, completion_tokens)
+        first_token_seconds = self.latency_seconds * (
+            rng.lognormvariate(0, self.latency_jitter) if self.latency_jitter else 1)
+        generation_seconds = completion_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return answer, completion_tokens, first_token_seconds, generation_seconds, False
+
+    def _account(self, messages, replayed, completion_tokens, latency):
+        """Count a call in the stats, and return its usage as a provider reports it"""
+        prompt_tokens = estimate_tokens(messages)
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["replayed"] += replayed
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["completion_tokens"] += completion_tokens
+            self._stats["simulated_seconds"] += latency
+        return Usage(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                     total_tokens=prompt_tokens + completion_tokens)
+
+    def _synthetic_answer(self, messages, prompt, completion_tokens):
+        match = _TOPIC.search(prompt)
+        topic = match.group(1) if match else "the topic"
+        if PLANNING_PROMPT in prompt:
+            return self._final(json.dumps(self.plan(topic)))
+        if DECOMPOSITION_PROMPT in prompt:
+            match = _QUESTION_COUNT.search(prompt)
+            count = int(match.group(1)) if match else 3
+            return self._final(json.dumps({"questions": [
+                f"What are the {SEARCH_ASPECTS[i % len(SEARCH_ASPECTS)]} of {topic} (question {i + 1})?"
+                for i in range(count)
+            ]}))
+        if RESEARCH_PROMPT in prompt:
+            searches_done = sum(1 for message in messages if isinstance(message, dict)
+                                and message.get("role") == "assistant" and "Observation:" in str(message.get("content")))
+            if SEARCH_TOOL in prompt and searches_done < self.searches:
+                question = _QUESTION.search(prompt)
+                subject = question.group(1).strip().rstrip("?") if question else topic
+                query = f"{subject} {SEARCH_ASPECTS[searches_done % len(SEARCH_ASPECTS)]}"
+                return (f"Thought: I need more information about {query}\nAction: {SEARCH_TOOL}\n"
+                        f"Action Input: {json.dumps({'search_query': query})}")
+            return self._final(self.research(topic, completion_tokens))
+        titles = _SECTION_TITLE.findall(prompt)
+        return self._final(self.text(titles[-1] if titles else f"About {topic}", topic, completion_tokens))
+
+    @staticmethod
+    def _final(answer):
+        return f"Thought: I now can give a great answer\nFinal Answer: {answer}"
+
+    def plan(self, topic):
+        return {
+            "sections": [
+                {
+                    "title": f"{topic}: part {i + 1}",
+                    "high_level_goal": f"Explain part {i + 1} of {topic}",
+                    "why_important": "Readers need it to understand the rest of the report",
+                    "sources": [f"https://example.com/{_slug(topic)}/{i + 1}"],
+                    "content_outline": ["Background", "Current state", "Outlook"],
+                }
+                for i in range(self.sections)
+            ],
+            "primary_audience": "Report readers",
+            "executive_summary": f"A stand-in report on {topic}.",
+        }
+
+    def research(self, topic, tokens):
+        """Research notes of about ``tokens`` tokens, one part per planned section citing its source"""
+        notes = []
+        for i in range(self.sections):
+            sentence = f"Findings on part {i + 1} of {topic} (https://example.com/{_slug(topic)}/{i + 1})."
+            sentences = max(1, tokens * 4 // self.sections // (len(sentence) + 1))
+            notes.append(f"## {topic}: part {i + 1}\n\n" + " ".join([sentence] * sentences))
+        return "\n\n".join(notes)
+
+    @staticmethod
+    def text(title, topic, tokens):
+        """A markdown section of about ``tokens`` tokens, with a heading and a citation"""
+        sentence = f"This paragraph discusses {topic} in detail."
+        sentences = max(1, tokens * 4 // (len(sentence) + 1))
+        paragraph = " ".join([sentence] * sentences)
+        return (f"## {title}\n\n{paragraph}\n\n"
+                f"See [the source](https://example.com/{_slug(topic)}) for more details.")
+
+
+@lru_cache(maxsize=None)
+def stand_in_llm():
+    """The stand-in LLM configured by LLM_STAND_IN_CONFIG, shared by every agent"""
+    config = LLM_STAND_IN_CONFIG
+    return StandInLLM(
+        mode=config["mode"],
+        latency_seconds=config["latency_seconds"],
+        latency_jitter=config["latency_jitter"],
+        tokens_per_second=config["tokens_per_second"],
+        completion_tokens=config["completion_tokens"],
+        completion_tokens_stdev=config["completion_tokens_stdev"],
+        sections=config["sections"],
+        searches=config["searches"],
+        seed=config["seed"],
+        recordings=config["recordings"],
+        replay_time_scale=config["replay_time_scale"],
+    )
+
+
+def stand_in_model(provider):
+    """Model answered by the stand-in LLM in place of a provider of LLM_CONFIGS"""
+    if not any(item["provider"] == STAND_IN_PROVIDER for item in litellm.custom_provider_map):
+        litellm.custom_provider_map.append({"provider": STAND_IN_PROVIDER, "custom_handler": stand_in_llm()})
+    return f"{STAND_IN_PROVIDER}/{provider}"
+
+
+# Records the answers of real providers when REPORTING_LLM_RECORD is set
+recorder = Recorder(LLM_STAND_IN_CONFIG["record"]) if LLM_STAND_IN_CONFIG["record"] else None
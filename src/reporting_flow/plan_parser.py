@@ -0,0 +1,266 @@
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from .crews.reporting_research.reporting_research_crew import ReportingPlan, Section
+
+logger = logging.getLogger("report_flow")
+
+# Characters that change the scanner's state: braces, string quotes and escapes
+_SPECIAL = re.compile(r'[{}"\\]')
+# Python literals that LLMs sometimes write instead of JSON ones
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# Times the text is scanned again after a candidate that does not parse, each scan being linear
+_MAX_RESCANS = 16
+
+
+class PlanParseError(ValueError):
+    """No report sections could be extracted from the planner's output"""
+
+
+@dataclass
+class ParsedPlan:
+    sections: List[Section]
+    plan: Optional[ReportingPlan] = None
+    repaired: bool = False
+    dropped_sections: int = 0
+    issues: List[str] = field(default_factory=list)
+
+
+def find_json_objects(text, pos=0):
+    """Yield (start, end, complete) for each top-level ``{...}`` of text from pos, in one linear pass.
+
+    Braces inside JSON strings are ignored. An object still open at the end
+    of the text (truncated output) is yielded last with ``complete=False``.
+    """
+    depth = 0
+    start = None
+    in_string = False
+    skip_to = 0
+    for match in _SPECIAL.finditer(text, pos):
+        i = match.start()
+        if i < skip_to:
+            continue
+        ch = text[i]
+        if in_string:
+            if ch == "\\":
+                skip_to = i + 2
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            # Quotes in the prose around the objects do not start strings
+            in_string = depth > 0
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1, True
+    if depth:
+        yield start, len(text), False
+
+
+def _drop_trailing_comma(chars):
+    i = len(chars) - 1
+    while i >= 0 and chars[i].isspace():
+        i -= 1
+    if i >= 0 and chars[i] == ",":
+        del chars[i]
+
+
+def _close(chars, stack, in_string):
+    chars = list(chars)
+    if in_string:
+        if chars and chars[-1] == "\\":
+            chars.pop()
+        chars.append('"')
+    while chars and chars[-1].isspace():
+        chars.pop()
+    if chars and chars[-1] == ":":
+        chars.append("null")
+    _drop_trailing_comma(chars)
+    chars.extend(reversed(stack))
+    return "".join(chars)
+
+
+def repair_json(fragment):
+    """Fix common LLM damage in a JSON object: trailing commas, Python literals,
+    mismatched closers and truncation. Returns the repaired text.
+
+    A truncated object is closed where it stops; if that does not parse,
+    its last incomplete element is dropped and the object closed after the
+    previous complete one.
+    """
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    last_comma = None
+    i, n = 0, len(fragment)
+    while i < n:
+        ch = fragment[i]
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            if stack:
+                _drop_trailing_comma(out)
+                out.append(stack.pop())
+        elif ch == ",":
+            last_comma = (len(out), tuple(stack))
+            out.append(ch)
+        elif ch.isalpha() or ch == "_":
+            word = _WORD.match(fragment, i).group(0)
+            out.append(_PY_LITERALS.get(word, word))
+            i += len(word)
+            continue
+        else:
+            out.append(ch)
+        i += 1
+
+    if not stack and not in_string:
+        return "".join(out)
+    repaired = _close(out, stack, in_string)
+    if _loads(repaired) is None and last_comma is not None:
+        length, comma_stack = last_comma
+        repaired = _close(out[:length], list(comma_stack), False)
+    return repaired
+
+
+def _loads(text):
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        return None
+
+
+def _json_candidates(raw):
+    """Yield (data, complete, repaired) for each top-level JSON object of raw that parses, repaired if needed.
+
+    A candidate that does not parse even repaired is often opened by a stray
+    ``{`` or quote of the prose around the plan, and hides the objects after
+    it: the text is then scanned again from just after its opening brace.
+    """
+    pos = 0
+    for _ in range(_MAX_RESCANS + 1):
+        rescan_from = None
+        for start, end, complete in find_json_objects(raw, pos):
+            fragment = raw[start:end]
+            data = _loads(fragment) if complete else None
+            repaired = data is None
+            if repaired:
+                data = _loads(repair_json(fragment))
+            if data is None:
+                rescan_from = start + 1
+                break
+            yield data, complete, repaired
+        if rescan_from is None:
+            return
+        pos = rescan_from
+
+
+def _find_plan_data(data, max_depth=3):
+    """The dict holding the ``sections`` list, possibly nested in a wrapper object"""
+    level = [data]
+    for _ in range(max_depth):
+        next_level = []
+        for item in level:
+            if isinstance(item, dict):
+                if isinstance(item.get("sections"), list):
+                    return item
+                next_level.extend(v for v in item.values() if isinstance(v, dict))
+        level = next_level
+    return None
+
+
+def _coerce_section(data):
+    """Section fields LLMs often get slightly wrong: lists of objects, missing sources or explanations"""
+    if not isinstance(data, dict):
+        return data
+    data = dict(data)
+    for name in ("sources", "content_outline"):
+        value = data.get(name)
+        if isinstance(value, str):
+            data[name] = [value]
+        elif isinstance(value, list):
+            data[name] = [v if isinstance(v, str) else json.dumps(v) for v in value]
+    # A section needs a title and an outline; the rest can be missing
+    data.setdefault("sources", [])
+    for name in ("high_level_goal", "why_important"):
+        data.setdefault(name, "")
+    return data
+
+
+def _validate(data):
+    """Validate plan data: the whole ReportingPlan if possible, otherwise each section"""
+    try:
+        plan = ReportingPlan.model_validate(data)
+        return plan, list(plan.sections), 0
+    except ValidationError:
+        pass
+    sections = []
+    dropped = 0
+    for item in data["sections"]:
+        try:
+            sections.append(Section.model_validate(_coerce_section(item)))
+        except ValidationError as e:
+            dropped += 1
+            logger.debug(f"📋 Dropping invalid section: {e}")
+    return None, sections, dropped
+
+
+def parse_plan(raw):
+    """Extract and validate the report plan from the planner's raw output.
+
+    Every top-level JSON object of ``raw`` is a candidate (code fences and
+    surrounding prose are skipped); damaged candidates are repaired, and
+    the text of one that cannot be is scanned again for the objects it
+    hides. The candidate with the most valid sections wins. When no object has a
+    ``sections`` list, top-level objects that are themselves valid sections
+    are used. Raises PlanParseError when no section can be extracted.
+    """
+    raw = str(raw or "")
+    best = None
+    loose_sections = []
+    for data, complete, repaired in _json_candidates(raw):
+        plan_data = _find_plan_data(data)
+        if plan_data is None:
+            try:
+                loose_sections.append(Section.model_validate(_coerce_section(data)))
+            except ValidationError:
+                pass
+            continue
+        plan, sections, dropped = _validate(plan_data)
+        if best is None or len(sections) > len(best.sections):
+            issues = []
+            if not complete:
+                issues.append("truncated output")
+            elif repaired:
+                issues.append("repaired JSON")
+            if dropped:
+                issues.append(f"{dropped} invalid sections dropped")
+            best = ParsedPlan(sections, plan, repaired, dropped, issues)
+
+    if best is None or not best.sections:
+        if loose_sections:
+            return ParsedPlan(loose_sections, issues=["sections found outside of a plan object"])
+        raise PlanParseError(f"No report sections found in the planner output ({len(raw)} characters)")
+    return best
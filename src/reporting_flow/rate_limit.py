@@ -0,0 +1,193 @@
+import logging
+import random
+import threading
+import time
+
+from .config import LLM_CONFIGS, LLM_STAND_IN_CONFIG
+
+logger = logging.getLogger("report_flow")
+
+# Rough number of characters per token, good enough to budget tokens per minute
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages):
+    """Estimate the prompt tokens of a string or a list of chat messages"""
+    if isinstance(messages, str):
+        return len(messages) // CHARS_PER_TOKEN + 1
+    return sum(len(str(m.get("content", ""))) for m in messages) // CHARS_PER_TOKEN + 1
+
+
+def is_rate_limit_error(error):
+    """Whether a provider error is a rate-limit (HTTP 429) response"""
+    return (
+        getattr(error, "status_code", None) == 429
+        or type(error).__name__ == "RateLimitError"
+        or "rate limit" in str(error).lower()
+    )
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute`` tokens per minute"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Block until ``amount`` tokens are available and take them"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def adjust(self, amount):
+        """Give back (positive) or charge (negative) tokens once the real cost is known"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrencyLimit:
+    """Concurrency limit with additive increase / multiplicative decrease (AIMD)"""
+
+    def __init__(self, max_limit, min_limit=1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= max(self.min_limit, int(self.limit)):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        with self._condition:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_rate_limited(self):
+        with self._condition:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+
+class ProviderRateLimiter:
+    """Requests-per-minute and tokens-per-minute budget for one LLM provider.
+
+    Calls wait for a concurrency slot and for both token buckets before they
+    are sent. Rate-limit responses halve the concurrency limit and are
+    retried after an exponential, jittered backoff; successful calls slowly
+    raise the limit again.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute, max_concurrency=8,
+                 max_retries=4, base_backoff_seconds=2.0, max_backoff_seconds=60.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrencyLimit(max_concurrency)
+        self.max_retries = max_retries
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "rate_limited": 0, "queue_wait_seconds": 0.0, "max_queue_wait_seconds": 0.0}
+
+    def _record(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _acquire(self, estimated_tokens):
+        started = time.monotonic()
+        self.concurrency.acquire()
+        try:
+            self.requests.acquire()
+            self.tokens.acquire(estimated_tokens)
+        except BaseException:
+            self.concurrency.release()
+            raise
+        waited = time.monotonic() - started
+        with self._stats_lock:
+            self._stats["queue_wait_seconds"] += waited
+            self._stats["max_queue_wait_seconds"] = max(self._stats["max_queue_wait_seconds"], waited)
+
+    def run(self, call, estimated_tokens):
+        """Run ``call`` within the provider budget, retrying on rate-limit errors"""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(estimated_tokens)
+            rate_limited = False
+            try:
+                result = call()
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self.max_retries:
+                    raise
+                rate_limited = True
+            finally:
+                # Released whatever the call raised (a cancellation, KeyboardInterrupt), so no slot leaks
+                self.concurrency.release()
+            if rate_limited:
+                self.concurrency.on_rate_limited()
+                self._record(rate_limited=1)
+                delay = min(self.max_backoff_seconds, self.base_backoff_seconds * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(f"⏳ {self.name} rate limited, retrying in {delay:.1f}s "
+                               f"(concurrency limit {int(self.concurrency.limit)})")
+                time.sleep(delay)
+                continue
+            self.concurrency.on_success()
+            self._record(calls=1)
+            if isinstance(result, str):
+                self.tokens.adjust(-(len(result) // CHARS_PER_TOKEN))
+            return result
+
+    def stats(self):
+        """Return call, rate-limit and queue-wait counters for this provider"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = int(self.concurrency.limit)
+        stats["in_flight"] = self.concurrency.in_flight
+        return stats
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """Return the process-wide limiter of a provider in LLM_CONFIGS (None if it has no limits)"""
+    limits = LLM_CONFIGS[provider].get("rate_limits")
+    if not limits:
+        return None
+    if LLM_STAND_IN_CONFIG["enabled"]:
+        limits = {**limits, **LLM_STAND_IN_CONFIG["rate_limits"]}
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = ProviderRateLimiter(provider, **limits)
+        return _limiters[provider]
+
+
+def rate_limiter_stats():
+    """Return the stats of every limiter created so far, keyed by provider"""
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,146 @@
+import logging
+import os
+import re
+import shutil
+
+logger = logging.getLogger("report_flow")
+
+
+def section_title(i, section):
+    """Title of the i-th (0-based) section, whatever format the plan used"""
+    default = f"Section {i+1}"
+    return section.get('title', default) if isinstance(section, dict) else getattr(section, 'title', default)
+
+
+def section_filename(i, title):
+    """File name of the i-th (0-based) section in the run's sections directory"""
+    # Create safe filename from title
+    safe_title = re.sub(r'[^\w\-_.]', '_', title)
+    return f"{i+1:02d}_{safe_title}.md"
+
+
+def report_filename(topic, audience_level):
+    """File name of the report in the run's report directory"""
+    # Topics come from job submissions: keep separators and ".." out of the path
+    return os.path.basename(re.sub(r"[\s/\\]", "_", f"{topic}_{audience_level}.md"))
+
+
+def section_content(result):
+    """Text of a content writer crew's result, whatever shape it has"""
+    for name in ("raw", "output", "result"):
+        if hasattr(result, name):
+            content = getattr(result, name)
+            break
+    else:
+        content = str(result)
+    if isinstance(content, dict) and 'content' in content:
+        content = content['content']
+    return content
+
+
+class StreamingReportWriter:
+    """Assembles the report and index on disk while sections are being written.
+
+    Sections are appended in plan order as soon as they are ready; sections
+    that finish early are buffered until every section before them has been
+    written or skipped. Only the buffered sections are held in memory, and
+    the files are written by the ``artifacts`` store's writer thread.
+    ``on_event`` is called with a dict for every section appended or skipped.
+    """
+
+    def __init__(self, run, artifacts, topic, audience_level, section_titles, on_event=None):
+        self.run = run
+        self.artifacts = artifacts
+        self.topic = topic
+        self.audience_level = audience_level
+        self.on_event = on_event or (lambda event: None)
+        self.section_titles = section_titles
+        self.section_files = []
+        self._pending = {}
+        self._next = 0
+
+        self.report_path = os.path.join(run.report_dir, report_filename(topic, audience_level))
+        self.index_path = os.path.join(run.run_dir, "index.md")
+
+        planned_files = [os.path.join(run.sections_dir, section_filename(i, title))
+                         for i, title in enumerate(section_titles)]
+        self._header = self._report_header(planned_files)
+        artifacts.write(self.report_path, self._header)
+        artifacts.write(self.index_path, f"# Report: {topic} ({audience_level})\n\n"
+                                         f"- [Full Report]({os.path.relpath(self.report_path, run.run_dir)})\n"
+                                         "## Sections\n\n")
+
+    def _report_header(self, section_files):
+        """Title and table of contents of the report"""
+        header = f"# Report: {self.topic} ({self.audience_level} audience)\n\n"
+        if section_files:
+            toc = ["# Table of Contents\n"]
+            for i, section_file in enumerate(section_files):
+                section_name = os.path.basename(section_file).split("_", 1)[1].replace(".md", "")
+                section_rel_path = os.path.relpath(section_file, os.path.dirname(self.report_path))
+                toc.append(f"{i+1}. [{section_name}]({section_rel_path})")
+            header += "\n".join(toc) + "\n\n---\n\n"
+        return header
+
+    def add(self, i, content, section_path):
+        """Hand over the content of the i-th (0-based) section"""
+        self._pending[i] = (content, section_path)
+        self._flush()
+
+    def skip(self, i):
+        """Mark the i-th (0-based) section as failed or empty"""
+        self._pending[i] = None
+        self._flush()
+
+    def _flush(self):
+        while self._next in self._pending:
+            written = self._pending.pop(self._next)
+            title = self.section_titles[self._next] if self._next < len(self.section_titles) else f"Section {self._next+1}"
+            if written and str(written[0]).strip():
+                content, section_path = written
+                self.artifacts.append(self.report_path, str(content).strip() + "\n\n")
+                self.section_files.append(section_path)
+                section_name = os.path.basename(section_path).split("_", 1)[1].replace(".md", "")
+                self.artifacts.append(self.index_path, f"{len(self.section_files)}. "
+                                      f"[{section_name}]({os.path.relpath(section_path, self.run.run_dir)})\n")
+                self.on_event({"type": "section", "index": self._next + 1, "title": title,
+                               "path": section_path, "status": "written"})
+            else:
+                logger.warning(f"Skipping empty section {self._next + 1}")
+                self.on_event({"type": "section", "index": self._next + 1, "title": title,
+                               "path": None, "status": "skipped"})
+            self._next += 1
+
+    def _rewrite_header(self, header):
+        """Replace the planned table of contents with the sections actually written (writer thread)"""
+        tmp_path = f"{self.report_path}.tmp"
+        with open(self.report_path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.seek(len(self._header.encode("utf-8")))
+            dst.write(header.encode("utf-8"))
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, self.report_path)
+
+    async def finish(self):
+        """Complete the report once every section has been handed over, and wait until it is on disk"""
+        for i in range(self._next, len(self.section_titles)):
+            self._pending.setdefault(i, None)
+        self._flush()
+
+        if len(self.section_files) < len(self.section_titles):
+            self.artifacts.submit(self._rewrite_header, self._report_header(self.section_files))
+        if not self.section_files:
+            logger.warning("❌ No content to write! Using fallback content.")
+            self.artifacts.append(self.report_path,
+                                  f"# Report on {self.topic} for {self.audience_level} audience\n\n"
+                                  "This report could not be generated properly. Please check the logs.\n\n")
+        await self.artifacts.flush()
+
+        logger.info(f"📊 Report saved to {self.report_path}")
+        logger.info(f"📄 Index created at {self.index_path}")
+        result = {
+            "report_path": self.report_path,
+            "index_path": self.index_path,
+            "run_directory": self.run.run_dir
+        }
+        self.on_event({"type": "report", **result})
+        return result
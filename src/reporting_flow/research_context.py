@@ -0,0 +1,206 @@
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from .config import CONTEXT_CONFIG
+from .rate_limit import estimate_tokens
+
+_WORD = re.compile(r"[a-z0-9]+")
+_URL = re.compile(r"https?://[^\s)\]>\"'`]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# Words that match every chunk, URL fragments included
+STOPWORDS = frozenset(
+    "the and for with that this from are was were will have has had not but can its into than then "
+    "their there these those which what when where who how about also more most other such only over "
+    "http https www com org html".split()
+)
+
+
+def terms(text):
+    """Lowercase index terms of a text"""
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in STOPWORDS]
+
+
+def research_questions(result, limit):
+    """Sub-questions of the decomposition step's output, at most ``limit``"""
+    questions = getattr(getattr(result, "pydantic", None), "questions", None)
+    if not questions:
+        # Without a structured answer, take the lines that are questions
+        raw = str(getattr(result, "raw", ""))
+        questions = [line.strip(" -*#\t0123456789.)") for line in raw.splitlines() if line.strip().endswith("?")]
+    questions = [question.strip() for question in questions if question and question.strip()]
+    return list(dict.fromkeys(questions))[:limit]
+
+
+def normalize_url(url):
+    """URL without scheme, ``www.`` and trailing punctuation, to match sources written differently"""
+    url = re.sub(r"^https?://(www\.)?", "", url.strip().lower())
+    return url.rstrip("/.,;:")
+
+
+def split_chunks(text, chunk_tokens):
+    """Split text into chunks of about ``chunk_tokens`` tokens, on paragraph and sentence boundaries.
+
+    Paragraphs are merged until a chunk is full, and longer paragraphs are
+    split into lines (lists), then sentences. A markdown heading starts a
+    new chunk, so that it stays with the text it introduces.
+    """
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= chunk_tokens:
+            pieces.append(("\n\n", paragraph))
+            continue
+        separator = "\n\n"
+        for line in paragraph.splitlines():
+            if not line.strip():
+                continue
+            if estimate_tokens(line) <= chunk_tokens:
+                pieces.append((separator, line))
+            else:
+                sentences = [s for s in _SENTENCE_END.split(line) if s.strip()]
+                pieces.extend((separator if i == 0 else " ", sentence) for i, sentence in enumerate(sentences))
+            separator = "\n"
+
+    chunks = []
+    current = ""
+    size = 0
+    for separator, piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and (size + tokens > chunk_tokens or piece.startswith("#")):
+            chunks.append(current)
+            current, size = "", 0
+        current = f"{current}{separator}{piece}" if current else piece
+        size += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_findings(findings):
+    """Merge the findings of parallel researchers, given as (question, text) pairs, into one research text.
+
+    Paragraphs found by several researchers are kept once, and the sources
+    they cite are listed once per URL at the end, with the questions citing
+    them. Returns the text and the number of distinct sources.
+    """
+    seen = set()
+    sources = {}
+    parts = []
+    for number, (question, text) in enumerate(findings, 1):
+        paragraphs = []
+        for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+            key = " ".join(paragraph.lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                paragraphs.append(paragraph.strip())
+        for url in _URL.findall(text or ""):
+            url = url.rstrip(".,;:")
+            _, questions = sources.setdefault(normalize_url(url), (url, []))
+            if number not in questions:
+                questions.append(number)
+        parts.append(f"## Question {number}: {question}\n\n" + "\n\n".join(paragraphs))
+    if sources:
+        parts.append("## Sources\n\n" + "\n".join(
+            f"- {url} (questions {', '.join(map(str, questions))})" for url, questions in sources.values()
+        ))
+    return "\n\n".join(parts), len(sources)
+
+
+def section_query(section):
+    """Query text (title, goal and outline) and sources of a plan section: a Section, a dict or text"""
+    if hasattr(section, "model_dump"):
+        section = section.model_dump()
+    elif isinstance(section, str):
+        try:
+            section = json.loads(section)
+        except ValueError:
+            pass
+    if not isinstance(section, dict):
+        text = str(section)
+        return text, _URL.findall(text)
+    outline = section.get("content_outline") or []
+    parts = [section.get("title"), section.get("high_level_goal"), *outline]
+    return " ".join(str(part) for part in parts if part), [str(source) for source in section.get("sources") or []]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    text: str
+    tokens: int
+    urls: frozenset
+
+
+class ResearchIndex:
+    """BM25 index of the chunks of the research output, queried for the context of each section.
+
+    Built once per run, after the research; selecting the context of a
+    section scores every chunk against the section's title, goal and
+    outline, which takes well under a millisecond for a research output of
+    a few thousand tokens.
+    """
+
+    def __init__(self, text, chunk_tokens=None, k1=1.5, b=0.75):
+        self.text = text or ""
+        chunk_tokens = chunk_tokens or CONTEXT_CONFIG["chunk_tokens"]
+        self.chunks = [
+            Chunk(i, chunk, estimate_tokens(chunk), frozenset(normalize_url(url) for url in _URL.findall(chunk)))
+            for i, chunk in enumerate(split_chunks(self.text, chunk_tokens))
+        ]
+        self.tokens = sum(chunk.tokens for chunk in self.chunks)
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(terms(chunk.text)) for chunk in self.chunks]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._average_length = (sum(self._lengths) / len(self._lengths) if self._lengths else 0) or 1
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        n = len(self.chunks)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, query):
+        """BM25 score of every chunk for the query"""
+        query_terms = set(terms(query)) & self._idf.keys()
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = counts.get(term)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * length / self._average_length)
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, query, sources=(), budget_tokens=None):
+        """Chunks relevant to the query, within the token budget, in their order in the research.
+
+        Chunks citing one of ``sources`` come first, then the others by BM25
+        score; chunks that neither cite a source nor match the query are left
+        out. A chunk that does not fit in what remains of the budget is
+        skipped for smaller ones.
+        """
+        budget = CONTEXT_CONFIG["section_budget_tokens"] if budget_tokens is None else budget_tokens
+        source_urls = {normalize_url(source) for source in sources}
+        scores = self.scores(query)
+        cites = [bool(chunk.urls & source_urls) for chunk in self.chunks]
+        ranked = sorted(range(len(self.chunks)), key=lambda i: (not cites[i], -scores[i], i))
+        selected = []
+        used = 0
+        for i in ranked:
+            if not cites[i] and scores[i] <= 0:
+                break
+            if used + self.chunks[i].tokens <= budget:
+                selected.append(self.chunks[i])
+                used += self.chunks[i].tokens
+        return sorted(selected, key=lambda chunk: chunk.index)
+
+    def context_for(self, section, budget_tokens=None):
+        """Research context of a plan section, as text for the writer's prompt"""
+        query, sources = section_query(section)
+        return "\n\n".join(chunk.text for chunk in self.select(query, sources, budget_tokens))
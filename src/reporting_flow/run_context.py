@@ -0,0 +1,131 @@
+import contextvars
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+OUTPUT_DIR = "output"
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Identifies the run the current coroutine/thread works for, so that each
+# run's log file only receives its own records
+current_run_id = contextvars.ContextVar("current_run_id", default=None)
+# Set once the flow of the current run is cancelled (see check_run_cancelled)
+run_cancelled = contextvars.ContextVar("run_cancelled", default=None)
+
+_logging_configured = False
+_tracing_initialized = False
+
+
+def configure_logging(console_level=logging.INFO):
+    """Install the console log handler once per process.
+
+    ``console_level`` only filters the console: run log files still get
+    every INFO record (kickoff --live keeps the console for its live view).
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(console_level)
+    # force=True replaces the WARNING-level handler crewai installs when its crews are imported
+    logging.basicConfig(
+        level=logging.INFO,
+        format=LOG_FORMAT,
+        handlers=[console],
+        force=True
+    )
+    logging.getLogger("report_flow").setLevel(logging.INFO)
+    _logging_configured = True
+
+
+def init_tracing():
+    """Initialize Langtrace once per process, importing the SDK only when needed"""
+    global _tracing_initialized
+    if _tracing_initialized:
+        return
+    from langtrace_python_sdk import langtrace
+
+    langtrace.init(api_key=os.getenv('LANGTRACE_API_KEY'))
+    _tracing_initialized = True
+
+
+class RunCancelled(RuntimeError):
+    """An LLM call was refused because the run making it was cancelled"""
+
+
+def check_run_cancelled():
+    """Refuse to go on with work of a cancelled run.
+
+    Cancelling a flow cannot stop the crews it kicked off, which run on in
+    worker threads; their LLM calls check this before (and while) calling
+    the provider, so that a cancelled run stops spending tokens.
+    """
+    cancelled = run_cancelled.get()
+    if cancelled is not None and cancelled.is_set():
+        raise RunCancelled(f"Run {current_run_id.get()} was cancelled")
+
+
+class RunLogFilter(logging.Filter):
+    """Only let through records emitted while working on a given run"""
+
+    def __init__(self, run_id):
+        super().__init__()
+        self.run_id = run_id
+
+    def filter(self, record):
+        return current_run_id.get() == self.run_id
+
+
+@dataclass
+class RunContext:
+    """Directories and log file of a single report generation run"""
+    run_id: str
+    run_dir: str
+    report_dir: str
+    sections_dir: str
+    debug_dir: str
+
+    @classmethod
+    def create(cls, input_variables, output_dir=OUTPUT_DIR, run_id=None):
+        """Create the run-specific directories for the given inputs"""
+        if run_id is None:
+            # Generate timestamp for this run to create unique folders
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            # Topics come from job submissions: path separators must not reach the run directory
+            topic = re.sub(r"[\s/\\]", "_", input_variables.get("topic", "report"))
+            audience = re.sub(r"[\s/\\]", "_", input_variables.get("audience_level", "general"))
+            run_id = base_id = f"{topic}_{audience}_{timestamp}"
+            # Several runs of the same report may start within the same second
+            suffix = 2
+            while os.path.exists(os.path.join(output_dir, run_id)):
+                run_id = f"{base_id}_{suffix}"
+                suffix += 1
+
+        run_dir = os.path.join(output_dir, run_id)
+        context = cls(
+            run_id=run_id,
+            run_dir=run_dir,
+            report_dir=os.path.join(run_dir, "report"),
+            sections_dir=os.path.join(run_dir, "sections"),
+            debug_dir=os.path.join(run_dir, "debug"),
+        )
+        # The debug folder is only created when a debug artifact is written to it
+        for directory in (context.run_dir, context.report_dir, context.sections_dir):
+            os.makedirs(directory, exist_ok=True)
+        return context
+
+    def open_log(self):
+        """Attach a file handler that records this run's logs in its directory"""
+        handler = logging.FileHandler(os.path.join(self.run_dir, "report_flow.log"))
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.addFilter(RunLogFilter(self.run_id))
+        logging.getLogger().addHandler(handler)
+        return handler
+
+    @staticmethod
+    def close_log(handler):
+        logging.getLogger().removeHandler(handler)
+        handler.close()
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import SECTION_STORE_CONFIG
+from .incremental import section_hash
+from .section_store import get_section_store
+
+logger = logging.getLogger("report_flow")
+
+
+@dataclass
+class EarlierSection:
+    """Text of a section written before: reused as is, or a ``draft`` for the writer to adapt"""
+    content: str
+    source: str
+    # File of this run already holding the section (checkpointed sections)
+    section_path: Optional[str] = None
+
+    @property
+    def draft(self):
+        return self.source == "draft"
+
+
+class SectionReuse:
+    """Finds the sections of a run that were written before, so that they are not written again.
+
+    A section is looked up in the checkpoints of the run (an earlier attempt
+    with the same inputs and pipeline), then in the base run of an
+    incremental run (same plan entry and audience), then in the section
+    store: its closest section is reused as is when close enough and for the
+    same audience, or else given to the writer as a draft to adapt when
+    close enough for that.
+    """
+
+    def __init__(self, run, checkpoints, artifacts, input_variables, previous_run=None):
+        self.run = run
+        self.checkpoints = checkpoints
+        self.artifacts = artifacts
+        self.topic = input_variables.get("topic")
+        self.audience_level = input_variables.get("audience_level")
+        self.previous_run = previous_run
+        self.store = get_section_store()
+        # Sections reused from the base run, and closest store section by section number
+        self.reused_sections = 0
+        self.store_matches = {}
+
+    async def find(self, i, section, checkpoint_inputs):
+        """The EarlierSection of section ``i`` (0-based), or None to write it from scratch"""
+        checkpoint = self.checkpoints.load(f"section_{i+1}", checkpoint_inputs)
+        if checkpoint is not None:
+            section_path = os.path.join(self.run.run_dir, checkpoint["section_path"])
+            if os.path.exists(section_path):
+                logger.info(f"♻️ Reusing checkpointed section {i+1} from {section_path}")
+                return EarlierSection(await self.artifacts.read(section_path), "checkpoint", section_path)
+
+        if self.previous_run is not None:
+            previous_path = self.previous_run.find(section_hash(section, self.audience_level))
+            if previous_path is not None:
+                logger.info(f"♻️ Section {i+1} is unchanged since run {self.previous_run.run_id}, reusing it")
+                self.reused_sections += 1
+                return EarlierSection(await self.artifacts.read(previous_path), "incremental")
+
+        if self.store is None:
+            return None
+        # Scoring the store and reading the match are done off the event loop, like its writes
+        match = await asyncio.to_thread(self.store.nearest, section, self.topic, self.run.run_id)
+        if match is None:
+            return None
+        reuse = match.similarity >= SECTION_STORE_CONFIG["reuse_similarity"] and match.audience_level == self.audience_level
+        seed = not reuse and match.similarity >= SECTION_STORE_CONFIG["seed_similarity"]
+        self.store_matches[i + 1] = {"run_id": match.run_id, "title": match.title, "similarity": match.similarity,
+                                     "use": "reused" if reuse else "seeded" if seed else None}
+        if reuse:
+            logger.info(f"♻️ Section {i+1} matches {match.title!r} of run {match.run_id} "
+                        f"(similarity {match.similarity:.2f}), reusing it")
+            return EarlierSection(match.markdown, "store")
+        if seed:
+            logger.info(f"🌱 Section {i+1} is written from {match.title!r} of run {match.run_id} "
+                        f"(similarity {match.similarity:.2f})")
+            return EarlierSection(match.markdown, "draft")
+        return None
+
+    def remember(self, section, content):
+        """Add a section written in full by this run to the store, from the artifact writer thread"""
+        if self.store is not None:
+            self.artifacts.submit(self.store.add, section, self.topic, self.audience_level, content, self.run.run_id)
+
+    def stats(self):
+        """Metrics of the store and of its matches, or None without a store"""
+        if self.store is None:
+            return None
+        return {**self.store.stats(), "matches": self.store_matches}
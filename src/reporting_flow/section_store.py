@@ -0,0 +1,154 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .cache import make_cache_key
+from .config import SECTION_STORE_CONFIG
+from .incremental import SECTION_FIELDS, section_data
+from .research_context import STOPWORDS
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def section_text(section, topic):
+    """Text a plan section is matched on: the report topic, and the section's title, goal and outline"""
+    data = section_data(section)
+    if data is None:
+        return f"{topic}\n{section}"
+    outline = data.get("content_outline") or []
+    parts = [topic, data.get("title"), data.get("high_level_goal"), data.get("why_important"), *outline]
+    return "\n".join(str(part) for part in parts if part)
+
+
+def vectorize(text):
+    """Unit vector of the words and word pairs of a text, with log-scaled counts.
+
+    Numbers are kept, so that "part 1" and "part 2" of a plan are told apart.
+    """
+    words = [word for word in _WORD.findall(text.lower())
+             if (len(word) > 2 or word.isdigit()) and word not in STOPWORDS]
+    counts = Counter(words)
+    counts.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    weights = {term: 1 + math.log(count) for term, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+    return {term: weight / norm for term, weight in weights.items()}
+
+
+@dataclass(frozen=True)
+class StoredSection:
+    key: str
+    run_id: str
+    topic: str
+    audience_level: str
+    title: str
+    markdown: str
+    similarity: float = 0.0
+
+
+class SectionStore:
+    """Sections written by earlier reports, with an index finding the closest one to a plan section.
+
+    Sections are kept in SQLite with their plan and markdown, and indexed in
+    memory by an inverted index of their vectors (see ``vectorize``), so a
+    lookup only scores the stored sections sharing a term with the query.
+    The index is loaded when the store is opened and kept up to date by
+    ``add``; the store is safe to share between threads.
+    """
+
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            "key TEXT PRIMARY KEY, run_id TEXT NOT NULL, topic TEXT NOT NULL, audience_level TEXT NOT NULL, "
+            "title TEXT NOT NULL, section TEXT NOT NULL, text TEXT NOT NULL, markdown TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._postings = defaultdict(dict)
+        self._vectors = {}
+        self._entries = {}
+        for key, run_id, topic, audience_level, title, text in self._conn.execute(
+            "SELECT key, run_id, topic, audience_level, title, text FROM sections"
+        ):
+            self._index(key, (run_id, topic, audience_level, title), vectorize(text))
+
+    def _index(self, key, entry, vector):
+        self._unindex(key)
+        self._entries[key] = entry
+        self._vectors[key] = vector
+        for term, weight in vector.items():
+            self._postings[term][key] = weight
+
+    def _unindex(self, key):
+        for term in self._vectors.pop(key, {}):
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+        self._entries.pop(key, None)
+
+    def add(self, section, topic, audience_level, markdown, run_id):
+        """Store a written section, replacing the one of the same plan, topic and audience"""
+        data = section_data(section)
+        canonical = {field: data.get(field) for field in SECTION_FIELDS} if data is not None else str(section)
+        key = make_cache_key(canonical, topic, audience_level)
+        text = section_text(section, topic)
+        title = data.get("title", "") if data is not None else ""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sections (key, run_id, topic, audience_level, title, section, text, "
+                "markdown, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, run_id, topic, audience_level, title, json.dumps(canonical, default=str), text, markdown,
+                 time.time()),
+            )
+            self._index(key, (run_id, topic, audience_level, title), vectorize(text))
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                for (old,) in self._conn.execute(
+                    "SELECT key FROM sections ORDER BY created_at DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+                ).fetchall():
+                    self._conn.execute("DELETE FROM sections WHERE key = ?", (old,))
+                    self._unindex(old)
+            self._conn.commit()
+
+    def nearest(self, section, topic, exclude_run=None):
+        """Stored section closest to a plan section by cosine similarity (None if none shares a term with it)"""
+        query = vectorize(section_text(section, topic))
+        with self._lock:
+            scores = defaultdict(float)
+            for term, weight in query.items():
+                for key, stored_weight in self._postings.get(term, {}).items():
+                    scores[key] += weight * stored_weight
+            # Sections of the run asking would duplicate its own content
+            candidates = [(score, key) for key, score in scores.items() if self._entries[key][0] != exclude_run]
+            if not candidates:
+                return None
+            similarity, key = max(candidates)
+            run_id, stored_topic, audience_level, title = self._entries[key]
+            (markdown,) = self._conn.execute("SELECT markdown FROM sections WHERE key = ?", (key,)).fetchone()
+        return StoredSection(key, run_id, stored_topic, audience_level, title, markdown, round(similarity, 4))
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "terms": len(self._postings)}
+
+
+@lru_cache(maxsize=None)
+def get_section_store():
+    """The store configured by SECTION_STORE_CONFIG, opened once per process, or None when disabled"""
+    if not SECTION_STORE_CONFIG["enabled"]:
+        return None
+    return SectionStore(SECTION_STORE_CONFIG["path"], max_entries=SECTION_STORE_CONFIG["max_entries"])
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from .config import LLM_STAND_IN_CONFIG, PIPELINE_CONFIG, PIPELINE_PROFILES, RESEARCH_CONFIG, SERVICE_CONFIG
+from .jobs import JOB_STATUSES, JobQueue
+from .run_context import configure_logging, init_tracing
+
+logger = logging.getLogger("report_flow")
+
+# Idle workers also look for jobs queued by other processes this often
+POLL_SECONDS = 1.0
+MAX_BODY_BYTES = 1024 * 1024
+REQUEST_TIMEOUT_SECONDS = 30
+HTTP_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+# Fields of a job submission: the flow's inputs, the content writer pipeline of its sections,
+# and the earlier run whose unchanged sections are reused
+JOB_FIELDS = ("topic", "audience_level", "pipeline_profile", "incremental_from")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def job_inputs(body):
+    """Validate a job submission and return the inputs stored with the job"""
+    if not isinstance(body, dict) or not str(body.get("topic") or "").strip():
+        raise HTTPError(400, "A job needs a topic")
+    profile = body.get("pipeline_profile")
+    if profile is not None and profile not in PIPELINE_PROFILES:
+        raise HTTPError(400, f"Unknown pipeline profile {profile!r}, expected one of {list(PIPELINE_PROFILES)}")
+    if body.get("incremental_from"):
+        from .incremental import run_directory
+        try:
+            run_directory(str(body["incremental_from"]))
+        except (ValueError, FileNotFoundError) as e:
+            raise HTTPError(400, str(e))
+    return {name: str(body[name]) for name in JOB_FIELDS if body.get(name)}
+
+
+class ReportService:
+    """Resident report generator: a job queue served over HTTP (or a Unix socket) and a pool of workers.
+
+    What a report pays for once per process (imports, Langtrace, the crews'
+    YAML configs, crews, LLM clients and caches) is set up when the service
+    starts and shared by every job. Each worker runs one ReportingFlow at a
+    time and records its progress in the job queue.
+    """
+
+    def __init__(self, queue, workers=None):
+        self.queue = queue
+        self.workers = workers or SERVICE_CONFIG["workers"]
+        self.running = {}
+        self.started_at = None
+        self._server = None
+        self._socket_path = None
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+
+    def warm_up(self):
+        """Import, initialize and build what every report needs, before the first job arrives"""
+        started = time.perf_counter()
+        configure_logging()
+        init_tracing()
+        from . import main  # noqa: F401
+        from .crews.reporting_content_writer.reporting_content_writer_crew import content_writer_pools
+        from .crews.reporting_research.reporting_research_crew import research_pool, research_stage_pools
+
+        # One idle crew of each kind, so that the first jobs do not build them
+        for pool in research_stage_pools.values() if RESEARCH_CONFIG["mode"] == "parallel" else [research_pool]:
+            with pool.checkout():
+                pass
+        with content_writer_pools[PIPELINE_CONFIG["profile"]].checkout():
+            pass
+        logger.info(f"🔥 Service warmed up in {time.perf_counter() - started:.1f}s")
+
+    async def start(self, host=None, port=None, socket_path=None):
+        self.warm_up()
+        requeued = self.queue.requeue_running()
+        if requeued:
+            logger.info(f"♻️ Resuming {requeued} jobs interrupted when the service stopped")
+        self._socket_path = socket_path or SERVICE_CONFIG["socket"]
+        if self._socket_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=self._socket_path)
+            address = self._socket_path
+        else:
+            host = host or SERVICE_CONFIG["host"]
+            port = SERVICE_CONFIG["port"] if port is None else port
+            self._server = await asyncio.start_server(self._handle, host, port)
+            address = "http://{}:{}".format(*self._server.sockets[0].getsockname()[:2])
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.started_at = time.time()
+        logger.info(f"🚀 Report service listening on {address} with {self.workers} workers")
+        return address
+
+    async def stop(self):
+        """Stop serving; jobs still running are queued again and resume on the next start"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._socket_path and os.path.exists(self._socket_path):
+            os.remove(self._socket_path)
+        logger.info("👋 Report service stopped")
+
+    def submit(self, body):
+        """Queue one job, or a list of jobs, from a submission"""
+        jobs = [self.queue.submit(job_inputs(item)) for item in (body if isinstance(body, list) else [body])]
+        self._wakeup.set()
+        return jobs if isinstance(body, list) else jobs[0]
+
+    def health(self):
+        from .crews.reporting_content_writer.reporting_content_writer_crew import content_writer_pools
+        from .crews.reporting_research.reporting_research_crew import research_pool, research_stage_pools
+        from .llm_config import llm_cache
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0,
+            "workers": self.workers,
+            "running": list(self.running),
+            "jobs": self.queue.counts(),
+            "crew_pools": {
+                "research": research_pool.stats(),
+                **{f"research_{stage}": pool.stats() for stage, pool in research_stage_pools.items()},
+                **{f"content_writer_{profile}": pool.stats() for profile, pool in content_writer_pools.items()},
+            },
+            "llm_cache": llm_cache.stats() if llm_cache is not None else None,
+            "stand_in_llm": LLM_STAND_IN_CONFIG["enabled"],
+        }
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            job = self.queue.claim()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    async def _run_job(self, job):
+        """Run the flow of a job, recording its run id and progress as the flow reports them"""
+        from .main import ReportingFlow
+
+        inputs = dict(job["inputs"])
+        pipeline_profile = inputs.pop("pipeline_profile", None)
+        incremental_from = inputs.pop("incremental_from", None)
+        flow = ReportingFlow(input_variables=inputs, run_id=job["run_id"], pipeline_profile=pipeline_profile,
+                             incremental_from=incremental_from)
+        self.running[job["id"]] = flow
+        progress = {"stage": "starting", "sections_total": None, "sections_written": 0, "sections_skipped": 0}
+        logger.info(f"📥 Starting job {job['id']} ({inputs['topic']})"
+                    + (f", resuming run {job['run_id']}" if job["run_id"] else ""))
+        kickoff = asyncio.create_task(flow.kickoff_async())
+        try:
+            async for event in flow.section_events():
+                if event["type"] == "started":
+                    self.queue.set_run_id(job["id"], event["run_id"])
+                    progress["stage"] = "research"
+                elif event["type"] == "planned":
+                    progress.update(stage="writing", sections_total=event["sections"])
+                elif event["type"] == "section":
+                    progress[f"sections_{event['status']}"] += 1
+                else:
+                    progress["stage"] = "completed" if event["type"] == "report" else "failed"
+                self.queue.set_progress(job["id"], progress)
+            result = await kickoff
+            self.queue.finish(job["id"], "completed", result=result)
+            logger.info(f"✅ Job {job['id']} completed: {result.get('report_path')}")
+        except asyncio.CancelledError:
+            # The service is stopping: the job resumes from its checkpoints on the next start
+            kickoff.cancel()
+            await asyncio.gather(kickoff, return_exceptions=True)
+            self.queue.requeue(job["id"])
+            raise
+        except Exception as e:
+            logger.error(f"❌ Job {job['id']} failed: {e}")
+            self.queue.finish(job["id"], "failed", error=str(e))
+        finally:
+            self.running.pop(job["id"], None)
+
+    async def _handle(self, reader, writer):
+        """Answer one HTTP request with a JSON response"""
+        try:
+            status, payload = await asyncio.wait_for(self._respond(reader), REQUEST_TIMEOUT_SECONDS)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as e:
+            logger.error(f"❌ Service request failed: {e}", exc_info=True)
+            status, payload = 500, {"error": str(e)}
+        body = json.dumps(payload, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii") + body
+        )
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def _respond(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) != 3:
+            raise HTTPError(400, "Malformed request line")
+        method, target, _ = request_line
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes")
+        body = None
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except ValueError:
+                raise HTTPError(400, "The request body is not valid JSON") from None
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return self._route(method, url.path.rstrip("/") or "/", query, body)
+
+    def _route(self, method, path, query, body):
+        parts = path.strip("/").split("/")
+        if path == "/health" and method == "GET":
+            return 200, self.health()
+        if path == "/jobs":
+            if method == "POST":
+                return 202, self.submit(body)
+            if method == "GET":
+                status = query.get("status")
+                if status is not None and status not in JOB_STATUSES:
+                    raise HTTPError(400, f"Unknown job status {status!r}, expected one of {list(JOB_STATUSES)}")
+                try:
+                    limit = int(query.get("limit", 100))
+                except ValueError:
+                    raise HTTPError(400, "limit must be an integer") from None
+                return 200, self.queue.list(status=status, limit=limit)
+            raise HTTPError(405, f"{method} is not supported on /jobs")
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.queue.get(parts[1])
+            if job is None:
+                raise HTTPError(404, f"No job {parts[1]}")
+            if method == "GET":
+                return 200, job
+            if method == "DELETE":
+                if not self.queue.cancel(job["id"]):
+                    raise HTTPError(409, f"Job {job['id']} is {job['status']}, only queued jobs can be cancelled")
+                return 200, self.queue.get(job["id"])
+            raise HTTPError(405, f"{method} is not supported on /jobs/{parts[1]}")
+        raise HTTPError(404, f"No route for {method} {path}")
+
+
+async def serve(host=None, port=None, socket_path=None, workers=None, queue_path=None):
+    """Run the report service until SIGINT or SIGTERM"""
+    queue = JobQueue(queue_path or SERVICE_CONFIG["queue_path"])
+    service = ReportService(queue, workers=workers)
+    await service.start(host=host, port=port, socket_path=socket_path)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        await service.stop()
+        queue.close()
+
+
+def main():
+    """Command line entry point: run the report service"""
+    parser = argparse.ArgumentParser(description="Serve report generation jobs from a resident process")
+    parser.add_argument("--host", default=None, help="Address to listen on")
+    parser.add_argument("--port", type=int, default=None, help="Port to listen on (0 = any free port)")
+    parser.add_argument("--socket", default=None, help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="Reports generated at the same time")
+    parser.add_argument("--queue", default=None, help="SQLite file of the job queue")
+    parser.add_argument("--stand-in-llm", action="store_true", help="Answer every LLM call with the offline stand-in")
+    args = parser.parse_args()
+
+    if args.stand_in_llm:
+        LLM_STAND_IN_CONFIG["enabled"] = True
+    configure_logging()
+    asyncio.run(serve(host=args.host, port=args.port, socket_path=args.socket,
+                      workers=args.workers, queue_path=args.queue))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,235 @@
+import contextvars
+import itertools
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.task_events import TaskStartedEvent
+
+from .config import STREAMING_CONFIG
+from .rate_limit import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger("report_flow")
+
+# Receives the tokens of the LLM calls made for the current coroutine/thread (None = not streamed)
+token_sink = contextvars.ContextVar("token_sink", default=None)
+# Task whose agent makes the LLM calls of the current thread
+current_stage = contextvars.ContextVar("current_stage", default=None)
+
+_call_ids = itertools.count(1)
+
+
+class GenerationAborted(RuntimeError):
+    """A streamed generation was stopped before its end by a guard or ``TokenSink.abort``"""
+
+
+class TokenSink:
+    """Destination of the streamed LLM calls made for one part of a run: a section, or the research.
+
+    ``emit`` receives every event, from the threads making the calls.
+    ``guard`` is called with the Generation after each of its deltas, and
+    aborts it by returning False; ``abort()`` aborts the generation in
+    progress at its next delta. Either way the call raises
+    GenerationAborted, and the abort is final for the task making it: the
+    agent retries a failed call, but the retries of an aborted task are
+    refused before reaching the provider, so its task fails (like a task
+    past its deadline).
+    """
+
+    def __init__(self, emit, section=None, guard=None):
+        self.emit = emit
+        self.section = section
+        self.guard = guard
+        self._abort = threading.Event()
+        self._aborted_stages = set()
+
+    def abort(self):
+        self._abort.set()
+
+    @contextmanager
+    def generation(self):
+        """Stream one LLM call: push its deltas to the yielded Generation"""
+        generation = Generation(self)
+        if generation.stage in self._aborted_stages:
+            raise GenerationAborted(f"{generation.stage} was aborted")
+        try:
+            yield generation
+        except GenerationAborted as e:
+            logger.warning(f"✋ Generation {generation.call} of {generation.stage} aborted: {e}")
+            self._aborted_stages.add(generation.stage)
+            generation.end("aborted")
+            raise
+        except BaseException:
+            generation.end("failed")
+            raise
+        generation.end("completed")
+
+
+class Generation:
+    """Text streamed by one LLM call so far"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.call = next(_call_ids)
+        self.stage = current_stage.get()
+        self.characters = 0
+        self._parts = []
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def push(self, delta):
+        if not delta:
+            return
+        self._parts.append(delta)
+        self.characters += len(delta)
+        self.sink.emit({"type": "token", "section": self.sink.section, "stage": self.stage,
+                        "call": self.call, "delta": delta})
+        if self.sink._abort.is_set():
+            self.sink._abort.clear()
+            raise GenerationAborted("aborted by the caller")
+        if self.sink.guard is not None and self.sink.guard(self) is False:
+            raise GenerationAborted("rejected by the guard")
+
+    def end(self, status):
+        self.sink.emit({"type": "generation", "section": self.sink.section, "stage": self.stage,
+                        "call": self.call, "status": status, "tokens": self.characters // CHARS_PER_TOKEN})
+
+
+def repetition_guard(max_repeated_lines=None):
+    """Guard aborting a generation stuck repeating the same line, or None when disabled"""
+    limit = STREAMING_CONFIG["max_repeated_lines"] if max_repeated_lines is None else max_repeated_lines
+    if limit <= 0:
+        return None
+
+    def guard(generation):
+        # Only a delta ending a line can complete a repetition
+        if "\n" not in generation._parts[-1]:
+            return True
+        lines = [line.strip() for line in generation.text.splitlines()[-limit * 2:] if line.strip()]
+        return len(lines) < limit or len(set(lines[-limit:])) > 1
+
+    return guard
+
+
+@contextmanager
+def streaming_to(sink):
+    """Stream the LLM calls made in this block (and the crews it kicks off) to ``sink``"""
+    token = token_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        token_sink.reset(token)
+
+
+# Tasks run in their own thread, which reports the task it works on
+@crewai_event_bus.on(TaskStartedEvent)
+def _on_task_started(source, event):
+    current_stage.set(getattr(source, "name", None))
+
+
+class LiveView:
+    """Live progress of a run, drawn from its events.
+
+    On a terminal one line per part being generated (the research, or a
+    section) shows its stage, its streamed tokens and the end of its text,
+    redrawn in place; otherwise a line is printed when a part starts a
+    stage or a section is added to the report.
+    """
+
+    def __init__(self, out=None, refresh_seconds=None):
+        self.out = out or sys.stderr
+        self.tty = self.out.isatty()
+        self.refresh_seconds = STREAMING_CONFIG["refresh_seconds"] if refresh_seconds is None else refresh_seconds
+        self.parts = {}
+        self.sections = None
+        self.done = 0
+        self._drawn = 0
+        self._last_draw = 0.0
+
+    def update(self, event):
+        kind = event["type"]
+        if kind == "planned":
+            self.sections = event["sections"]
+            self.parts.pop(None, None)
+        elif kind == "section":
+            self.done += 1
+            self.parts.pop(event["index"], None)
+            self._print(f"{'✅' if event.get('status') != 'skipped' else '⚠️'} Section {event['index']} "
+                        f"{event.get('title', '')} ({self.done}/{self.sections})")
+        elif kind in ("token", "generation"):
+            part = self.parts.setdefault(event["section"], {"stage": None, "tokens": 0, "tail": ""})
+            if kind == "generation":
+                part["status"] = event["status"]
+                return
+            if part["stage"] != event["stage"]:
+                part.update(stage=event["stage"], tokens=0, tail="")
+                if not self.tty:
+                    self._print(f"✍️ {self._label(event['section'])}: {event['stage']}")
+            part["status"] = "streaming"
+            part["tokens"] += len(event["delta"]) / CHARS_PER_TOKEN
+            part["tail"] = (part["tail"] + event["delta"])[-200:]
+        elif kind == "report":
+            self._print(f"📄 Report written to {event.get('report_path')}")
+        elif kind == "failed":
+            self._print(f"❌ {event['error']}")
+        self.draw()
+
+    def draw(self, force=False):
+        if not self.tty or (not force and time.monotonic() - self._last_draw < self.refresh_seconds):
+            return
+        self._last_draw = time.monotonic()
+        lines = []
+        for section, part in sorted(self.parts.items(), key=lambda item: (item[0] is not None, item[0] or 0)):
+            tail = " ".join(part["tail"].split())[-60:]
+            lines.append(f"{self._label(section):>12} {part['stage'] or '':<24} {part['tokens']:7.0f} tok "
+                         f"{part.get('status', ''):<9} …{tail}")
+        self._clear()
+        for line in lines:
+            self.out.write(line[:160] + "\n")
+        self._drawn = len(lines)
+        self.out.flush()
+
+    def finish(self):
+        if self.tty:
+            self._clear()
+            self.out.flush()
+
+    def _label(self, section):
+        return "research" if section is None else f"section {section}"
+
+    def _clear(self):
+        # Up to the first line of the previous drawing, erasing everything below it
+        if self._drawn:
+            self.out.write(f"\x1b[{self._drawn}F\x1b[J")
+        self._drawn = 0
+
+    def _print(self, line):
+        if self.tty:
+            self._clear()
+            # Redraw the parts below the printed line at the next event
+            self._last_draw = 0.0
+        self.out.write(line + "\n")
+        self.out.flush()
+
+
+async def render_live(events, view=None):
+    """Draw the events of ``ReportingFlow.section_events()`` as they arrive, until the run ends"""
+    view = view or LiveView()
+    async for event in events:
+        view.update(event)
+    view.finish()
+    return view
+
+
+def completion_usage(messages, text):
+    """Estimated usage of a call whose provider did not report one (or of a stream that was aborted)"""
+    prompt_tokens = estimate_tokens(messages)
+    completion_tokens = estimate_tokens(text)
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens, prompt_tokens_details=None)
@@ -0,0 +1,3 @@
+from .cached_search_tool import CachedSerperDevTool
+
+__all__ = ["CachedSerperDevTool"]
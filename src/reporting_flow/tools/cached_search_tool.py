@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+from crewai_tools import SerperDevTool
+from pydantic import PrivateAttr
+
+from ..cache import ResponseCache, make_cache_key
+from ..config import SEARCH_CACHE_CONFIG
+from ..offline import synthetic_search_results
+
+logger = logging.getLogger("report_flow")
+
+# Date qualifiers the researcher adds to otherwise identical queries ("2024", "latest", ...)
+DATE_QUALIFIERS = re.compile(r"\b(?:19|20)\d{2}\b|\b(?:recent|latest|newest|current|today|this year)\b")
+
+
+def normalize_query(query, ignore_date_qualifiers=False):
+    """Normalize a search query so that trivially different queries share a cache entry"""
+    query = query.lower()
+    if ignore_date_qualifiers:
+        query = DATE_QUALIFIERS.sub(" ", query)
+    query = re.sub(r"[^\w\s\-]", " ", query)
+    return " ".join(query.split())
+
+
+class CachedSerperDevTool(SerperDevTool):
+    """SerperDevTool with a persistent result cache and in-flight request deduplication.
+
+    Raw Serper responses are stored per normalized query, so repeated and
+    overlapping queries are answered locally. Identical queries issued
+    concurrently by different agents share a single request. In offline
+    mode results only come from the cache or the fixture directory and the
+    network is never touched; with ``synthetic`` the other queries get
+    generated results after ``synthetic_latency_seconds``.
+    """
+
+    cache: Optional[Any] = None
+    offline: bool = False
+    fixtures_dir: Optional[str] = None
+    record_fixtures: bool = False
+    ignore_date_qualifiers: bool = False
+    synthetic: bool = False
+    synthetic_latency_seconds: float = 0.0
+
+    _inflight: Dict[str, Future] = PrivateAttr(default_factory=dict)
+    _inflight_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def _fixture_path(self, key):
+        return os.path.join(self.fixtures_dir, f"{key}.json")
+
+    def _load_fixture(self, key):
+        if not self.fixtures_dir or not os.path.exists(self._fixture_path(key)):
+            return None
+        with open(self._fixture_path(key)) as f:
+            return json.load(f)
+
+    def _save_fixture(self, key, query, results):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        with open(self._fixture_path(key), "w") as f:
+            json.dump({"query": query, "results": results}, f, indent=2)
+
+    def _fetch(self, key, search_query, search_type):
+        """Look the query up locally, falling back to the Serper API when online"""
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return json.loads(cached)
+
+        fixture = self._load_fixture(key)
+        if fixture is not None:
+            return fixture["results"]
+
+        if self.offline:
+            if self.synthetic:
+                time.sleep(self.synthetic_latency_seconds)
+                return synthetic_search_results(search_query, self.n_results)
+            logger.warning(f"🔌 Offline search has no recorded results for: {search_query}")
+            return {}
+
+        results = super()._make_api_request(search_query, search_type)
+        if self.cache is not None:
+            self.cache.set(key, json.dumps(results))
+        if self.record_fixtures and self.fixtures_dir:
+            self._save_fixture(key, search_query, results)
+        return results
+
+    def _make_api_request(self, search_query: str, search_type: str) -> dict:
+        normalized = normalize_query(search_query, self.ignore_date_qualifiers)
+        key = make_cache_key(normalized, search_type, self.n_results)
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            logger.info(f"🔁 Joining in-flight search for: {search_query}")
+            return future.result()
+
+        try:
+            future.set_result(self._fetch(key, search_query, search_type))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+
+search_cache = ResponseCache(
+    SEARCH_CACHE_CONFIG["path"],
+    ttl_seconds=SEARCH_CACHE_CONFIG["ttl_seconds"],
+    max_bytes=SEARCH_CACHE_CONFIG["max_bytes"],
+) if SEARCH_CACHE_CONFIG["enabled"] else None
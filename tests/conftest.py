@@ -0,0 +1,54 @@
+"""Tests run offline: every LLM call is answered by the stand-in LLM, and no cache or store outlives a test.
+
+The environment is set before the package is imported, since config.py
+reads it at import time.
+"""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.update({
+    "REPORTING_LLM_STAND_IN": "1",
+    "REPORTING_LLM_STAND_IN_LATENCY": "0",
+    "REPORTING_LLM_STAND_IN_SECTIONS": "3",
+    "REPORTING_LLM_CACHE": "0",
+    "REPORTING_SEARCH_CACHE": "0",
+    "REPORTING_SECTION_STORE": "0",
+    "REPORTING_REPORT_OUTPUT_TOKENS": "0",
+})
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A temporary working directory, where runs write their output folder"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable time.time(), so that expiry and recency do not depend on the real clock"""
+    class Clock:
+        now = 1_000_000.0
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    fake = Clock()
+    monkeypatch.setattr("time.time", lambda: fake.now)
+    return fake
+
+
+def plan_section(title, outline=("Background", "Current state", "Outlook")):
+    """A plan section as the planner writes it"""
+    return {
+        "title": title,
+        "high_level_goal": f"Explain {title}",
+        "why_important": "Readers need it",
+        "sources": [f"https://example.com/{title.replace(' ', '-').lower()}"],
+        "content_outline": list(outline),
+    }
@@ -0,0 +1,37 @@
+from src.reporting_flow.cache import ResponseCache, make_cache_key
+
+
+def test_cache_key_depends_on_content_not_order_of_keys():
+    assert make_cache_key({"a": 1, "b": 2}) == make_cache_key({"b": 2, "a": 1})
+    assert make_cache_key({"a": 1}) != make_cache_key({"a": 2})
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.set("key", "value")
+    clock.advance(59)
+    assert cache.get("key") == "value"
+    clock.advance(2)
+    assert cache.get("key") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 0, "bytes": 0}
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=10)
+    cache.set("a", "aaaaa")
+    clock.advance(1)
+    cache.set("b", "bbbbb")
+    clock.advance(1)
+    assert cache.get("a") == "aaaaa"
+    clock.advance(1)
+    cache.set("c", "ccccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaaa"
+    assert cache.get("c") == "ccccc"
+    assert cache.stats()["bytes"] == 10
+
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path).set("key", "value")
+    assert ResponseCache(path).get("key") == "value"
@@ -0,0 +1,18 @@
+from src.reporting_flow.checkpoint import CheckpointStore
+
+
+def test_step_is_reused_only_with_the_same_inputs(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save("research", {"topic": "AI"}, {"raw": "plan"})
+    assert store.load("research", {"topic": "AI"}) == {"raw": "plan"}
+    assert store.load("research", {"topic": "Quantum"}) is None
+    assert store.load("section_1", {"topic": "AI"}) is None
+
+
+def test_checkpoints_survive_the_process_and_can_be_discarded(tmp_path):
+    CheckpointStore(str(tmp_path)).save("research", {"topic": "AI"}, {"raw": "plan"})
+    store = CheckpointStore(str(tmp_path))
+    assert store.load("research", {"topic": "AI"}) == {"raw": "plan"}
+    store.discard("research")
+    assert CheckpointStore(str(tmp_path)).load("research", {"topic": "AI"}) is None
+    assert not (tmp_path / "checkpoint.json.tmp").exists()
@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.reporting_flow.config import PIPELINE_CONFIG
+from src.reporting_flow.crew_pool import CrewPool
+from src.reporting_flow.main import ReportingFlow
+
+
+def test_idle_crews_are_reused_and_failed_ones_dropped():
+    pool = CrewPool(lambda: SimpleNamespace(tasks=[]))
+    with pool.checkout() as first:
+        pass
+    with pool.checkout() as second:
+        assert second is first
+    with pytest.raises(RuntimeError):
+        with pool.checkout():
+            raise RuntimeError("kickoff failed")
+    assert pool.stats() == {"created": 1, "idle": 0}
+
+
+def test_tasks_skipped_on_a_reused_crew_have_no_wall_time(workdir, monkeypatch):
+    def writer_tasks(review_min_words):
+        monkeypatch.setitem(PIPELINE_CONFIG, "review_min_words", review_min_words)
+        flow = ReportingFlow(input_variables={"topic": "Robotics", "audience_level": "Expert"},
+                             pipeline_profile="review_if_needed")
+        asyncio.run(flow.kickoff_async())
+        return [(task["task"], task["wall_seconds"])
+                for crew in flow.metrics.crews if crew["crew"] == "content_writer" for task in crew["tasks"]]
+
+    # Every draft is reviewed, then the same crews skip the editor and reviewer
+    assert all(seconds is not None for _, seconds in writer_tasks(100_000))
+    tasks = writer_tasks(0)
+    assert tasks and all((seconds is None) == task.startswith("conditional_") for task, seconds in tasks)
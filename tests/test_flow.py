@@ -0,0 +1,87 @@
+"""The whole flow, with the stand-in LLM writing a plan of three sections ("<topic>: part N")"""
+import asyncio
+import json
+import os
+
+from src.reporting_flow.incremental import SECTIONS_FILE
+from src.reporting_flow.main import ReportingFlow
+from src.reporting_flow.offline import stand_in_llm
+
+INPUTS = {"topic": "Prompt engineering", "audience_level": "Expert"}
+
+
+def run_flow(**kwargs):
+    """Kick a flow off; returns it, its result, the events it yielded and the LLM calls it made"""
+    flow = ReportingFlow(input_variables=INPUTS, **kwargs)
+    calls = stand_in_llm().stats()["calls"]
+
+    async def run():
+        kickoff = asyncio.create_task(flow.kickoff_async())
+        events = [event async for event in flow.section_events()]
+        return await kickoff, events
+
+    result, events = asyncio.run(run())
+    return flow, result, events, stand_in_llm().stats()["calls"] - calls
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_report_has_every_section_in_plan_order(workdir):
+    flow, result, events, calls = run_flow()
+    report = read(result["report_path"])
+    positions = [report.index(f"Prompt engineering: part {n}", report.index("---")) for n in (1, 2, 3)]
+    assert positions == sorted(positions)
+    assert [event["type"] for event in events][:2] == ["started", "planned"]
+    assert [(event["index"], event["status"]) for event in events if event["type"] == "section"] == \
+        [(1, "written"), (2, "written"), (3, "written")]
+    assert events[-1]["type"] == "report"
+    # The researcher and planner, then the writer, editor and reviewer of each section
+    assert calls == 2 + 3 * 3
+
+
+def test_resuming_a_run_reuses_its_checkpointed_steps(workdir):
+    flow, result, _, _ = run_flow()
+    report = read(result["report_path"])
+    resumed, resumed_result, _, calls = run_flow(run_id=flow.run.run_id)
+    assert calls == 0
+    assert resumed_result["report_path"] == result["report_path"]
+    assert read(resumed_result["report_path"]) == report
+
+
+def test_incremental_run_only_writes_the_edited_sections(workdir):
+    flow, _, _, _ = run_flow()
+    plan_path = os.path.join(flow.run.run_dir, SECTIONS_FILE)
+    plan = json.loads(read(plan_path))
+    plan["sections"][1]["content_outline"].append("A new point")
+    edited_path = os.path.join(workdir, "edited_plan.json")
+    with open(edited_path, "w") as f:
+        json.dump(plan, f)
+
+    incremental, result, events, calls = run_flow(incremental_from=flow.run.run_id, plan_path=edited_path)
+    assert incremental.section_reuse.reused_sections == 2
+    assert calls == 3  # writer, editor and reviewer of the edited section
+    assert [event["status"] for event in events if event["type"] == "section"] == ["written"] * 3
+
+
+def test_an_aborted_section_is_skipped_without_retrying_its_task(workdir):
+    def guard(generation):
+        return not (generation.sink.section == 1 and generation.stage == "writing_task")
+
+    _, _, events, _ = run_flow(stream_tokens=True, token_guard=guard)
+    generations = [event for event in events if event["type"] == "generation" and event["section"] == 1]
+    assert [(event["stage"], event["status"]) for event in generations] == [("writing_task", "aborted")]
+    assert [(event["index"], event["status"]) for event in events if event["type"] == "section"] == \
+        [(1, "skipped"), (2, "written"), (3, "written")]
+
+
+def test_token_events_are_only_queued_for_a_running_iteration(workdir):
+    flow = ReportingFlow(input_variables=INPUTS, stream_tokens=True)
+    asyncio.run(flow.kickoff_async())
+    queued = []
+    while not flow.events._queue.empty():
+        queued.append(flow.events._queue.get_nowait()["type"])
+    assert "token" not in queued
+    assert queued.count("generation") == 2 + 3 * 3
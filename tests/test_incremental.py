@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from src.reporting_flow.crews.reporting_research.reporting_research_crew import Section
+from src.reporting_flow.incremental import (
+    SECTIONS_FILE, PreviousRun, load_plan, run_directory, section_hash, sections_record,
+)
+
+from .conftest import plan_section
+
+
+def test_section_hash_ignores_the_format_of_the_section():
+    section = plan_section("Part 1")
+    digest = section_hash(section, "Expert")
+    assert section_hash(Section.model_validate(section), "Expert") == digest
+    assert section_hash(json.dumps(section), "Expert") == digest
+    assert section_hash({**section, "notes": "not part of the plan"}, "Expert") == digest
+
+
+def test_section_hash_changes_with_the_plan_entry_and_the_audience():
+    section = plan_section("Part 1")
+    digest = section_hash(section, "Expert")
+    assert section_hash(section, "Beginner") != digest
+    assert section_hash({**section, "content_outline": ["Background"]}, "Expert") != digest
+
+
+@pytest.mark.parametrize("run_id", ["", ".", "..", "../elsewhere", "a/b", "a\\b", "/tmp"])
+def test_run_ids_that_are_not_run_directory_names_are_refused(tmp_path, run_id):
+    with pytest.raises(ValueError):
+        run_directory(run_id, output_dir=str(tmp_path))
+
+
+def test_missing_runs_are_refused(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        run_directory("no_such_run", output_dir=str(tmp_path))
+
+
+def write_run(tmp_path, sections, written):
+    run_dir = tmp_path / "run"
+    (run_dir / "sections").mkdir(parents=True)
+    section_files = {}
+    for i in written:
+        section_files[i] = os.path.join("sections", f"{i + 1:02d}.md")
+        (run_dir / section_files[i]).write_text(f"Section {i + 1}")
+    (run_dir / SECTIONS_FILE).write_text(json.dumps(sections_record("AI", "Expert", sections, section_files)))
+    return run_dir
+
+
+def test_previous_run_finds_its_sections_written_in_full(tmp_path):
+    sections = [plan_section("Part 1"), plan_section("Part 2")]
+    run_dir = write_run(tmp_path, sections, written=[0])
+    previous = PreviousRun("run", output_dir=str(tmp_path))
+    assert previous.find(section_hash(sections[0], "Expert")) == str(run_dir / "sections" / "01.md")
+    assert previous.find(section_hash(sections[1], "Expert")) is None
+    assert previous.find(section_hash(sections[0], "Beginner")) is None
+
+
+def test_a_run_sections_file_is_a_plan(tmp_path):
+    sections = [plan_section("Part 1"), plan_section("Part 2")]
+    run_dir = write_run(tmp_path, sections, written=[0, 1])
+    assert [section.title for section in load_plan(str(run_dir / SECTIONS_FILE))] == ["Part 1", "Part 2"]
@@ -0,0 +1,55 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+from src.reporting_flow.llm_config import ReportingLLM
+from src.reporting_flow.streaming import TokenSink, streaming_to
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Parameters of the completions sent to litellm, answered with "Paris" (in two chunks when streamed)"""
+    requests = []
+
+    def completion(**params):
+        requests.append(params)
+        time.sleep(0.001)
+        print("LiteLLM.Info: If you need to debug this error, use `litellm.set_verbose=True`")
+        if params["stream"]:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+                         for text in ("Par", "is")])
+        return litellm.ModelResponse(choices=[litellm.Choices(message=litellm.Message(content="Paris"))])
+
+    monkeypatch.setattr(litellm, "completion", completion)
+    return requests
+
+
+def messages():
+    return [{"role": "system", "content": "You are a geographer"}, {"role": "user", "content": "Capital of France?"}]
+
+
+@pytest.mark.parametrize("model", ["openai/gpt-4o-mini", "openai/o1-mini"])
+def test_streamed_completions_send_the_request_of_crewai(sent, model):
+    llm = ReportingLLM(model=model, api_key="key", temperature=0.2, max_tokens=300, stop=["Observation:"])
+    assert llm.call(messages()) == "Paris"
+    events = []
+    with streaming_to(TokenSink(events.append)):
+        assert llm.call(messages()) == "Paris"
+    buffered, streamed = sent
+    assert streamed.pop("stream_options") == {"include_usage": True}
+    assert {**streamed, "stream": False} == buffered == llm.completion_params(buffered["messages"])
+    assert [event["type"] for event in events] == ["token", "token", "generation"]
+
+
+def test_concurrent_calls_leave_the_output_streams_as_they_found_them(sent, capsys):
+    stdout, stderr = sys.stdout, sys.stderr
+    llm = ReportingLLM(model="openai/gpt-4o-mini", api_key="key")
+    with ThreadPoolExecutor(8) as executor:
+        assert set(executor.map(lambda _: llm.call(messages()), range(64))) == {"Paris"}
+    assert (sys.stdout, sys.stderr) == (stdout, stderr)
+    # litellm's noise is filtered out while calls are in flight
+    assert "LiteLLM.Info" not in capsys.readouterr().out
@@ -0,0 +1,25 @@
+import re
+
+from src.reporting_flow.metrics import RunMetrics
+from src.reporting_flow.run_context import RunContext
+
+LABEL = r'[a-z_]+="((?:[^"\\\n]|\\[\\"n])*)"'
+SAMPLE = re.compile(rf"^[a-z_]+\{{{LABEL}(?:,{LABEL})*\}} [0-9.e+-]+$")
+
+
+def unescape(value):
+    return re.sub(r"\\(.)", lambda m: {"n": "\n"}.get(m.group(1), m.group(1)), value)
+
+
+def test_openmetrics_label_values_are_escaped(tmp_path):
+    run = RunContext.create({"topic": 'The "best" prompts', "audience_level": "Expert"}, output_dir=str(tmp_path))
+    metrics = RunMetrics(run.run_id)
+    metrics.start_stage('plan "v2"\\draft\nfinal')
+    metrics.end_stage('plan "v2"\\draft\nfinal')
+    text = metrics.to_openmetrics()
+    samples = [line for line in text.splitlines() if not line.startswith("#")]
+    assert samples and all(SAMPLE.match(line) for line in samples)
+    assert text.endswith("# EOF\n")
+    stage = next(line for line in samples if line.startswith("reporting_stage_wall_seconds"))
+    run_label, stage_label = [unescape(value) for value in re.findall(r'="((?:[^"\\]|\\.)*)"', stage)]
+    assert (run_label, stage_label) == (run.run_id, 'plan "v2"\\draft\nfinal')
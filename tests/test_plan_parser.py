@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from src.reporting_flow.plan_parser import PlanParseError, find_json_objects, parse_plan, repair_json
+
+from .conftest import plan_section
+
+PLAN = {"sections": [plan_section("Part 1"), plan_section("Part 2"), plan_section("Part 3")],
+        "primary_audience": "Engineers", "executive_summary": "Three parts"}
+CLEAN = json.dumps(PLAN, indent=2)
+
+
+def titles(parsed):
+    return [section.title for section in parsed.sections]
+
+
+def test_clean_plan():
+    parsed = parse_plan(CLEAN)
+    assert titles(parsed) == ["Part 1", "Part 2", "Part 3"]
+    assert parsed.plan is not None and parsed.issues == []
+
+
+def test_plan_in_a_code_fence_with_prose_around_it():
+    parsed = parse_plan(f"Here is the plan:\n```json\n{CLEAN}\n```\nLet me know if {{anything}} is missing.")
+    assert titles(parsed) == ["Part 1", "Part 2", "Part 3"]
+
+
+def test_trailing_commas_and_python_literals_are_repaired():
+    damaged = CLEAN.replace('"Outlook"\n', '"Outlook",\n').replace(
+        '"executive_summary"', '"reviewed": True, "secondary_audiences": None, "executive_summary"')
+    parsed = parse_plan(damaged)
+    assert len(parsed.sections) == 3
+    assert parsed.issues == ["repaired JSON"]
+    assert json.loads(repair_json('{"a": True, "b": False, "c": None, "d": [1, 2,],}')) == \
+        {"a": True, "b": False, "c": None, "d": [1, 2]}
+
+
+def test_truncated_plan_keeps_its_complete_sections():
+    parsed = parse_plan(CLEAN[: CLEAN.index("Part 3") + 20])
+    assert titles(parsed)[:2] == ["Part 1", "Part 2"]
+    assert "truncated output" in parsed.issues
+
+
+@pytest.mark.parametrize("prose", [
+    "Here is the plan { as promised:\n",
+    'Use the "{" character in titles.\n',
+    'An open { brace and an "unclosed quote\n',
+])
+def test_stray_braces_and_quotes_in_the_prose_do_not_hide_the_plan(prose):
+    assert titles(parse_plan(prose + CLEAN + "\nThanks")) == ["Part 1", "Part 2", "Part 3"]
+
+
+def test_the_candidate_with_the_most_sections_wins():
+    draft = json.dumps({"sections": [plan_section("Draft")]})
+    assert titles(parse_plan(f"First draft:\n{draft}\nFinal plan:\n{CLEAN}")) == ["Part 1", "Part 2", "Part 3"]
+
+
+def test_invalid_sections_are_dropped():
+    plan = {"sections": [plan_section("Part 1"), {"high_level_goal": "no title"}]}
+    parsed = parse_plan(json.dumps(plan))
+    assert titles(parsed) == ["Part 1"]
+    assert parsed.dropped_sections == 1
+
+
+def test_sections_outside_of_a_plan_object():
+    parsed = parse_plan(json.dumps(plan_section("Alone")) + "\n" + json.dumps(plan_section("Together")))
+    assert titles(parsed) == ["Alone", "Together"]
+
+
+def test_output_without_sections_raises():
+    with pytest.raises(PlanParseError):
+        parse_plan("I could not come up with a plan {sorry}.")
+
+
+def test_braces_in_strings_are_not_objects():
+    text = 'prose {"a": "}{"} more {"b": 1'
+    assert list(find_json_objects(text)) == [(6, 17, True), (23, len(text), False)]
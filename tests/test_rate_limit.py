@@ -0,0 +1,93 @@
+import threading
+import time
+
+import pytest
+
+from src.reporting_flow.rate_limit import AdaptiveConcurrencyLimit, ProviderRateLimiter, TokenBucket
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_token_bucket_waits_for_the_refill():
+    bucket = TokenBucket(600)  # 10 tokens per second
+    bucket.acquire(600)
+    started = time.monotonic()
+    bucket.acquire(3)
+    assert 0.2 <= time.monotonic() - started < 1.0
+
+
+def test_token_bucket_adjustments_are_capped_at_its_capacity():
+    bucket = TokenBucket(60)
+    bucket.acquire(60)
+    bucket.adjust(1000)
+    assert bucket.tokens == 60
+    bucket.adjust(-100)
+    assert bucket.tokens < 0
+
+
+def test_concurrency_limit_is_halved_on_rate_limits_and_grows_back_slowly():
+    limit = AdaptiveConcurrencyLimit(8)
+    limit.on_rate_limited()
+    limit.on_rate_limited()
+    assert limit.limit == 2
+    limit.on_success()
+    assert limit.limit == 2.5
+    for _ in range(100):
+        limit.on_success()
+    assert limit.limit == 8
+
+
+def test_concurrency_limit_blocks_beyond_its_limit():
+    limit = AdaptiveConcurrencyLimit(1)
+    limit.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    limit.release()
+    assert acquired.wait(1)
+    waiter.join()
+
+
+def test_rate_limited_calls_are_retried_with_a_smaller_limit():
+    limiter = ProviderRateLimiter("test", 6000, 10**6, max_concurrency=4, base_backoff_seconds=0)
+    answers = iter([RateLimitError("slow down"), "done"])
+
+    def call():
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert limiter.run(call, 10) == "done"
+    assert limiter.stats()["rate_limited"] == 1
+    assert limiter.concurrency.limit < 4
+    assert limiter.concurrency.in_flight == 0
+
+
+def test_other_errors_are_not_retried():
+    limiter = ProviderRateLimiter("test", 6000, 10**6, base_backoff_seconds=0)
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter.run(call, 10)
+    assert len(calls) == 1
+
+
+def test_the_slot_is_released_whatever_the_call_raises():
+    limiter = ProviderRateLimiter("test", 6000, 10**6, max_concurrency=1)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    for _ in range(3):
+        with pytest.raises(KeyboardInterrupt):
+            limiter.run(interrupted, 10)
+    assert limiter.concurrency.in_flight == 0
+    assert limiter.run(lambda: "ok", 10) == "ok"
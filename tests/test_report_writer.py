@@ -0,0 +1,59 @@
+import asyncio
+import os
+
+from src.reporting_flow.artifacts import ArtifactStore
+from src.reporting_flow.report_writer import StreamingReportWriter, section_filename
+from src.reporting_flow.run_context import RunContext
+
+
+def make_writer(tmp_path, titles, events):
+    run = RunContext.create({"topic": "AI", "audience_level": "Expert"}, output_dir=str(tmp_path))
+    artifacts = ArtifactStore(run, debug_level="none")
+    writer = StreamingReportWriter(run, artifacts, "AI", "Expert", titles, on_event=events.append)
+    return run, writer
+
+
+def section_path(run, i, title):
+    return os.path.join(run.sections_dir, section_filename(i, title))
+
+
+def test_sections_finishing_out_of_order_are_written_in_plan_order(tmp_path):
+    titles = ["One", "Two", "Three"]
+    events = []
+    run, writer = make_writer(tmp_path, titles, events)
+    writer.add(2, "Third section", section_path(run, 2, "Three"))
+    writer.add(1, "Second section", section_path(run, 1, "Two"))
+    assert events == []
+    writer.add(0, "First section", section_path(run, 0, "One"))
+    assert [event["index"] for event in events] == [1, 2, 3]
+
+    result = asyncio.run(writer.finish())
+    with open(result["report_path"]) as f:
+        report = f.read()
+    assert report.index("First section") < report.index("Second section") < report.index("Third section")
+    assert events[-1]["type"] == "report"
+
+
+def test_skipped_sections_leave_the_report_and_its_table_of_contents(tmp_path):
+    titles = ["One", "Two", "Three"]
+    events = []
+    run, writer = make_writer(tmp_path, titles, events)
+    writer.add(0, "First section", section_path(run, 0, "One"))
+    writer.skip(1)
+    writer.add(2, "Third section", section_path(run, 2, "Three"))
+
+    result = asyncio.run(writer.finish())
+    with open(result["report_path"]) as f:
+        report = f.read()
+    assert "1. [One]" in report and "2. [Three]" in report and "Two" not in report
+    assert report.index("First section") < report.index("Third section")
+    assert [event.get("status") for event in events] == ["written", "skipped", "written", None]
+
+
+def test_sections_never_handed_over_are_skipped_at_the_end(tmp_path):
+    events = []
+    run, writer = make_writer(tmp_path, ["One", "Two"], events)
+    writer.add(0, "First section", section_path(run, 0, "One"))
+    asyncio.run(writer.finish())
+    assert [(event["type"], event.get("status")) for event in events] == \
+        [("section", "written"), ("section", "skipped"), ("report", None)]
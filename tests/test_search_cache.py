@@ -0,0 +1,49 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from crewai_tools import SerperDevTool
+
+from src.reporting_flow.cache import ResponseCache
+from src.reporting_flow.tools.cached_search_tool import CachedSerperDevTool, normalize_query
+
+
+def serper(monkeypatch, seconds=0.0):
+    """Replace the Serper API with a counted answer after ``seconds``; returns the list of queries sent"""
+    sent = []
+    lock = threading.Lock()
+
+    def request(self, search_query, search_type):
+        with lock:
+            sent.append(search_query)
+        time.sleep(seconds)
+        return {"organic": [{"title": search_query}]}
+
+    monkeypatch.setattr(SerperDevTool, "_make_api_request", request)
+    return sent
+
+
+def test_queries_differing_in_case_and_punctuation_share_a_key():
+    assert normalize_query("Prompt  Engineering, for LLMs?") == normalize_query("prompt engineering for llms")
+
+
+def test_date_qualifiers_are_kept_unless_ignored():
+    assert normalize_query("latest LLM agents 2024") != normalize_query("LLM agents")
+    assert normalize_query("latest LLM agents 2024", ignore_date_qualifiers=True) == normalize_query("LLM agents")
+
+
+def test_repeated_queries_are_answered_from_the_cache(tmp_path, monkeypatch):
+    sent = serper(monkeypatch)
+    tool = CachedSerperDevTool(n_results=3, cache=ResponseCache(str(tmp_path / "search.sqlite")))
+    first = tool._make_api_request("LLM agents", "search")
+    assert tool._make_api_request("llm agents!", "search") == first
+    assert sent == ["LLM agents"]
+
+
+def test_concurrent_identical_queries_share_one_request(monkeypatch):
+    sent = serper(monkeypatch, seconds=0.2)
+    tool = CachedSerperDevTool(n_results=3)
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: tool._make_api_request("LLM agents", "search"), range(4)))
+    assert sent == ["LLM agents"]
+    assert all(result == results[0] for result in results)
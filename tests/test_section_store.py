@@ -0,0 +1,47 @@
+from src.reporting_flow.section_store import SectionStore
+
+from .conftest import plan_section
+
+
+def test_nearest_section_is_the_most_similar(tmp_path):
+    store = SectionStore(str(tmp_path / "sections.sqlite"))
+    store.add(plan_section("Prompt engineering basics"), "Prompt engineering", "Expert", "# Basics", "run-1")
+    store.add(plan_section("Quantum error correction"), "Quantum computing", "Expert", "# Qubits", "run-1")
+    match = store.nearest(plan_section("Prompt engineering basics for LLMs"), "Prompt engineering")
+    assert match.title == "Prompt engineering basics"
+    assert match.markdown == "# Basics"
+    assert 0.5 < match.similarity < 1
+
+
+def test_an_identical_section_matches_fully(tmp_path):
+    store = SectionStore(str(tmp_path / "sections.sqlite"))
+    store.add(plan_section("Part 1"), "AI", "Expert", "# Part 1", "run-1")
+    assert store.nearest(plan_section("Part 1"), "AI").similarity == 1
+
+
+def test_sections_of_the_run_asking_are_excluded(tmp_path):
+    store = SectionStore(str(tmp_path / "sections.sqlite"))
+    store.add(plan_section("Part 1"), "AI", "Expert", "# Part 1", "run-1")
+    assert store.nearest(plan_section("Part 1"), "AI", exclude_run="run-1") is None
+
+
+def test_nothing_matches_without_a_shared_term(tmp_path):
+    store = SectionStore(str(tmp_path / "sections.sqlite"))
+    store.add(plan_section("Part 1"), "AI", "Expert", "# Part 1", "run-1")
+    assert store.nearest("zebra", "giraffe") is None
+
+
+def test_the_oldest_sections_are_dropped_beyond_max_entries(tmp_path, clock):
+    store = SectionStore(str(tmp_path / "sections.sqlite"), max_entries=2)
+    for title in ("Alpha topic", "Beta topic", "Gamma topic"):
+        clock.advance(1)
+        store.add(plan_section(title), "Greek", "Expert", f"# {title}", "run-1")
+    assert store.stats()["entries"] == 2
+    assert store.nearest(plan_section("Alpha topic"), "Greek").title != "Alpha topic"
+
+
+def test_the_index_is_rebuilt_when_the_store_is_opened_again(tmp_path):
+    path = str(tmp_path / "sections.sqlite")
+    SectionStore(path).add(plan_section("Part 1"), "AI", "Expert", "# Part 1", "run-1")
+    match = SectionStore(path).nearest(plan_section("Part 1"), "AI")
+    assert (match.run_id, match.audience_level, match.markdown) == ("run-1", "Expert", "# Part 1")
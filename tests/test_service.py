@@ -0,0 +1,149 @@
+"""Job submissions, the SQLite job queue and the HTTP service running jobs on the stand-in LLM"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.reporting_flow.incremental import SECTIONS_FILE
+from src.reporting_flow.jobs import JobQueue
+from src.reporting_flow.run_context import OUTPUT_DIR
+from src.reporting_flow.service import HTTPError, ReportService, job_inputs
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    yield queue
+    queue.close()
+
+
+def test_job_inputs_keep_the_known_fields():
+    assert job_inputs({"topic": "Robotics", "audience_level": "Beginner", "pipeline_profile": "single_pass",
+                       "extra": "dropped"}) == \
+        {"topic": "Robotics", "audience_level": "Beginner", "pipeline_profile": "single_pass"}
+
+
+@pytest.mark.parametrize("body", [{}, {"topic": "  "}, ["Robotics"], {"topic": "Robotics", "pipeline_profile": "huge"}])
+def test_invalid_submissions_are_refused(body):
+    with pytest.raises(HTTPError) as error:
+        job_inputs(body)
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize("run_id", ["..", "../x", "a/b", "/tmp", "missing"])
+def test_incremental_runs_must_name_an_earlier_run_directory(workdir, run_id):
+    os.makedirs(os.path.join(OUTPUT_DIR, "a"))
+    with pytest.raises(HTTPError) as error:
+        job_inputs({"topic": "Robotics", "incremental_from": run_id})
+    assert error.value.status == 400
+
+
+def test_jobs_are_claimed_in_submission_order(queue, clock):
+    first = queue.submit({"topic": "first"})
+    clock.advance(1)
+    second = queue.submit({"topic": "second"})
+    assert queue.claim()["id"] == first["id"]
+    assert queue.claim()["id"] == second["id"]
+    assert queue.claim() is None
+    assert queue.counts()["running"] == 2
+
+
+def test_queues_sharing_a_file_never_claim_the_same_job(tmp_path):
+    queues = [JobQueue(str(tmp_path / "jobs.sqlite")) for _ in range(4)]
+    submitted = {queues[0].submit({"topic": f"topic {n}"})["id"] for n in range(40)}
+
+    def claim_all(queue):
+        claimed = []
+        while (job := queue.claim()) is not None:
+            claimed.append(job["id"])
+        return claimed
+
+    with ThreadPoolExecutor(len(queues)) as executor:
+        claimed = [job_id for jobs in executor.map(claim_all, queues) for job_id in jobs]
+    for queue in queues:
+        queue.close()
+    assert sorted(claimed) == sorted(submitted)
+
+
+def test_only_queued_jobs_can_be_cancelled(queue, clock):
+    running = queue.submit({"topic": "running"})
+    clock.advance(1)
+    queued = queue.submit({"topic": "queued"})
+    queue.claim()
+    assert not queue.cancel(running["id"])
+    assert queue.cancel(queued["id"])
+    assert queue.get(queued["id"])["status"] == "cancelled"
+
+
+def test_running_jobs_are_queued_again_with_their_run(queue):
+    job = queue.submit({"topic": "Robotics"})
+    queue.claim()
+    queue.set_run_id(job["id"], "run-1")
+    assert queue.requeue_running() == 1
+    claimed = queue.claim()
+    assert (claimed["id"], claimed["run_id"], claimed["attempts"]) == (job["id"], "run-1", 2)
+
+
+async def request(address, method, path, body=None):
+    """Status and JSON payload of one HTTP request to the service"""
+    host, port = address.removeprefix("http://").rsplit(":", 1)
+    reader, writer = await asyncio.open_connection(host, int(port))
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_service_runs_submitted_jobs(workdir, queue):
+    async def run():
+        service = ReportService(queue, workers=1)
+        address = await service.start(host="127.0.0.1", port=0)
+        try:
+            status, job = await request(address, "POST", "/jobs", {"topic": "Robotics", "audience_level": "Expert"})
+            assert status == 202 and job["status"] == "queued"
+            for _ in range(600):
+                status, job = await request(address, "GET", f"/jobs/{job['id']}")
+                if job["status"] not in ("queued", "running"):
+                    break
+                await asyncio.sleep(0.05)
+            health = (await request(address, "GET", "/health"))[1]
+            missing = await request(address, "GET", "/jobs/unknown")
+            refused = await request(address, "POST", "/jobs", {"topic": "Robotics", "incremental_from": "../x"})
+        finally:
+            await service.stop()
+        return job, health, missing, refused
+
+    job, health, missing, refused = asyncio.run(run())
+    assert job["status"] == "completed", job["error"]
+    assert job["progress"] == {"stage": "completed", "sections_total": 3, "sections_written": 3,
+                               "sections_skipped": 0}
+    assert os.path.exists(job["result"]["report_path"])
+    assert os.path.exists(os.path.join(OUTPUT_DIR, job["run_id"], SECTIONS_FILE))
+    assert health["jobs"]["completed"] == 1 and health["stand_in_llm"]
+    assert missing[0] == 404
+    assert refused[0] == 400
+
+
+def test_job_topics_cannot_write_outside_of_their_run(workdir, queue):
+    async def run():
+        service = ReportService(queue, workers=1)
+        address = await service.start(host="127.0.0.1", port=0)
+        try:
+            _, job = await request(address, "POST", "/jobs", {"topic": "../../../../escaped", "audience_level": "x"})
+            while job["status"] in ("queued", "running"):
+                await asyncio.sleep(0.05)
+                job = (await request(address, "GET", f"/jobs/{job['id']}"))[1]
+        finally:
+            await service.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert job["status"] == "completed", job["error"]
+    run_dir = os.path.realpath(os.path.join(OUTPUT_DIR, job["run_id"]))
+    assert os.path.realpath(job["result"]["report_path"]).startswith(run_dir + os.sep)
+    assert not any("escaped" in name for name in os.listdir(workdir.parent))
@@ -0,0 +1,44 @@
+import pytest
+
+from src.reporting_flow.streaming import GenerationAborted, TokenSink, current_stage, repetition_guard
+
+
+def stream(sink, deltas):
+    with sink.generation() as generation:
+        for delta in deltas:
+            generation.push(delta)
+    return generation.text
+
+
+def test_deltas_and_the_end_of_each_generation_are_emitted():
+    events = []
+    sink = TokenSink(events.append, section=2)
+    assert stream(sink, ["Hello ", "world"]) == "Hello world"
+    assert [event["type"] for event in events] == ["token", "token", "generation"]
+    assert events[-1]["status"] == "completed" and events[-1]["section"] == 2
+
+
+def test_an_aborted_task_is_not_generated_again():
+    events = []
+    sink = TokenSink(events.append)
+    token = current_stage.set("writing_task")
+    try:
+        sink.abort()
+        with pytest.raises(GenerationAborted):
+            stream(sink, ["Hello"])
+        # The agent's retry is refused before reaching the provider
+        with pytest.raises(GenerationAborted, match="writing_task was aborted"):
+            with sink.generation():
+                pytest.fail("an aborted task was generated again")
+        current_stage.set("editing_task")
+        assert stream(sink, ["Edited"]) == "Edited"
+    finally:
+        current_stage.reset(token)
+    assert [event["status"] for event in events if event["type"] == "generation"] == ["aborted", "completed"]
+
+
+def test_repetition_guard_aborts_a_looping_generation():
+    sink = TokenSink(lambda event: None, guard=repetition_guard(3))
+    assert stream(sink, ["a\n", "b\n", "a\n", "c\n"]) == "a\nb\na\nc\n"
+    with pytest.raises(GenerationAborted, match="guard"):
+        stream(sink, ["again\n"] * 3)